@@ -1,22 +1,49 @@
+import asyncio
+import json
 import os
+import re
+import threading
+from typing import Any, Dict, List, Tuple, Union
 from dotenv import load_dotenv
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import AzureChatOpenAI
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError, create_model
+from models import ParsedResume
+from services.container import container
+from services.llm_gateway import governed_chat_model
+# from langchain_openai import AzureChatOpenAI  # only with the Azure model below; it adds seconds to startup
+from services.llm_cache import get_llm_cache
+from utils.tokens import count_tokens
 
 load_dotenv()
 
-# llm = AzureChatOpenAI (
-#     azure_deployment="gpt-4o",
-#     api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
-#     temperature=0.7
-# )
+# Resumes longer than this (in tokens) are parsed in section-aware chunks
+PARSE_CHUNK_THRESHOLD = int(os.getenv("PARSE_CHUNK_THRESHOLD", "6000"))
+# Target size of one chunk, in tokens
+PARSE_CHUNK_TOKENS = int(os.getenv("PARSE_CHUNK_TOKENS", "2500"))
+# Chunk parse calls in flight for a single resume
+PARSE_CHUNK_CONCURRENCY = int(os.getenv("PARSE_CHUNK_CONCURRENCY", "4"))
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-    temperature=0.7
-)
+# Stored with each parse: {"input_tokens", "output_tokens", "chunks"}
+PARSE_TOKENS_FIELD = "parse_tokens"
+
+def _parse_llm():
+    # return AzureChatOpenAI (
+    #     azure_deployment="gpt-4o",
+    #     api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
+    #     temperature=0.7
+    # )
+    return governed_chat_model(
+        model="gemini-2.0-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=0.7,
+        cache=get_llm_cache()
+    )
+
+
+# Clients and chains are built on first use (see services.container)
+container.register("parse_llm", _parse_llm)
+llm = container.lazy("parse_llm")
 
 template = """
 You are a resume parsing assistant. Extract the following fields from the resume and return them in JSON format:
@@ -25,13 +52,338 @@ You are a resume parsing assistant. Extract the following fields from the resume
 - email
 - phone_number
 - skills (list)
-- education (list with degree, institution, start_date, end_date)
-- work_experience (list with position, company, start_date, end_date)
+- education (list with degree, institution, field, year)
+- work_experience (list with position, company, duration, description)
 - certifications (list with title, issuer, date)
 
 Only return valid JSON. Resume:
 {resume_text}
 """
 
+# Schema-constrained output; the raw message is kept for local repair and token counts
+container.register("parse_structured_llm",
+                   lambda: container.get("parse_llm").with_structured_output(ParsedResume, include_raw=True))
+structured_llm = container.lazy("parse_structured_llm")
+
 prompt = PromptTemplate.from_template(template)
-parse_resume_chain = prompt | llm
+container.register("parse_resume_chain", lambda: prompt | container.get("parse_structured_llm"))
+parse_resume_chain = container.lazy("parse_resume_chain")
+
+chunk_template = """
+You are a resume parsing assistant. Below is part {part} of {parts} of one resume, split by section.
+Extract the following fields from this part only and return them in JSON format. Use null or an
+empty list for anything that does not appear in this part; do not guess.
+
+- full_name
+- email
+- phone_number
+- skills (list)
+- education (list with degree, institution, field, year)
+- work_experience (list with position, company, duration, description)
+- certifications (list with title, issuer, date)
+
+Only return valid JSON. Resume part:
+{resume_text}
+"""
+
+chunk_prompt = PromptTemplate.from_template(chunk_template)
+# Whole resumes and chunks go through one batch; inputs with a "part" get the chunk prompt
+container.register("parse_chain", lambda: RunnableLambda(
+    lambda inputs: (chunk_prompt if "part" in inputs else prompt).invoke(inputs)
+) | container.get("parse_structured_llm"))
+parse_chain = container.lazy("parse_chain")
+
+retry_template = """
+You are a resume parsing assistant. An earlier extraction from the resume below returned invalid
+values for these fields: {fields}
+
+Errors:
+{errors}
+
+Extract only these fields again, following the schema exactly. Resume:
+{resume_text}
+"""
+
+retry_prompt = PromptTemplate.from_template(retry_template)
+
+SECTION_HEADINGS = {
+    "summary", "professional summary", "profile", "objective", "about me",
+    "experience", "work experience", "professional experience", "employment", "employment history",
+    "work history", "career history", "education", "academic background", "qualifications",
+    "skills", "technical skills", "core competencies", "key skills",
+    "certifications", "certificates", "licenses", "licenses and certifications",
+    "projects", "publications", "awards", "honors", "achievements", "languages",
+    "interests", "volunteer", "volunteering", "references", "training", "courses",
+}
+
+
+def load_parsed_resume(result) -> dict:
+    """Decode a JSON object from raw LLM output, tolerating fences, prose and trailing commas; raises ValueError"""
+    raw_json_text = result.content if hasattr(result, 'content') else str(result)
+    if not raw_json_text:
+        raise ValueError("No parsed JSON returned from LLM")
+
+    # Remove markdown fences (```json ... ```) and anything around the outermost object
+    cleaned_json_str = re.sub(r"^```(?:json)?\s*|```$", "", raw_json_text.strip(), flags=re.MULTILINE)
+    start, end = cleaned_json_str.find("{"), cleaned_json_str.rfind("}")
+    if start != -1 and end > start:
+        cleaned_json_str = cleaned_json_str[start:end + 1]
+    cleaned_json_str = re.sub(r",\s*([}\]])", r"\1", cleaned_json_str)
+    try:
+        parsed = json.loads(cleaned_json_str)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse JSON from LLM output: {e}")
+    if not isinstance(parsed, dict):
+        raise ValueError("LLM output is not a JSON object")
+    return parsed
+
+
+# Counters for the structured parse path (served by /api/resume/upload/parse-stats)
+_parse_stats = {"calls": 0, "structured": 0, "repaired": 0, "retried": 0, "retry_fixed": 0, "fields_dropped": 0}
+_parse_stats_lock = threading.Lock()
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _parse_stats_lock:
+        _parse_stats[key] += amount
+
+
+def parse_stats() -> Dict[str, int]:
+    with _parse_stats_lock:
+        return dict(_parse_stats)
+
+
+def _raw_payload(raw) -> dict:
+    """The arguments of the schema tool call, or a JSON object recovered from the message text"""
+    for tool_call in getattr(raw, "tool_calls", None) or []:
+        if isinstance(tool_call.get("args"), dict):
+            return tool_call["args"]
+    try:
+        return load_parsed_resume(raw)
+    except ValueError:
+        return {}
+
+
+def _coerce_field(name: str, value: Any) -> Any:
+    """Cheap fixes for common near-misses: comma-separated skills, a single object where a list is expected"""
+    if name == "skills" and isinstance(value, str):
+        return [skill.strip() for skill in value.split(",") if skill.strip()]
+    if isinstance(ParsedResume.model_fields[name].default, list) and isinstance(value, dict):
+        return [value]
+    return value
+
+
+def repair_parsed_resume(payload: dict) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Validate each field of a raw parse on its own.
+
+    Returns the valid fields and an error message per field that could not
+    be repaired locally; one bad field no longer sinks the whole parse.
+    """
+    valid, errors = {}, {}
+    for name in ParsedResume.model_fields:
+        if name not in payload or payload[name] is None:
+            continue
+        value = _coerce_field(name, payload[name])
+        try:
+            valid[name] = getattr(ParsedResume(**{name: value}), name)
+        except ValidationError as e:
+            errors[name] = "; ".join(error["msg"] for error in e.errors())
+    return valid, errors
+
+
+async def _retry_fields(call_inputs: Dict[str, Any], errors: Dict[str, str],
+                        usage: Dict[str, int]) -> Dict[str, Any]:
+    """One targeted call for just the fields that failed; returns the ones it got right"""
+    fields = {name: (ParsedResume.model_fields[name].annotation, ParsedResume.model_fields[name].default)
+              for name in errors}
+    schema = create_model("ResumeFieldsRetry", **fields)
+    retry_inputs = {
+        "fields": ", ".join(errors),
+        "errors": "\n".join(f"- {name}: {error}" for name, error in errors.items()),
+        "resume_text": call_inputs["resume_text"],
+    }
+    result = await (retry_prompt | llm.with_structured_output(schema, include_raw=True)).ainvoke(retry_inputs)
+    for key, tokens in _token_usage(result["raw"], retry_prompt.format(**retry_inputs)).items():
+        usage[key] += tokens
+    if result.get("parsed") is not None:
+        return result["parsed"].dict()
+    valid, _ = repair_parsed_resume(_raw_payload(result["raw"]))
+    return {name: value for name, value in valid.items() if name in errors}
+
+
+def is_section_heading(line: str) -> bool:
+    """A short line naming a resume section, e.g. "EXPERIENCE" or "Technical Skills:" """
+    words = line.strip().rstrip(":").strip()
+    if not words or len(words) > 40 or len(words.split()) > 5:
+        return False
+    if words.lower().replace("&", "and") in SECTION_HEADINGS:
+        return True
+    return words.isupper() and any(c.isalpha() for c in words)
+
+
+def split_resume_sections(text: str) -> List[List[str]]:
+    """Lines of the resume grouped by section; the first group is the header (name, contact)"""
+    sections = [[]]
+    for line in text.splitlines():
+        if is_section_heading(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return [section for section in sections if any(line.strip() for line in section)]
+
+
+def chunk_resume_text(text: str, max_tokens: int = PARSE_CHUNK_TOKENS) -> List[str]:
+    """Split resume text into chunks of about max_tokens that keep sections together.
+
+    Whole sections are packed into a chunk while they fit; a section larger
+    than a chunk is split between lines and every piece repeats its heading,
+    so the model still knows what it is reading.
+    """
+    chunks, current, current_tokens = [], [], 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for section in split_resume_sections(text):
+        section_tokens = count_tokens("\n".join(section))
+        if section_tokens > max_tokens:
+            flush()
+            heading = section[0] if is_section_heading(section[0]) else None
+            for position, line in enumerate(section):
+                line_tokens = count_tokens(line) + 1
+                if current and current_tokens + line_tokens > max_tokens:
+                    flush()
+                    if heading and position > 0:
+                        current, current_tokens = [heading], count_tokens(heading) + 1
+                current.append(line)
+                current_tokens += line_tokens
+            flush()
+            continue
+        if current and current_tokens + section_tokens > max_tokens:
+            flush()
+        current.extend(section)
+        current_tokens += section_tokens + 1
+    flush()
+    return chunks or [text]
+
+
+def merge_parsed_resumes(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge partial parses: first non-empty scalar wins, lists are concatenated without duplicates"""
+    merged: Dict[str, Any] = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                seen = {json.dumps(item, sort_keys=True).lower() for item in items}
+                for item in value:
+                    marker = json.dumps(item.strip() if isinstance(item, str) else item, sort_keys=True).lower()
+                    if marker not in seen:
+                        seen.add(marker)
+                        items.append(item)
+            elif value not in (None, "", {}) and merged.get(key) in (None, "", {}):
+                merged[key] = value
+    return merged
+
+
+def _token_usage(raw, prompt_text: str) -> Dict[str, int]:
+    """Prompt and completion tokens of one call, from the model's usage report when it has one"""
+    usage = getattr(raw, "usage_metadata", None) or {}
+    content = raw.content if hasattr(raw, "content") else str(raw)
+    tool_calls = getattr(raw, "tool_calls", None) or []
+    completion = content if isinstance(content, str) else json.dumps(content)
+    completion += "".join(json.dumps(tool_call.get("args")) for tool_call in tool_calls)
+    return {
+        "input_tokens": usage.get("input_tokens") or count_tokens(prompt_text),
+        "output_tokens": usage.get("output_tokens") or count_tokens(completion),
+    }
+
+
+async def _settle_call(call_inputs: Dict[str, Any], result: Dict[str, Any],
+                       usage: Dict[str, int]) -> Dict[str, Any]:
+    """Fields of one parse call: structured output, else local repair plus at most one retry"""
+    raw = result.get("raw")
+    call_prompt = chunk_prompt if "part" in call_inputs else prompt
+    for key, tokens in _token_usage(raw, call_prompt.format(**call_inputs)).items():
+        usage[key] += tokens
+
+    _count("calls")
+    if result.get("parsed") is not None:
+        _count("structured")
+        return result["parsed"].dict()
+
+    payload = _raw_payload(raw)
+    if not payload:
+        raise ValueError(f"Failed to parse resume: {result.get('parsing_error') or 'no structured output'}")
+    valid, errors = repair_parsed_resume(payload)
+    if not errors:
+        _count("repaired")
+        return ParsedResume(**valid).dict()
+
+    _count("retried")
+    try:
+        fixed = await _retry_fields(call_inputs, errors, usage)
+    except Exception as e:
+        print(f"Targeted parse retry failed: {e}")
+        fixed = {}
+    valid.update(fixed)
+    if fixed and len(fixed) == len(errors):
+        _count("retry_fixed")
+    # Fields still invalid fall back to their empty defaults rather than failing the upload
+    _count("fields_dropped", len(errors) - len(fixed))
+    return ParsedResume(**valid).dict()
+
+
+async def aparse_resume_texts(texts: List[str], max_concurrency: int) -> List[Union[Dict[str, Any], Exception]]:
+    """Parse resume texts with batched LLM calls; failures are returned as exceptions.
+
+    Texts over PARSE_CHUNK_THRESHOLD tokens are split into section-aware chunks
+    that are parsed in the same batch and merged back into one record. Output
+    is schema-constrained to ParsedResume; a call whose output does not
+    validate is repaired locally, and only fields that still fail get one
+    targeted retry. Records are validated against the model and carry their
+    token counts under PARSE_TOKENS_FIELD.
+    """
+    inputs, owners = [], []
+    for index, text in enumerate(texts):
+        chunks = chunk_resume_text(text) if count_tokens(text) > PARSE_CHUNK_THRESHOLD else [text]
+        for part, chunk in enumerate(chunks, start=1):
+            if len(chunks) == 1:
+                inputs.append({"resume_text": chunk})
+            else:
+                inputs.append({"resume_text": chunk, "part": part, "parts": len(chunks)})
+            owners.append(index)
+
+    results = await parse_chain.abatch(inputs, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+
+    grouped: List[List[Any]] = [[] for _ in texts]
+    for owner, call_inputs, result in zip(owners, inputs, results):
+        grouped[owner].append((call_inputs, result))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def settle(calls) -> Union[Dict[str, Any], Exception]:
+        try:
+            usage = {"input_tokens": 0, "output_tokens": 0, "chunks": len(calls)}
+            parts = []
+            for call_inputs, result in calls:
+                if isinstance(result, Exception):
+                    raise result
+                async with semaphore:
+                    parts.append(await _settle_call(call_inputs, result, usage))
+            parsed = parts[0] if len(parts) == 1 else ParsedResume(**merge_parsed_resumes(parts)).dict()
+            parsed[PARSE_TOKENS_FIELD] = usage
+            return parsed
+        except Exception as e:
+            return e
+
+    return list(await asyncio.gather(*(settle(calls) for calls in grouped)))
+
+
+async def aparse_resume(text: str) -> Dict[str, Any]:
+    """Parse one resume (chunked when long); raises ValueError or the LLM error on failure"""
+    [parsed] = await aparse_resume_texts([text], PARSE_CHUNK_CONCURRENCY)
+    if isinstance(parsed, Exception):
+        raise parsed
+    return parsed
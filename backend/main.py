@@ -1,9 +1,36 @@
+import os
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from routes.resume import router as resume_router
 from routes.jobs import router as jobs_router
+from services.container import container, STARTUP_WARMUP
+from services.llm_cache import get_llm_cache
+from utils.extract_text import shutdown_pool as shutdown_pdf_pool
+from utils.uploads import UploadLimitMiddleware, UPLOAD_MAX_BYTES, BULK_UPLOAD_MAX_BYTES, MULTIPART_OVERHEAD
+
+# Time allowed for importing the app (every worker pays it); exceeding it is reported at startup
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "3000"))
+IMPORT_TIME_MS = round((time.perf_counter() - _import_started) * 1000, 2)
+if IMPORT_TIME_MS > STARTUP_IMPORT_BUDGET_MS:
+    print(f"App import took {IMPORT_TIME_MS} ms, over the {STARTUP_IMPORT_BUDGET_MS:g} ms budget")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_WARMUP:
+        container.start_warm_up()
+    yield
+    container.shutdown()
+    shutdown_pdf_pool()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +43,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# Oversized uploads are refused before their body is spooled
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/api/resume/upload": UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD,
+        "/api/resume/upload/bulk": BULK_UPLOAD_MAX_BYTES,
+    },
 )
 
 app.include_router(resume_router, prefix="/api/resume")
@@ -25,6 +62,21 @@ app.include_router(jobs_router, prefix="/api/jobs")
 def read_root():
     return {"message": "StaffPilot API is running - Resume Parser & Job Matching"}
 
+@app.get("/api/ready")
+def readiness():
+    """503 until the optional startup warm-up has built every service"""
+    status = {
+        **container.readiness(),
+        "import_ms": IMPORT_TIME_MS,
+        "import_budget_ms": STARTUP_IMPORT_BUDGET_MS,
+    }
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/api/llm-cache/stats")
+def llm_cache_stats():
+    cache = get_llm_cache()
+    return cache.stats() if cache else {"enabled": False}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
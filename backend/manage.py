@@ -0,0 +1,196 @@
+"""Maintenance commands, run from the backend directory.
+
+    python manage.py resume-store [migrate|compact|rebuild-index|stats]
+    python manage.py sql-store import [--replace]
+    python manage.py match-scores [sync|rebuild|verify]
+    python manage.py embeddings [sync|rebuild]
+    python manage.py llm-cache [stats|clear]
+    python manage.py bench-scorer [candidates]
+    python manage.py bench-pdf [pdf files or directories]
+
+The commands live here rather than under `python -m services.<module>`: the
+services package imports its modules on load, so running one of them as a
+script would import it twice and act on a second copy of its shared objects.
+"""
+import argparse
+import os
+import time
+
+
+def resume_store_command(args) -> None:
+    from services.resume_store import resume_store
+    if args.command == "migrate":
+        print(f"Migrated {resume_store.migrate_legacy()} record(s)")
+    elif args.command == "compact":
+        print(resume_store.compact())
+    elif args.command == "rebuild-index":
+        print(f"Indexed {resume_store.rebuild_index()} record(s)")
+    else:
+        resume_store.ensure_ready()
+        print({"records": len(resume_store), "bytes": os.path.getsize(resume_store.file_path)})
+
+
+def sql_store_command(args) -> None:
+    """Upsert job_des.json into the SQLite database; --replace reloads everything from the JSON files"""
+    from services.sql_store import SqlStorage
+    storage = SqlStorage()
+    if args.replace:
+        print(storage.import_from_json(replace=True))
+    else:
+        print(storage.import_jobs())
+
+
+def match_scores_command(args) -> None:
+    """Bring the materialized match score table up to date, rebuild it or check it against a full recompute"""
+    from services.batch_scorer import BatchScorer
+    from services.match_scores import MatchScoreTable
+    from services.storage import get_storage
+    storage = get_storage()
+    resumes = storage.load_resumes()
+    jobs = storage.load_jobs()
+    scorer = BatchScorer()
+    scorer.sync(resumes, storage.resume_version())
+    table = MatchScoreTable()
+    if args.command == "rebuild":
+        print(table.rebuild(jobs, resumes, scorer))
+    elif args.command == "verify":
+        table.sync(jobs, resumes, scorer)
+        problems = table.verify(jobs, resumes, scorer)
+        print("\n".join(problems) or f"OK: table matches a full recompute for {len(resumes)} candidates")
+        if problems:
+            raise SystemExit(1)
+    else:
+        print(table.sync(jobs, resumes, scorer))
+
+
+def embeddings_command(args) -> None:
+    """Bring the FAISS resume index up to date, or re-embed every stored resume"""
+    from services.embeddings_service import EmbeddingsService
+    from services.storage import get_storage
+    resumes = get_storage().load_resumes()
+    service = EmbeddingsService()
+    count = service.rebuild(resumes) if args.command == "rebuild" else service.sync(resumes)
+    service.flush()
+    print(f"Embedded {count} resume(s); index holds {len(service)}")
+
+
+def llm_cache_command(args) -> None:
+    from services.llm_cache import LLMResponseCache
+    cache = LLMResponseCache()
+    if args.command == "clear":
+        cache.clear()
+        print("LLM cache cleared")
+    else:
+        print(cache.stats())
+
+
+def bench_scorer_command(args) -> None:
+    """Time BatchScorer on synthetic candidates"""
+    import random
+    from models import Job, Resume
+    from services.batch_scorer import BatchScorer
+
+    rng = random.Random(42)
+    skills = [f"skill{i}" for i in range(2000)] + ["Python", "SQL", "React", "Data Analysis", "Leadership"]
+    titles = ["Data Scientist", "Software Engineer", "Product Manager", "Nurse", "Material Handler"]
+    resumes = [
+        Resume(
+            resume_id=i,
+            skills=rng.sample(skills, rng.randint(2, 10)),
+            work_experience=[{"position": rng.choice(titles), "company": f"Company {rng.randint(1, 500)}"}
+                             for _ in range(rng.randint(0, 4))],
+            education=[{"degree": "BSc"}] if rng.random() < 0.7 else [],
+        )
+        for i in range(args.candidates)
+    ]
+    job = Job(jobId=1, clientId=1, title="Data Scientist", description="Python SQL data analysis",
+              jobType="Remote", employmentType="Full-Time", status="Open", createdDate="")
+
+    scorer = BatchScorer()
+    started = time.perf_counter()
+    scorer.sync(resumes, (1, 1))
+    scorer.score_all(job)
+    print(f"build + first score: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    runs = 20
+    started = time.perf_counter()
+    for _ in range(runs):
+        scorer.top_k(job, 5)
+    print(f"score + top-5 of {args.candidates} candidates: {(time.perf_counter() - started) * 1000 / runs:.1f} ms")
+
+
+def bench_pdf_command(args) -> None:
+    """Time PDF extraction against the previous implementation, on the given PDFs or a generated corpus"""
+    from io import BytesIO
+    from pypdf import PdfReader
+    from utils.extract_text import extract_text_from_pdf
+    from utils.pdf_samples import sample_corpus
+
+    def legacy_extract(file_bytes: bytes) -> str:
+        # The previous implementation: two extract_text calls per page, no budgets
+        reader = PdfReader(BytesIO(file_bytes))
+        return "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(".pdf"))
+        else:
+            paths.append(path)
+    corpus = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            corpus.append(f.read())
+    corpus = corpus or sample_corpus()
+    total_pages = sum(len(PdfReader(BytesIO(data)).pages) for data in corpus)
+    print(f"{len(corpus)} PDF(s), {total_pages} page(s){'' if paths else ' (generated)'}")
+
+    extract_text_from_pdf(corpus[0])  # start the worker pool outside the timing
+    for name, extract in (("before", legacy_extract), ("after", extract_text_from_pdf)):
+        started = time.perf_counter()
+        for data in corpus:
+            extract(data)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>6}: {elapsed:.2f} s, {len(corpus) / elapsed:.2f} docs/s, {total_pages / elapsed:.1f} pages/s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="StaffPilot maintenance commands")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    resume_store = groups.add_parser("resume-store", help="resume JSONL store and its index")
+    resume_store.add_argument("command", nargs="?", default="stats",
+                              choices=["migrate", "compact", "rebuild-index", "stats"])
+    resume_store.set_defaults(handler=resume_store_command)
+
+    sql_store = groups.add_parser("sql-store", help="SQLite storage backend")
+    sql_store.add_argument("command", choices=["import"])
+    sql_store.add_argument("--replace", action="store_true",
+                           help="clear resumes, jobs and email logs and reload them from the JSON files")
+    sql_store.set_defaults(handler=sql_store_command)
+
+    match_scores = groups.add_parser("match-scores", help="materialized match score table")
+    match_scores.add_argument("command", nargs="?", default="sync", choices=["sync", "rebuild", "verify"])
+    match_scores.set_defaults(handler=match_scores_command)
+
+    embeddings = groups.add_parser("embeddings", help="FAISS index of resume embeddings")
+    embeddings.add_argument("command", nargs="?", default="sync", choices=["sync", "rebuild"])
+    embeddings.set_defaults(handler=embeddings_command)
+
+    llm_cache = groups.add_parser("llm-cache", help="persistent LLM response cache")
+    llm_cache.add_argument("command", nargs="?", default="stats", choices=["stats", "clear"])
+    llm_cache.set_defaults(handler=llm_cache_command)
+
+    bench_scorer = groups.add_parser("bench-scorer", help="benchmark the vectorized match scorer")
+    bench_scorer.add_argument("candidates", nargs="?", type=int, default=100_000)
+    bench_scorer.set_defaults(handler=bench_scorer_command)
+
+    bench_pdf = groups.add_parser("bench-pdf", help="benchmark PDF text extraction")
+    bench_pdf.add_argument("paths", nargs="*", help="PDF files or directories (default: a generated corpus)")
+    bench_pdf.set_defaults(handler=bench_pdf_command)
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    arguments.handler(arguments)
@@ -46,8 +46,8 @@ class Certification(BaseModel):
     issuer: Optional[str] = None
     date: Optional[str] = None
 
-class Resume(BaseModel):
-    filename: Optional[str] = None
+class ParsedResume(BaseModel):
+    """The fields the resume parser extracts (the structured output schema)"""
     full_name: Optional[str] = None
     email: Optional[str] = None
     phone_number: Optional[str] = None
@@ -55,8 +55,22 @@ class Resume(BaseModel):
     work_experience: List[WorkExperience] = []
     education: List[Education] = []
     certifications: List[Certification] = []
+
+class Resume(ParsedResume):
+    resume_id: Optional[int] = None
+    filename: Optional[str] = None
     timestamp: Optional[str] = None
 
+class FitVerdict(str, Enum):
+    STRONG = "strong fit"
+    GOOD = "good fit"
+    WEAK = "weak fit"
+
+class MatchAssessment(BaseModel):
+    """The LLM's summary and fit verdict for one candidate (the structured output schema of the rerank stage)"""
+    summary: str
+    verdict: FitVerdict
+
 class JobMatchResult(BaseModel):
     candidate_name: str
     candidate_email: str
@@ -65,4 +79,68 @@ class JobMatchResult(BaseModel):
     relevant_experience: List[str]
     education_match: str
     summary: str
+    fit_verdict: Optional[FitVerdict] = None  # set by the LLM rerank stage
     resume_data: Resume
+
+class RetrievalStrategy(str, Enum):
+    ALL = "all"
+    LEXICAL = "lexical"
+    VECTOR = "vector"
+
+class MatchCascadeConfig(BaseModel):
+    # "lexical" keeps only candidates sharing at least one skill with the job text, so
+    # jobs whose text names no candidate skill get no results (use "all" or "vector")
+    retrieval: RetrievalStrategy = RetrievalStrategy.ALL
+    retrieve_limit: int = 500
+    rerank_limit: Optional[int] = None  # defaults to top_n
+    llm_rerank: bool = False
+
+class MatchStage(BaseModel):
+    name: str
+    strategy: Optional[str] = None
+    limit: Optional[int] = None
+    input_count: int
+    output_count: int
+    duration_ms: float
+
+class MatchPipelineResult(BaseModel):
+    job: Optional[Job] = None
+    results: List[JobMatchResult] = []
+    stages: List[MatchStage] = []
+    total_ms: float = 0.0
+
+class IngestionFileState(str, Enum):
+    QUEUED = "queued"
+    EXTRACTING = "extracting"
+    PARSING = "parsing"
+    STORED = "stored"
+    FAILED = "failed"
+
+class IngestionFile(BaseModel):
+    filename: str
+    state: IngestionFileState = IngestionFileState.QUEUED
+    resume_id: Optional[int] = None
+    deduplicated: bool = False
+    error: Optional[str] = None
+
+class IngestionJob(BaseModel):
+    job_id: str
+    status: str = "queued"  # queued | running | completed
+    files: List[IngestionFile] = []
+    total: int = 0
+    stored: int = 0
+    failed: int = 0
+    llm_calls_saved: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    files_per_second: float = 0.0
+
+class ChatContext(BaseModel):
+    text: str = ""
+    resume_ids: List[int] = []
+    job_ids: List[int] = []
+    tokens: int = 0
+    token_budget: int = 0
+    omitted: int = 0  # retrieved records left out to stay within the budget
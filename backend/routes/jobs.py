@@ -1,38 +1,75 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services import JobMatchingService
-from models import JobMatchResult, Job
+from services import container
+from services.llm_cache import bypass_llm_cache
+from models import JobMatchResult, Job, MatchCascadeConfig, MatchPipelineResult, RetrievalStrategy
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import json
 
 router = APIRouter()
 
-# Initialize Job Matching Service
-job_service = JobMatchingService()
+# Shared with the resume routes; built on first use
+job_service = container.lazy("job_service")
 
 class JobMatchRequest(BaseModel):
     job_title: str
     top_candidates: Optional[int] = 5
+    semantic_candidates: Optional[int] = None  # shorthand for retrieval="vector" with this limit
+    retrieval: Optional[RetrievalStrategy] = None
+    retrieve_limit: Optional[int] = None
+    rerank_limit: Optional[int] = None
+    llm_rerank: bool = False
+    refresh_summaries: bool = False  # ignore cached LLM summaries for this request
+
+    def cascade(self) -> MatchCascadeConfig:
+        """Build the matching cascade configuration from the request"""
+        config = MatchCascadeConfig(rerank_limit=self.rerank_limit, llm_rerank=self.llm_rerank)
+        if self.semantic_candidates:
+            config.retrieval = RetrievalStrategy.VECTOR
+            config.retrieve_limit = self.semantic_candidates
+        if self.retrieval:
+            config.retrieval = self.retrieval
+        if self.retrieve_limit:
+            config.retrieve_limit = self.retrieve_limit
+        return config
+
+class MatchMatrixRequest(BaseModel):
+    top_candidates: int = 5  # per job
+    best_jobs: int = 3  # per candidate
+    include_summaries: bool = False
+    status_filter: Optional[str] = None
 
 class JobListRequest(BaseModel):
     status_filter: Optional[str] = None
 
+def server_timing_header(report: MatchPipelineResult) -> str:
+    """Format the pipeline stage timings (ms) as a Server-Timing header value"""
+    timings = [f"{stage.name};dur={stage.duration_ms}" for stage in report.stages]
+    timings.append(f"total;dur={report.total_ms}")
+    return ", ".join(timings)
+
 @router.post("/match-candidates", response_model=List[JobMatchResult])
-async def match_candidates_to_job(request: JobMatchRequest):
+async def match_candidates_to_job(request: JobMatchRequest, response: Response):
     """Match candidates to a specific job position"""
     try:
         if not request.job_title.strip():
             raise HTTPException(status_code=400, detail="Job title cannot be empty")
         
-        results = job_service.match_candidates_to_job(
-            job_title=request.job_title.strip(),
-            top_n=request.top_candidates
-        )
+        with bypass_llm_cache(request.refresh_summaries):
+            report = await job_service.arun_match_pipeline(
+                job_title=request.job_title.strip(),
+                top_n=request.top_candidates,
+                cascade=request.cascade()
+            )
+        response.headers["Server-Timing"] = server_timing_header(report)
+        results = report.results
         
         if not results:
             # Check if job exists
-            job = job_service.find_job_by_title(request.job_title)
-            if not job:
+            if not report.job:
                 raise HTTPException(
                     status_code=404, 
                     detail=f"Job with title '{request.job_title}' not found"
@@ -45,8 +82,47 @@ async def match_candidates_to_job(request: JobMatchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error matching candidates: {str(e)}")
 
+@router.post("/match-candidates/pipeline", response_model=MatchPipelineResult)
+async def match_candidates_pipeline(request: JobMatchRequest, response: Response):
+    """Run the matching cascade and return results with per-stage limits, counts and timings"""
+    if not request.job_title.strip():
+        raise HTTPException(status_code=400, detail="Job title cannot be empty")
+    
+    try:
+        with bypass_llm_cache(request.refresh_summaries):
+            report = await job_service.arun_match_pipeline(
+                job_title=request.job_title.strip(),
+                top_n=request.top_candidates,
+                cascade=request.cascade()
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching candidates: {str(e)}")
+    
+    if not report.job:
+        raise HTTPException(status_code=404, detail=f"Job with title '{request.job_title}' not found")
+    
+    response.headers["Server-Timing"] = server_timing_header(report)
+    return report
+
+@router.post("/match-matrix")
+async def match_matrix(request: MatchMatrixRequest):
+    """Score all jobs against all candidates and stream the results as NDJSON"""
+    if request.top_candidates < 0 or request.best_jobs < 0:
+        raise HTTPException(status_code=400, detail="top_candidates and best_jobs must not be negative")
+    
+    rows = job_service.iter_match_matrix(
+        top_k=request.top_candidates,
+        best_jobs=request.best_jobs,
+        include_summaries=request.include_summaries,
+        status_filter=request.status_filter
+    )
+    return StreamingResponse(
+        (json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/jobs", response_model=List[Job])
-async def get_available_jobs(status: Optional[str] = Query(None, description="Filter by job status (Open/Closed/Paused)")):
+def get_available_jobs(status: Optional[str] = Query(None, description="Filter by job status (Open/Closed/Paused)")):
     """Get list of available jobs, optionally filtered by status"""
     try:
         jobs = job_service.get_available_jobs(status_filter=status)
@@ -55,36 +131,23 @@ async def get_available_jobs(status: Optional[str] = Query(None, description="Fi
         raise HTTPException(status_code=500, detail=f"Error fetching jobs: {str(e)}")
 
 @router.get("/jobs/search")
-async def search_jobs(
+def search_jobs(
     title: Optional[str] = Query(None, description="Search by job title"),
     job_type: Optional[str] = Query(None, description="Filter by job type (OnSite/Remote/Hybrid)"),
     employment_type: Optional[str] = Query(None, description="Filter by employment type (Full-Time/Part-Time/Contract)")
 ):
     """Search jobs by various criteria"""
     try:
-        jobs = job_service.get_available_jobs()
-        
-        # Apply filters
-        if title:
-            jobs = [job for job in jobs if title.lower() in job.title.lower()]
-        
-        if job_type:
-            jobs = [job for job in jobs if job.jobType.value.lower() == job_type.lower()]
-        
-        if employment_type:
-            jobs = [job for job in jobs if job.employmentType.value.lower() == employment_type.lower()]
-        
-        return jobs
+        return job_service.search_jobs(title, job_type, employment_type)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
 
 @router.get("/jobs/{job_id}")
-async def get_job_by_id(job_id: int):
+def get_job_by_id(job_id: int):
     """Get specific job by ID"""
     try:
-        jobs = job_service.load_jobs()
-        job = next((job for job in jobs if job.jobId == job_id), None)
+        job = job_service.get_job_by_id(job_id)
         
         if not job:
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
@@ -95,7 +158,7 @@ async def get_job_by_id(job_id: int):
         raise HTTPException(status_code=500, detail=f"Error fetching job: {str(e)}")
 
 @router.get("/statistics")
-async def get_job_statistics():
+def get_job_statistics():
     """Get statistics about jobs and candidates"""
     try:
         stats = job_service.get_job_statistics()
@@ -104,49 +167,26 @@ async def get_job_statistics():
         raise HTTPException(status_code=500, detail=f"Error fetching statistics: {str(e)}")
 
 @router.post("/quick-match")
-async def quick_match_candidate(candidate_email: str, job_title: str):
+async def quick_match_candidate(candidate_email: str, job_title: str, refresh: bool = False):
     """Quick match a specific candidate to a job"""
     try:
         # Load specific candidate
-        resumes = job_service.load_resumes()
-        candidate = next((resume for resume in resumes if resume.email == candidate_email), None)
+        candidate = await job_service.afind_candidate_by_email(candidate_email)
         
         if not candidate:
             raise HTTPException(status_code=404, detail=f"Candidate with email {candidate_email} not found")
         
-        # Find job
-        job = job_service.find_job_by_title(job_title)
+        # Find job (storage reads and scoring run in a worker thread)
+        job = await asyncio.to_thread(job_service.find_job_by_title, job_title)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job '{job_title}' not found")
         
-        # Calculate match for this specific candidate
-        skill_score, matching_skills = job_service.calculate_skill_match_score(
-            candidate.skills, 
-            f"{job.title} {job.description}"
-        )
-        
-        relevant_exp = job_service.extract_relevant_experience(
-            [exp.dict() if hasattr(exp, 'dict') else exp for exp in candidate.work_experience],
-            job.title,
-            job.description
-        )
-        
-        exp_score = min(len(relevant_exp) * 0.2, 1.0)
-        education_score = 0.3 if candidate.education else 0.0
-        overall_score = (skill_score * 0.5) + (exp_score * 0.3) + (education_score * 0.2)
-        
-        summary = job_service.generate_match_summary(candidate, job, matching_skills, relevant_exp, overall_score)
-        
-        result = JobMatchResult(
-            candidate_name=candidate.full_name or "Unknown",
-            candidate_email=candidate.email or "Unknown",
-            match_score=round(overall_score * 100, 1),
-            matching_skills=matching_skills,
-            relevant_experience=relevant_exp,
-            education_match="Has formal education" if candidate.education else "No formal education listed",
-            summary=summary,
-            resume_data=candidate
-        )
+        # Same score as /match-candidates: read from the materialized table for open jobs
+        result = await asyncio.to_thread(job_service.match_candidate, candidate, job)
+        with bypass_llm_cache(refresh):
+            result.summary = await job_service.agenerate_match_summary(
+                candidate, job, result.matching_skills, result.relevant_experience, result.match_score / 100
+            )
         
         return result
     
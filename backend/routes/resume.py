@@ -1,52 +1,53 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
-from typing import Optional, Type
+from typing import List, Optional, Type
 from pydantic import BaseModel, BaseModel as PydanticBaseModel, Field
-from langchain.tools import BaseTool, Tool
-from langchain.agents import initialize_agent
-from langchain_openai import AzureChatOpenAI
-
-from utils.extract_text import extract_text_from_pdf
-from chains.parse_resume import parse_resume_chain
-from utils.email_service import EmailService
-from services import JobMatchingService
+from langchain_core.tools import BaseTool, Tool
+
+from utils.extract_text import aextract_text_from_pdf
+from chains.parse_resume import aparse_resume, aparse_resume_texts, parse_stats
+from services import IngestionService, ChatContextBuilder, IntentRouter, ChatSessionStore, container
+from services.ingestion import expand_uploads
+from services.upload_dedup import CONTENT_HASH_FIELD, TEXT_HASH_FIELD, text_hash
+from utils.uploads import UploadTooLarge, hash_upload
+from services.llm_gateway import llm_gateway, llm_lane
+from utils.tokens import count_tokens
+import asyncio
 import json
 import re
 import os
+import shutil
+import time
+import uuid
 from datetime import datetime
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import Memory
-from langchain.memory import ConversationBufferMemory as UpdatedConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnableSequence
+from langchain_core.prompts import PromptTemplate
+from langchain_core.callbacks import UsageMetadataCallbackHandler, get_usage_metadata_callback
+from models import IngestionJob
 
 load_dotenv()
 
-router = APIRouter()
+# Print the agent's reasoning steps to the console
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "false").lower() in ("1", "true", "yes")
 
-# Initialize services
-email_service = EmailService()
-job_service = JobMatchingService()
+router = APIRouter()
 
-# Initialize LLM and memory for conversation
-llm_chat = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-    temperature=0.7
-)
+# Services, the LLM client and the agent are built on first use and shared (see services.container)
+email_service = container.lazy("email_service")
+job_service = container.lazy("job_service")
+llm_chat = container.lazy("chat_llm")
 
-# llm_chat = AzureChatOpenAI(
-#     azure_deployment="gpt-4o",
-#     api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
-#     temperature=0.7
-# )
+container.register("chat_context_builder", lambda: ChatContextBuilder(container.get("job_service")))
+chat_context_builder = container.lazy("chat_context_builder")
 
-# Initialize memory for conversation
-conversation_memory = UpdatedConversationBufferMemory(memory_key="history", return_messages=True)
+# Bounded conversation memory per chat session (CHAT_MEMORY_* settings)
+container.register("chat_sessions", lambda: ChatSessionStore(container.get("chat_llm")))
+chat_sessions = container.lazy("chat_sessions")
 
 # Pydantic model for chat request
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None  # a new session is started when omitted
 
 # Pydantic model for notification request
 class NotificationRequest(BaseModel):
@@ -71,22 +72,21 @@ class EmailGenerationInput(PydanticBaseModel):
     additional_context: str = Field(description="Additional context or specific details", default="")
 
 
-# Email Tools
-class EmailGenerationTool(BaseTool):
-    name: str = "generate_email"
-    description: str = "Generate and send a professional email based on the reason and recipient"
-    args_schema: Type[PydanticBaseModel] = EmailGenerationInput
+def split_subject(response_text: str, default_subject: str) -> tuple:
+    """Split a generated email into (subject, body) using its "Subject:" line"""
+    lines = response_text.split('\n')
+    for line in lines:
+        if line.strip().startswith('Subject:'):
+            subject = line.replace('Subject:', '').strip()
+            body = '\n'.join([l for l in lines if not l.strip().startswith('Subject:')])
+            return subject, body
+    return default_subject, response_text
 
-    def _run(self, recipient_email: str, reason: str, additional_context: str = "") -> str:
-        """Generate and send email using LLMChain and actual email service"""
-        try:
-            # Load resume data to get candidate information
-            resume_data = load_resume_data()
-            candidate_info = next((resume for resume in resume_data if resume.get('email') == recipient_email), None)
 
-            # Create context for email generation
-            if candidate_info:
-                context = f"""
+def candidate_email_context(candidate_info: Optional[dict], recipient_email: str) -> str:
+    """Candidate context block for the email generation prompt"""
+    if candidate_info:
+        return f"""
 Candidate Information:
 - Name: {candidate_info.get('full_name', 'Unknown')}
 - Email: {candidate_info.get('email', 'Unknown')}
@@ -94,28 +94,33 @@ Candidate Information:
 - Experience: {len(candidate_info.get('work_experience', []))} positions
 - Education: {len(candidate_info.get('education', []))} qualifications
 """
-            else:
-                context = f"Recipient: {recipient_email}\nNo additional candidate information available."
+    return f"Recipient: {recipient_email}\nNo additional candidate information available."
+
+
+# Email Tools
+class EmailGenerationTool(BaseTool):
+    name: str = "generate_email"
+    description: str = "Generate and send a professional email based on the reason and recipient"
+    args_schema: Type[PydanticBaseModel] = EmailGenerationInput
+
+    def _run(self, recipient_email: str, reason: str, additional_context: str = "") -> str:
+        """Generate and send email using LLMChain and actual email service"""
+        try:
+            # Look up the candidate information by email
+            candidate = job_service.find_candidate_by_email(recipient_email)
+            candidate_info = candidate.dict() if candidate else None
 
             # Generate email using LLMChain
             response = email_chain.invoke({
                 "recipient_email": recipient_email,
                 "reason": reason,
                 "additional_context": additional_context,
-                "context": context
+                "context": candidate_email_context(candidate_info, recipient_email)
             })
 
             # Parse subject and body from generated content
             response_text = response.content if hasattr(response, 'content') else str(response)
-            lines = response_text.split('\n')
-            subject = "StaffPilot - Application Update"
-            body = response_text
-
-            for line in lines:
-                if line.strip().startswith('Subject:'):
-                    subject = line.replace('Subject:', '').strip()
-                    body = '\n'.join([l for l in lines if not l.strip().startswith('Subject:')])
-                    break
+            subject, body = split_subject(response_text, "StaffPilot - Application Update")
 
             # Send actual email using email service
             success = email_service.send_professional_email(
@@ -133,6 +138,38 @@ Candidate Information:
 
         except Exception as e:
             return f"❌ Error generating/sending email: {str(e)}"
+
+    async def _arun(self, recipient_email: str, reason: str, additional_context: str = "") -> str:
+        """Async variant of _run: non-blocking LLM call, SMTP and log write"""
+        try:
+            candidate = await job_service.afind_candidate_by_email(recipient_email)
+            candidate_info = candidate.dict() if candidate else None
+
+            response = await email_chain.ainvoke({
+                "recipient_email": recipient_email,
+                "reason": reason,
+                "additional_context": additional_context,
+                "context": candidate_email_context(candidate_info, recipient_email)
+            })
+
+            response_text = response.content if hasattr(response, 'content') else str(response)
+            subject, body = split_subject(response_text, "StaffPilot - Application Update")
+
+            success = await email_service.asend_professional_email(
+                recipient_email=recipient_email,
+                subject=subject,
+                body=body.strip(),
+                candidate_name=candidate_info.get('full_name', 'Candidate') if candidate_info else 'Candidate'
+            )
+
+            if success:
+                await asyncio.to_thread(self._log_email, recipient_email, reason, response_text)
+                return f"✅ Email successfully sent to {recipient_email}. Subject: {subject}"
+            else:
+                return f"❌ Failed to send email to {recipient_email}. Please check email configuration."
+
+        except Exception as e:
+            return f"❌ Error generating/sending email: {str(e)}"
     
     def _log_email(self, recipient: str, reason: str, content: str):
         """Log email to file"""
@@ -142,25 +179,10 @@ Candidate Information:
             "reason": reason,
             "content": content
         }
-        
-        log_file = "email_logs.json"
-        logs = []
-        
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-        
-        logs.append(log_entry)
-        
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, indent=2, ensure_ascii=False)
+        job_service.storage.append_email_log(log_entry)
 
 
-# Update email_chain to use the pipe operator for chaining
-email_chain = PromptTemplate(
+email_prompt = PromptTemplate(
     input_variables=["recipient_email", "reason", "additional_context", "context"],
     template="""
 You are a professional email generator for StaffPilot HR system.
@@ -194,7 +216,9 @@ StaffPilot HR Team
 hr@staffpilot.com
 www.staffpilot.com
 """
-) | llm_chat
+)
+container.register("email_chain", lambda: email_prompt | container.get("chat_llm"))
+email_chain = container.lazy("email_chain")
 
 # Initialize tools
 email_tools = [
@@ -203,15 +227,8 @@ email_tools = [
 
 
 def load_resume_data():
-    """Load all parsed resume data from JSON file"""
-    json_file_path = "parsed_resumes.json"
-    if os.path.exists(json_file_path):
-        try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
-    return []
+    """Load all parsed resume data from the configured storage backend"""
+    return job_service.storage.load_resume_records()
 
 
 def generate_smart_prompts(context: str, data_info: str, current_action: str) -> list:
@@ -374,49 +391,14 @@ def generate_smart_prompts(context: str, data_info: str, current_action: str) ->
         ]
 
 
-def create_context_prompt():
-    """Create a context-aware prompt template"""
-    resume_data = load_resume_data()
-    
-    # Convert resume data to a safe string format
-    if resume_data:
-        context_info = f"Number of resumes: {len(resume_data)}\n\n"
-        for i, resume in enumerate(resume_data, 1):
-            context_info += f"Resume {i}:\n"
-            context_info += f"- Name: {resume.get('full_name', 'Unknown')}\n"
-            context_info += f"- Email: {resume.get('email', 'Unknown')}\n"
-            context_info += f"- Phone: {resume.get('phone_number', 'Unknown')}\n"
-            context_info += f"- Skills: {', '.join(resume.get('skills', []))}\n"
-            
-            # Work experience
-            work_exp = resume.get('work_experience', [])
-            if work_exp:
-                context_info += f"- Work Experience:\n"
-                for exp in work_exp:
-                    context_info += f"  * {exp.get('position', 'Unknown')} at {exp.get('company', 'Unknown')}\n"
-            
-            # Education
-            education = resume.get('education', [])
-            if education:
-                context_info += f"- Education:\n"
-                for edu in education:
-                    context_info += f"  * {edu.get('degree', 'Unknown')} from {edu.get('institution', 'Unknown')}\n"
-            
-            # Certifications
-            certs = resume.get('certifications', [])
-            if certs:
-                context_info += f"- Certifications:\n"
-                for cert in certs:
-                    context_info += f"  * {cert.get('title', 'Unknown')} from {cert.get('issuer', 'Unknown')}\n"
-            
-            context_info += f"- Uploaded: {resume.get('timestamp', 'Unknown')}\n\n"
-    else:
-        context_info = "No resume data available."
+def create_context_prompt(question: str):
+    """Create a context-aware prompt template with the records relevant to the question"""
+    context_info = chat_context_builder.build(question).text
     
     template = """You are an AI assistant that helps with resume-related questions. You have access to the following parsed resume data:
 
 RESUME DATA:
-""" + context_info + """
+""" + context_info.replace("{", "{{").replace("}", "}}") + """
 
 Based on this data, you can answer questions about:
 - Resume information and details
@@ -447,66 +429,66 @@ job_listing_tool = Tool(
     description="Fetch a list of all available jobs."
 )
 
+async def amatch_candidates_tool(job_title: str):
+    return await job_service.amatch_candidates_to_job(job_title, top_n=3)
+
 candidate_matching_tool = Tool(
     name="Match Candidates",
     func=lambda job_title: job_service.match_candidates_to_job(job_title, top_n=3),
+    coroutine=amatch_candidates_tool,
     description="Match candidates to a specific job title."
 )
 
+def email_wrapper_inputs(inputs) -> dict:
+    """Normalize the email tool input (free text or dict) into email_chain inputs"""
+    # If inputs is a string, try to parse it or create a basic structure
+    if isinstance(inputs, str):
+        # Try to extract email address from the string using regex
+        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        email_matches = re.findall(email_pattern, inputs)
+        
+        if email_matches:
+            recipient_email = email_matches[0]
+            reason = inputs.replace(recipient_email, "").strip()
+        else:
+            recipient_email = "unknown@email.com"
+            reason = inputs
+        
+        inputs_dict = {
+            "recipient_email": recipient_email,
+            "reason": reason,
+            "additional_context": "",
+            "context": "No additional context available."
+        }
+    else:
+        inputs_dict = inputs
+    
+    # Ensure all required keys are present
+    required_keys = ["recipient_email", "reason", "additional_context", "context"]
+    for key in required_keys:
+        if key not in inputs_dict:
+            inputs_dict[key] = ""
+    return inputs_dict
+
 def generate_email_wrapper(inputs):
     """Wrapper function to handle email generation and sending with proper input formatting"""
     try:
-        # If inputs is a string, try to parse it or create a basic structure
-        if isinstance(inputs, str):
-            # Try to extract email address from the string using regex
-            import re
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            email_matches = re.findall(email_pattern, inputs)
-            
-            if email_matches:
-                recipient_email = email_matches[0]
-                reason = inputs.replace(recipient_email, "").strip()
-            else:
-                recipient_email = "unknown@email.com"
-                reason = inputs
-            
-            inputs_dict = {
-                "recipient_email": recipient_email,
-                "reason": reason,
-                "additional_context": "",
-                "context": "No additional context available."
-            }
-        else:
-            inputs_dict = inputs
-        
-        # Ensure all required keys are present
-        required_keys = ["recipient_email", "reason", "additional_context", "context"]
-        for key in required_keys:
-            if key not in inputs_dict:
-                inputs_dict[key] = ""
+        inputs_dict = email_wrapper_inputs(inputs)
         
         # Generate email content using LLM
         response = email_chain.invoke(inputs_dict)
         response_text = response.content if hasattr(response, 'content') else str(response)
         
         # Parse subject and body from generated content
-        lines = response_text.split('\n')
-        subject = "StaffPilot - Application Update"
-        body = response_text
-
-        for line in lines:
-            if line.strip().startswith('Subject:'):
-                subject = line.replace('Subject:', '').strip()
-                body = '\n'.join([l for l in lines if not l.strip().startswith('Subject:')])
-                break
+        subject, body = split_subject(response_text, "StaffPilot - Application Update")
         
-        # Load resume data to get candidate information
-        resume_data = load_resume_data()
+        # Look up the candidate information by email
         candidate_info = None
         recipient_email = inputs_dict.get("recipient_email", "")
         
         if recipient_email and recipient_email != "unknown@email.com":
-            candidate_info = next((resume for resume in resume_data if resume.get('email') == recipient_email), None)
+            candidate = job_service.find_candidate_by_email(recipient_email)
+            candidate_info = candidate.dict() if candidate else None
         
         # Send actual email using email service
         if recipient_email and recipient_email != "unknown@email.com":
@@ -527,9 +509,39 @@ def generate_email_wrapper(inputs):
     except Exception as e:
         return f"Error generating/sending email: {str(e)}"
 
+async def agenerate_email_wrapper(inputs):
+    """Async variant of generate_email_wrapper"""
+    try:
+        inputs_dict = email_wrapper_inputs(inputs)
+        
+        response = await email_chain.ainvoke(inputs_dict)
+        response_text = response.content if hasattr(response, 'content') else str(response)
+        subject, body = split_subject(response_text, "StaffPilot - Application Update")
+        
+        recipient_email = inputs_dict.get("recipient_email", "")
+        if not recipient_email or recipient_email == "unknown@email.com":
+            return f"❌ Invalid recipient email address: {recipient_email}"
+        
+        candidate = await job_service.afind_candidate_by_email(recipient_email)
+        success = await email_service.asend_professional_email(
+            recipient_email=recipient_email,
+            subject=subject,
+            body=body.strip(),
+            candidate_name=(candidate.full_name or 'Candidate') if candidate else 'Candidate'
+        )
+        
+        if success:
+            return f"✅ Email successfully sent to {recipient_email}. Subject: {subject}"
+        else:
+            return f"❌ Failed to send email to {recipient_email}. Please check email configuration."
+            
+    except Exception as e:
+        return f"Error generating/sending email: {str(e)}"
+
 email_generation_tool = Tool(
     name="Generate Email",
     func=generate_email_wrapper,
+    coroutine=agenerate_email_wrapper,
     description="Generate and send a professional email to a candidate. Input should be a dictionary with recipient_email, reason, additional_context, and context. This tool will actually send the email via SMTP."
 )
 
@@ -554,65 +566,341 @@ candidate_filtering_tool = Tool(
 )
 
 # Define a tool for emailing candidates
+def interview_email_inputs(candidate: dict, job_title: str) -> dict:
+    """email_chain inputs for an interview invitation"""
+    return {
+        "recipient_email": candidate.get("email"),
+        "reason": f"Interview opportunity at {job_title}",
+        "additional_context": f"We are excited to invite you for an interview at Herald College for the {job_title} position.",
+        "context": f"Candidate: {candidate.get('full_name', 'Unknown')}\nSkills: {', '.join(candidate.get('skills', []))}"
+    }
+
+async def aemail_candidates(criteria: dict, job_title: str) -> list:
+    """Filter candidates and email each of them an interview invitation concurrently"""
+    candidates = await asyncio.to_thread(candidate_filtering_tool.func, criteria)
+    # One email per candidate: queued behind interactive LLM calls
+    with llm_lane("bulk"):
+        statuses = await asyncio.gather(*(
+            agenerate_email_wrapper(interview_email_inputs(candidate, job_title)) for candidate in candidates
+        ))
+    return [
+        {"candidate": candidate.get("full_name", "Unknown"), "email": candidate.get("email"), "status": status}
+        for candidate, status in zip(candidates, statuses)
+    ]
+
 email_candidates_tool = Tool(
     name="Email Candidates for Interview",
     func=lambda inputs: [
         {
             "candidate": candidate.get("full_name", "Unknown"),
             "email": candidate.get("email"),
-            "status": generate_email_wrapper({
-                "recipient_email": candidate.get("email"),
-                "reason": f"Interview opportunity at {inputs['job_title']}",
-                "additional_context": f"We are excited to invite you for an interview at Herald College for the {inputs['job_title']} position.",
-                "context": f"Candidate: {candidate.get('full_name', 'Unknown')}\nSkills: {', '.join(candidate.get('skills', []))}"
-            })
+            "status": generate_email_wrapper(interview_email_inputs(candidate, inputs['job_title']))
         }
         for candidate in candidate_filtering_tool.func(inputs['criteria'])
     ],
+    coroutine=lambda inputs: aemail_candidates(inputs['criteria'], inputs['job_title']),
     description="Filter candidates based on criteria and email them for an interview opportunity."
 )
 
-# Initialize the agent with tools
-agent = initialize_agent(
-    tools=[
-        job_listing_tool,
-        candidate_matching_tool,
-        email_generation_tool,
-        candidate_filtering_tool,
-        email_candidates_tool  # Added the new tool here
-    ],
-    llm=llm_chat,
-    agent="zero-shot-react-description",
-    memory=conversation_memory,
-    handle_parsing_errors=True,
-    verbose=True
-)
+def build_agent():
+    """The chat agent with its tools"""
+    # Imported here: langchain.agents is slow to import and only the agent needs it
+    from langchain.agents import initialize_agent
+    return initialize_agent(
+        tools=[
+            job_listing_tool,
+            candidate_matching_tool,
+            email_generation_tool,
+            candidate_filtering_tool,
+            email_candidates_tool  # Added the new tool here
+        ],
+        llm=container.get("chat_llm"),
+        agent="zero-shot-react-description",
+        agent_kwargs={
+            # Records retrieved for the current question, within CHAT_CONTEXT_TOKENS
+            "prefix": (
+                "Answer the following questions as best you can. Conversation so far:\n{history}\n\n"
+                "These records from the StaffPilot database are relevant to the question:\n\n{context}\n\n"
+                "You have access to the following tools:"
+            ),
+            "input_variables": ["input", "history", "context", "agent_scratchpad"],
+        },
+        handle_parsing_errors=True,
+        verbose=AGENT_VERBOSE
+    )
+
+container.register("agent", build_agent)
+agent = container.lazy("agent")
+
+# Fast path: the fixed read-only commands suggested by generate_smart_prompts skip the agent loop.
+# Commands that send email always go through the agent and its email tools.
+async def fast_list_jobs() -> str:
+    jobs = await asyncio.to_thread(job_service.get_available_jobs)
+    if not jobs:
+        return "There are no jobs in the system yet."
+    lines = [f"- {job.title} (ID {job.jobId}, {job.jobType.value}, {job.employmentType.value}, {job.status.value})"
+             for job in jobs]
+    return f"{len(jobs)} jobs:\n" + "\n".join(lines)
+
+async def fast_list_candidates() -> str:
+    resumes = await asyncio.to_thread(job_service.load_resumes)
+    if not resumes:
+        return "No candidates yet. Upload resumes to get started."
+    lines = [f"- {resume.full_name or 'Unknown'} ({resume.email or 'no email'}): {', '.join(resume.skills[:5]) or 'no skills listed'}"
+             for resume in resumes]
+    return f"{len(resumes)} candidates:\n" + "\n".join(lines)
+
+async def fast_job_statistics() -> str:
+    stats = await asyncio.to_thread(job_service.get_job_statistics)
+    by_status = ", ".join(f"{status}: {count}" for status, count in stats["jobs_by_status"].items()) or "none"
+    return (f"Jobs: {stats['total_jobs']} ({by_status})\n"
+            f"Candidates: {stats['total_candidates']}")
+
+async def fast_match_job(job_title: str) -> Optional[str]:
+    report = await asyncio.to_thread(job_service.score_candidates_to_job, job_title, 3)
+    if report.job is None:
+        return None  # not a known title; let the agent interpret the request
+    if not report.results:
+        return f"No candidates to match for {report.job.title}."
+    lines = [f"{rank}. {result.candidate_name} ({result.candidate_email}) - {result.match_score}% match"
+             f"; skills: {', '.join(result.matching_skills) or 'none matching'}"
+             for rank, result in enumerate(report.results, 1)]
+    return f"Top candidates for {report.job.title}:\n" + "\n".join(lines)
+
+async def fast_match_all() -> str:
+    records = await asyncio.to_thread(lambda: list(job_service.iter_match_matrix(top_k=3, best_jobs=0)))
+    lines = []
+    for record in records:
+        if record["type"] == "job":
+            candidates = ", ".join(f"{c['candidate_name']} ({c['match_score']}%)" for c in record["candidates"])
+            lines.append(f"- {record['job']['title']}: {candidates or 'no candidates'}")
+    return "Best candidates per job:\n" + "\n".join(lines) if lines else "There are no jobs to match."
+
+intent_router = IntentRouter()
+intent_router.add("list_jobs", r"(?:list|show|view)(?: all| the)?(?: open| available)? jobs", fast_list_jobs)
+intent_router.add("list_candidates", r"(?:list|show|view)(?: all| the)? candidates", fast_list_candidates)
+intent_router.add("job_statistics", r"(?:show |view )?(?:job|jobs|hiring) stat(?:istic)?s", fast_job_statistics)
+intent_router.add("match_all", r"match all candidates (?:with|to|against) all jobs", fast_match_all)
+intent_router.add("match_job", r"(?:match|find)(?: the)?(?: best| top)? candidates (?:for|to)(?: the)? (?P<job_title>.+?)"
+                  r"(?: job| role| position)?", fast_match_job)
+
+
+def usage_totals(usage_metadata: dict) -> dict:
+    """Input/output tokens summed over the models a chat turn called"""
+    llm_usage = list(usage_metadata.values())
+    return {
+        "input_tokens": sum(u.get("input_tokens", 0) for u in llm_usage),
+        "output_tokens": sum(u.get("output_tokens", 0) for u in llm_usage),
+    }
+
+def context_token_report(context) -> dict:
+    return {
+        "context_tokens": context.tokens,
+        "context_budget": context.token_budget,
+        "resumes_in_context": context.resume_ids,
+        "jobs_in_context": context.job_ids,
+        "records_omitted": context.omitted,
+    }
+
 
 @router.post("/chat")
 async def chat_with_resumes(request: ChatRequest):
     """Chat endpoint using LangChain agent and tools."""
+    session_id = request.session_id or uuid.uuid4().hex
     try:
-        # Use the agent to process the user message
-        response = agent.run(request.message)
+        # Recognized commands are answered directly, without the agent's reasoning loop
+        with get_usage_metadata_callback() as fast_usage, llm_lane("interactive"):
+            routed = await intent_router.route(request.message)
+        if routed:
+            intent, reply = routed
+            await chat_sessions.asave(session_id, request.message, reply)
+            return {
+                "response": reply,
+                "message": request.message,
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+                "route": "fast_path",
+                "intent": intent,
+                "tokens": usage_totals(fast_usage.usage_metadata)
+            }
+        
+        # Only the records relevant to the question and this session's recent turns go into the prompt
+        started = time.perf_counter()
+        context = await asyncio.to_thread(chat_context_builder.build, request.message)
+        history = chat_sessions.history(session_id)
+        usage = UsageMetadataCallbackHandler()
+        with llm_lane("interactive"):
+            result = await agent.ainvoke(
+                {"input": request.message, "history": history, "context": context.text},
+                config={"callbacks": [usage]}
+            )
+        await chat_sessions.asave(session_id, request.message, result["output"])
 
-        # Return the agent's response
+        intent_router.record_fallback((time.perf_counter() - started) * 1000)
+        
+        # Return the agent's response with the tokens this turn used
         return {
-            "response": response,
+            "response": result["output"],
             "message": request.message,
-            "timestamp": datetime.now().isoformat()
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "route": "agent",
+            "tokens": {**context_token_report(context), "history_tokens": count_tokens(history),
+                       **usage_totals(usage.usage_metadata)}
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+def sse_event(event: str, data) -> str:
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class FinalAnswerSplitter:
+    """Splits a streamed ReAct completion into reasoning text and final-answer text"""
+    
+    MARKER = "Final Answer:"
+    
+    def __init__(self):
+        self.text = ""
+        self.sent = 0  # characters of self.text already emitted
+    
+    def feed(self, chunk: str) -> tuple:
+        """(thought, answer) text newly available after this chunk"""
+        self.text += chunk
+        marker = self.text.find(self.MARKER)
+        if marker == -1:
+            # Hold back a tail that could be the start of the marker
+            held = next((n for n in range(min(len(self.MARKER) - 1, len(self.text)), 0, -1)
+                         if self.MARKER.startswith(self.text[-n:])), 0)
+            safe = max(self.sent, len(self.text) - held)
+            thought, self.sent = self.text[self.sent:safe], safe
+            return thought, ""
+        answer_start = marker + len(self.MARKER)
+        thought = self.text[self.sent:marker] if self.sent < marker else ""
+        answer = self.text[max(self.sent, answer_start):]
+        if self.sent <= answer_start:
+            answer = answer.lstrip()
+            if not answer:
+                self.sent = answer_start
+                return thought, ""
+        self.sent = len(self.text)
+        return thought, answer
+
+
+async def stream_chat_events(message: str, session_id: str):
+    """SSE stream of one chat turn: start, context, thought/answer tokens, tool events, done"""
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def produce():
+        try:
+            with get_usage_metadata_callback() as fast_usage:
+                routed = await intent_router.route(message)
+            if routed:
+                intent, reply = routed
+                await chat_sessions.asave(session_id, message, reply)
+                await queue.put(sse_event("answer", {"text": reply}))
+                await queue.put(sse_event("done", {
+                    "response": reply, "route": "fast_path", "intent": intent, "session_id": session_id,
+                    "timestamp": datetime.now().isoformat(), "tokens": usage_totals(fast_usage.usage_metadata)
+                }))
+                return
+            
+            started = time.perf_counter()
+            context = await asyncio.to_thread(chat_context_builder.build, message)
+            history = chat_sessions.history(session_id)
+            await queue.put(sse_event("context", {**context_token_report(context), "history_tokens": count_tokens(history)}))
+            
+            usage = UsageMetadataCallbackHandler()
+            splitters, streamed, response = {}, set(), None
+            async for event in agent.astream_events(
+                {"input": message, "history": history, "context": context.text}, config={"callbacks": [usage]}, version="v2"
+            ):
+                kind, run_id = event["event"], event["run_id"]
+                if kind in ("on_chat_model_stream", "on_llm_stream"):
+                    chunk = event["data"]["chunk"]
+                    text = chunk.content if hasattr(chunk, "content") else getattr(chunk, "text", str(chunk))
+                    streamed.add(run_id)
+                elif kind in ("on_chat_model_end", "on_llm_end") and run_id not in streamed:
+                    # Cached responses arrive whole instead of token by token
+                    output = event["data"].get("output")
+                    text = output.content if hasattr(output, "content") else ""
+                elif kind == "on_tool_start":
+                    await queue.put(sse_event("tool_start", {"tool": event["name"], "input": event["data"].get("input")}))
+                    continue
+                elif kind == "on_tool_end":
+                    await queue.put(sse_event("tool_end", {"tool": event["name"], "output": str(event["data"].get("output"))[:2000]}))
+                    continue
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    response = (event["data"].get("output") or {}).get("output")
+                    continue
+                else:
+                    continue
+                if not isinstance(text, str) or not text:
+                    continue
+                thought, answer = splitters.setdefault(run_id, FinalAnswerSplitter()).feed(text)
+                if thought:
+                    await queue.put(sse_event("thought", {"text": thought}))
+                if answer:
+                    await queue.put(sse_event("answer", {"text": answer}))
+            
+            if response is not None:
+                await chat_sessions.asave(session_id, message, response)
+            intent_router.record_fallback((time.perf_counter() - started) * 1000)
+            await queue.put(sse_event("done", {
+                "response": response, "route": "agent", "session_id": session_id, "timestamp": datetime.now().isoformat(),
+                "tokens": {**context_token_report(context), "history_tokens": count_tokens(history),
+                           **usage_totals(usage.usage_metadata)}
+            }))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(sse_event("error", {"detail": f"Chat error: {str(e)}"}))
+        finally:
+            queue.put_nowait(None)
+    
+    # The task copies the current context, so the agent's calls run in the interactive lane
+    with llm_lane("interactive"):
+        producer = asyncio.create_task(produce())
+    try:
+        yield sse_event("start", {"message": message, "session_id": session_id, "timestamp": datetime.now().isoformat()})
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+    except asyncio.CancelledError:
+        # StreamingResponse cancels the stream when the client disconnects: stop the in-flight agent run too
+        producer.cancel()
+        raise
+    finally:
+        # Also reached when the generator is closed before the stream finished
+        producer.cancel()
+
+
+@router.post("/chat/stream")
+async def chat_with_resumes_stream(request: ChatRequest):
+    """Streaming chat: tool events and answer tokens as server-sent events"""
+    return StreamingResponse(
+        stream_chat_events(request.message, request.session_id or uuid.uuid4().hex),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/chat/router-stats")
+def get_chat_router_stats():
+    """How many chat messages took the fast path versus the agent"""
+    return intent_router.stats()
+
+
 @router.get("/email-logs")
-async def get_email_logs():
+def get_email_logs():
     """Get all email logs"""
     try:
-        log_file = "email_logs.json"
-        if os.path.exists(log_file):
-            with open(log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
+        logs = job_service.storage.load_email_logs()
+        if logs is not None:
             return {"email_logs": logs}
         else:
             return {"email_logs": [], "message": "No email logs found"}
@@ -621,15 +909,28 @@ async def get_email_logs():
 
 
 @router.post("/clear-memory")
-async def clear_conversation_memory():
-    """Clear the conversation memory"""
-    global conversation_memory
-    conversation_memory.clear()
-    return {"message": "Conversation memory cleared successfully"}
+async def clear_conversation_memory(session_id: Optional[str] = None):
+    """Clear one session's conversation memory"""
+    if not session_id:
+        raise HTTPException(status_code=400, detail="session_id is required")
+    cleared = chat_sessions.clear(session_id)
+    return {"message": "Conversation memory cleared successfully", "sessions_cleared": cleared}
+
+
+@router.get("/llm-stats")
+async def get_llm_gateway_stats():
+    """LLM gateway queue depth, wait times, retries and remaining rate budget"""
+    return llm_gateway.stats()
+
+
+@router.get("/chat/memory-stats")
+async def get_chat_memory_stats():
+    """Active chat sessions, memory bounds and evictions"""
+    return chat_sessions.stats()
 
 
 @router.get("/resume-summary")
-async def get_resume_summary():
+def get_resume_summary():
     """Get a summary of all parsed resumes"""
     try:
         resume_data = load_resume_data()
@@ -659,55 +960,107 @@ async def get_resume_summary():
 
 
 
+def deduplicated_upload(record: dict, matched_on: str) -> dict:
+    """Response for an upload answered from an earlier parse"""
+    job_service.upload_index.record_hit(matched_on)
+    return {
+        "parsed_resume": record,
+        "deduplicated": True,
+        "matched_on": matched_on,
+        "llm_calls_saved": job_service.upload_index.stats()["llm_calls_saved"]
+    }
+
+
 @router.post("/upload")
-async def upload_resume(file: UploadFile = File(...)):
-    contents = await file.read()
-    text = extract_text_from_pdf(contents)
+async def upload_resume(file: UploadFile = File(...), force_reparse: bool = False):
+    # The upload stays in its spooled temp file: hashed in chunks, then read page by page
+    try:
+        _, content_sha256 = await asyncio.to_thread(hash_upload, file.file, name=file.filename or "Upload")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    upload_index = job_service.upload_index
+
+    # Same bytes as an earlier upload: return the stored parse without extracting
+    if not force_reparse:
+        existing = await asyncio.to_thread(upload_index.find_by_content, content_sha256)
+        if existing:
+            return deduplicated_upload(existing, "content")
+
+    text = await aextract_text_from_pdf(file.file)
     if not text.strip():
         raise HTTPException(status_code=400, detail="No text extracted from PDF")
 
-    result = parse_resume_chain.invoke({"resume_text": text})
-
-    # Extract the JSON string from the result content
-    raw_json_text = result.content if hasattr(result, 'content') else str(result)
-    if not raw_json_text:
-        raise HTTPException(status_code=500, detail="No parsed JSON returned from LLM")
-
-    # Remove markdown fences (```json ... ```)
-    cleaned_json_str = re.sub(r"^```json\s*|```$", "", raw_json_text.strip(), flags=re.MULTILINE)
+    # Same text as an earlier upload (e.g. re-exported PDF): skip the LLM call
+    text_sha256 = text_hash(text)
+    if not force_reparse:
+        existing = await asyncio.to_thread(upload_index.find_by_text, text_sha256)
+        if existing:
+            return deduplicated_upload(existing, "text")
 
     try:
-        parsed_json = json.loads(cleaned_json_str)
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to parse JSON from LLM output: {e}")
+        parsed_json = await aparse_resume(text)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
     # Add timestamp to the parsed JSON
     parsed_json["timestamp"] = datetime.now().isoformat()
     parsed_json["filename"] = file.filename
+    parsed_json[CONTENT_HASH_FIELD] = content_sha256
+    parsed_json[TEXT_HASH_FIELD] = text_sha256
     
-    # Append to JSON file
-    json_file_path = "parsed_resumes.json"
-    
-    # Load existing data or create empty list
-    if os.path.exists(json_file_path):
-        try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-                if not isinstance(existing_data, list):
-                    existing_data = [existing_data]
-        except (json.JSONDecodeError, FileNotFoundError):
-            existing_data = []
-    else:
-        existing_data = []
-    
-    # Append new parsed resume
-    existing_data.append(parsed_json)
-    
-    # Write back to file
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, indent=2, ensure_ascii=False)
+    # Persist through the configured storage backend; a forced re-parse replaces the earlier parse
+    replaced = await asyncio.to_thread(upload_index.superseded_ids, [parsed_json]) if force_reparse else []
+    parsed_json = await job_service.aadd_resume(parsed_json)
+    if replaced:
+        await asyncio.to_thread(job_service.remove_resumes, replaced)
+
+    return {"parsed_resume": parsed_json, "deduplicated": False}
+
+
+@router.get("/upload/dedup-stats")
+def get_upload_dedup_stats():
+    """How many uploads were answered from earlier parses and the LLM calls that saved"""
+    return job_service.upload_index.stats()
+
+
+@router.get("/upload/parse-stats")
+def get_upload_parse_stats():
+    """Parse calls answered by structured output, by local repair, and by a targeted retry"""
+    return parse_stats()
+
+
+container.register("ingestion_service", lambda: IngestionService(container.get("job_service"), aparse_resume_texts))
+ingestion_service = container.lazy("ingestion_service")
+
 
-    return {"parsed_resume": parsed_json}
+@router.post("/upload/bulk")
+async def upload_resumes_bulk(files: List[UploadFile] = File(...), force_reparse: bool = False):
+    """Queue many PDFs (or zip archives of PDFs) for background parsing; returns a job id"""
+    uploads = [(file.filename or "upload.pdf", file.file) for file in files]
+    directory = ingestion_service.spool_directory()
+    try:
+        pdfs = await asyncio.to_thread(expand_uploads, uploads, directory)
+        if not pdfs:
+            raise ValueError("No PDF files found in upload")
+    except ValueError as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise HTTPException(status_code=413 if isinstance(e, UploadTooLarge) else 400, detail=str(e))
+
+    job = ingestion_service.submit(pdfs, directory, force_reparse=force_reparse)
+    return {
+        "job_id": job.job_id,
+        "total": job.total,
+        "status_url": f"/api/resume/upload/bulk/{job.job_id}"
+    }
+
+
+@router.get("/upload/bulk/{job_id}", response_model=IngestionJob)
+def get_bulk_upload_status(job_id: str):
+    """Per-file state and throughput of a bulk upload"""
+    job = ingestion_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Bulk upload {job_id} not found")
+    return job
 
 
 @router.post("/send-reach-out-email")
@@ -771,13 +1124,13 @@ Looking forward to hearing from you!
         )
 
         # Create the email generation chain
-        reach_out_chain = reach_out_prompt | llm_chat
+        reach_out_chain = reach_out_prompt | container.get("chat_llm")
 
         # Prepare the skills list as a string
         skills_str = ", ".join(request.matching_skills) if request.matching_skills else "your technical expertise"
 
         # Generate the email content
-        response = reach_out_chain.invoke({
+        response = await reach_out_chain.ainvoke({
             "candidate_name": request.candidate_name,
             "candidate_email": request.candidate_email,
             "job_title": request.job_title,
@@ -787,19 +1140,10 @@ Looking forward to hearing from you!
 
         # Parse the response
         response_text = response.content if hasattr(response, 'content') else str(response)
-        lines = response_text.split('\n')
-        subject = f"Exciting Opportunity at StaffPilot - {request.job_title}"
-        body = response_text
-
-        # Extract subject line if present
-        for line in lines:
-            if line.strip().startswith('Subject:'):
-                subject = line.replace('Subject:', '').strip()
-                body = '\n'.join([l for l in lines if not l.strip().startswith('Subject:')])
-                break
+        subject, body = split_subject(response_text, f"Exciting Opportunity at StaffPilot - {request.job_title}")
 
         # Send the email using the email service
-        success = email_service.send_professional_email(
+        success = await email_service.asend_professional_email(
             recipient_email=request.candidate_email,
             subject=subject,
             body=body.strip(),
@@ -820,20 +1164,7 @@ Looking forward to hearing from you!
             }
             
             # Log to email logs
-            log_file = "email_logs.json"
-            logs = []
-            
-            if os.path.exists(log_file):
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        logs = json.load(f)
-                except:
-                    logs = []
-            
-            logs.append(log_entry)
-            
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(job_service.storage.append_email_log, log_entry)
 
             return {
                 "message": f"Reach out email sent successfully to {request.candidate_name}",
@@ -864,7 +1195,7 @@ async def send_resume_notification(request: NotificationRequest):
     """Send notification email about new resume to HR"""
     try:
         # Load the latest resume data
-        resume_data = load_resume_data()
+        resume_data = await asyncio.to_thread(load_resume_data)
         if not resume_data:
             raise HTTPException(status_code=404, detail="No resume data found")
         
@@ -873,7 +1204,7 @@ async def send_resume_notification(request: NotificationRequest):
         candidate_name = request.candidate_name or latest_resume.get('full_name', 'Unknown Candidate')
         
         # Send notification email
-        success = email_service.send_resume_notification(
+        success = await email_service.asend_resume_notification(
             recipient_email=request.hr_email,
             candidate_name=candidate_name,
             resume_data=latest_resume
@@ -896,7 +1227,7 @@ async def send_resume_notification(request: NotificationRequest):
 async def test_email_service(recipient_email: str):
     """Test the email service with a simple test email"""
     try:
-        success = email_service.send_professional_email(
+        success = await email_service.asend_professional_email(
             recipient_email=recipient_email,
             subject="StaffPilot - Email Service Test",
             body="""Hello!
@@ -927,33 +1258,16 @@ StaffPilot System""",
 async def email_candidates_for_interview(criteria: dict, job_title: str):
     """Filter candidates based on criteria and email them for an interview opportunity."""
     try:
-        # Step 1: Filter candidates using the candidate_filtering_tool
-        filtered_candidates = candidate_filtering_tool.func(criteria)
+        # Filter candidates, then generate and send their emails concurrently
+        email_results = await aemail_candidates(criteria, job_title)
 
-        if not filtered_candidates:
+        if not email_results:
             return {
                 "message": "No candidates found matching the criteria.",
                 "criteria": criteria,
                 "timestamp": datetime.now().isoformat()
             }
 
-        # Step 2: Generate and send emails to the filtered candidates
-        email_results = []
-        for candidate in filtered_candidates:
-            email_input = {
-                "recipient_email": candidate.get("email"),
-                "reason": f"Interview opportunity at {job_title}",
-                "additional_context": f"We are excited to invite you for an interview at Herald College for the {job_title} position.",
-                "context": f"Candidate: {candidate.get('full_name', 'Unknown')}\nSkills: {', '.join(candidate.get('skills', []))}"
-            }
-
-            email_result = generate_email_wrapper(email_input)
-            email_results.append({
-                "candidate": candidate.get("full_name", "Unknown"),
-                "email": candidate.get("email"),
-                "status": email_result
-            })
-
         return {
             "message": "Emails sent to filtered candidates.",
             "results": email_results,
@@ -1,3 +1,27 @@
 from .job_matching import JobMatchingService
+from .repository import CachedJsonRepository, CachedJsonlRepository, job_repository, resume_repository
+from .resume_store import ResumeStore, resume_store
+from .storage import JsonStorage, get_storage
+from .skill_index import SkillIndex
+from .batch_scorer import BatchScorer
+from .embeddings_service import EmbeddingsService
+from .match_scores import MatchScoreTable
+from .llm_cache import LLMResponseCache, get_llm_cache, bypass_llm_cache
+from .ingestion import IngestionService
+from .chat_context import ChatContextBuilder
+from .intent_router import IntentRouter
+from .chat_memory import ChatSessionStore
+from .llm_gateway import LLMGateway, llm_gateway, llm_lane, governed_chat_model
+from .container import ServiceContainer, container
 
-__all__ = ['JobMatchingService']
+__all__ = [
+    'JobMatchingService',
+    'CachedJsonRepository', 'CachedJsonlRepository', 'job_repository', 'resume_repository',
+    'ResumeStore', 'resume_store',
+    'JsonStorage', 'get_storage',
+    'SkillIndex', 'BatchScorer', 'EmbeddingsService', 'MatchScoreTable',
+    'LLMResponseCache', 'get_llm_cache', 'bypass_llm_cache',
+    'IngestionService', 'ChatContextBuilder', 'IntentRouter', 'ChatSessionStore',
+    'LLMGateway', 'llm_gateway', 'llm_lane', 'governed_chat_model',
+    'ServiceContainer', 'container',
+]
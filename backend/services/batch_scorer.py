@@ -0,0 +1,196 @@
+from typing import List, Dict, Tuple, Optional
+import re
+
+import numpy as np
+
+from models import Job, Resume
+from .skill_index import SkillIndex
+
+# Rounded match scores (percent, 1 decimal) of two candidates can only tie when
+# their raw scores are closer than this, so top-k candidates are gathered with
+# this slack and then ordered exactly like the Python scorer
+TIE_MARGIN = 0.001
+
+
+def experience_text(exp) -> str:
+    """Lower-cased text of a work experience entry, as matched by extract_relevant_experience"""
+    exp = exp.dict() if hasattr(exp, 'dict') else exp
+    return f"{exp.get('position', '')} {exp.get('company', '')} {exp.get('description', '')}".lower()
+
+
+def job_keywords(job: Job) -> List[str]:
+    """Distinct job keywords longer than 3 characters, as used for experience matching"""
+    words = job.title.lower().split() + job.description.lower().split()
+    return list(dict.fromkeys(word for word in words if len(word) > 3))
+
+
+class BatchScorer(SkillIndex):
+    """Columnar scorer for all candidates against one job.
+
+    On top of the skill postings it keeps:
+
+    - a sparse candidate x skill matrix as parallel arrays (``_skill_rows``,
+      ``_skill_cols``) plus per-candidate skill counts,
+    - every work experience entry in one newline-joined string with the owning
+      candidate of each entry, so a keyword is located with one regex scan,
+    - an education flag per candidate.
+
+    ``score_all`` computes the 0.5 skill / 0.3 experience / 0.2 education score
+    for every candidate with a handful of array operations and ``top_k`` selects
+    the best candidates with ``argpartition``. Results are identical to
+    ``JobMatchingService.score_candidate``.
+    """
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._vocab: Dict[str, int] = {}
+            self._row_list: List[int] = []
+            self._col_list: List[int] = []
+            self._exp_texts: List[str] = []
+            self._exp_owner_list: List[int] = []
+            self._exp_first: List[int] = []
+            self._education_list: List[bool] = []
+            self._keyword_hits: Dict[str, np.ndarray] = {}
+            self._job_terms: Dict[Tuple[str, str], Tuple[np.ndarray, List[str], set]] = {}
+            self._arrays = None
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def _freeze(self) -> None:
+        self._materialize()
+
+    def add(self, resume: Resume) -> int:
+        with self._lock:
+            position = super().add(resume)
+            for skill in resume.skills:
+                key = skill.lower()
+                column = self._vocab.setdefault(key, len(self._vocab))
+                self._row_list.append(position)
+                self._col_list.append(column)
+            self._exp_first.append(len(self._exp_texts))
+            for exp in resume.work_experience:
+                self._exp_texts.append(experience_text(exp))
+                self._exp_owner_list.append(position)
+            self._education_list.append(bool(resume.education))
+            self._arrays = None
+            return position
+
+    def _terms_for_job(self, job: Job) -> Tuple[np.ndarray, List[str], set]:
+        """Matched skill columns, experience keywords and matched skill keys of a job, cached per job text"""
+        cache_key = (job.title, job.description)
+        terms = self._job_terms.get(cache_key)
+        if terms is None:
+            matched_keys = set(self._matched_skills(f"{job.title} {job.description}".lower()))
+            matched_cols = np.zeros(len(self._vocab), dtype=bool)
+            for key in matched_keys:
+                matched_cols[self._vocab[key]] = True
+            terms = self._job_terms[cache_key] = (matched_cols, job_keywords(job), matched_keys)
+        return terms
+
+    def _materialize(self) -> dict:
+        """Build (or extend) the numpy arrays after candidates were added"""
+        if self._arrays is not None:
+            return self._arrays
+        n = len(self._skills)
+        exp_corpus = "\n".join(self._exp_texts)
+        starts = np.zeros(len(self._exp_texts), dtype=np.int64)
+        if self._exp_texts:
+            lengths = np.fromiter((len(text) + 1 for text in self._exp_texts), dtype=np.int64,
+                                  count=len(self._exp_texts))
+            starts[1:] = np.cumsum(lengths)[:-1]
+        self._keyword_hits = {}
+        self._job_terms = {}
+        self._arrays = {
+            "n": n,
+            "skill_rows": np.asarray(self._row_list, dtype=np.int64),
+            "skill_cols": np.asarray(self._col_list, dtype=np.int64),
+            "skill_counts": np.bincount(np.asarray(self._row_list, dtype=np.int64), minlength=n).astype(np.float64),
+            "exp_corpus": exp_corpus,
+            "exp_starts": starts,
+            "exp_owner": np.asarray(self._exp_owner_list, dtype=np.int64),
+            "education": np.asarray(self._education_list, dtype=bool),
+        }
+        return self._arrays
+
+    def _entries_with_keyword(self, keyword: str, arrays: dict) -> np.ndarray:
+        """Boolean mask over experience entries whose text contains the keyword"""
+        hits = self._keyword_hits.get(keyword)
+        if hits is None:
+            hits = np.zeros(len(arrays["exp_starts"]), dtype=bool)
+            offsets = np.fromiter((m.start() for m in re.finditer(re.escape(keyword), arrays["exp_corpus"])),
+                                  dtype=np.int64)
+            if offsets.size:
+                hits[np.searchsorted(arrays["exp_starts"], offsets, side="right") - 1] = True
+            self._keyword_hits[keyword] = hits
+        return hits
+
+    def score_all(self, job: Job) -> np.ndarray:
+        """Overall match score (0..1) of every candidate against the job"""
+        with self._lock:
+            arrays = self._materialize()
+            n = arrays["n"]
+
+            matched_cols, keywords, _ = self._terms_for_job(job)
+
+            # Skill component: matched skill occurrences / skills per candidate
+            skill_hits = np.bincount(arrays["skill_rows"][matched_cols[arrays["skill_cols"]]], minlength=n)
+            skill_score = np.divide(skill_hits, arrays["skill_counts"],
+                                    out=np.zeros(n, dtype=np.float64), where=arrays["skill_counts"] > 0)
+
+            # Experience component: entries containing any job keyword, 0.2 each, capped at 1.0
+            relevant_entries = np.zeros(len(arrays["exp_starts"]), dtype=bool)
+            for keyword in keywords:
+                relevant_entries |= self._entries_with_keyword(keyword, arrays)
+            exp_hits = np.bincount(arrays["exp_owner"][relevant_entries], minlength=n).astype(np.float64)
+            exp_score = np.minimum(exp_hits * 0.2, 1.0)
+
+            education_score = np.where(arrays["education"], 0.3, 0.0)
+
+            return (skill_score * 0.5) + (exp_score * 0.3) + (education_score * 0.2)
+
+    def score_positions(self, job: Job, positions: List[int]) -> np.ndarray:
+        """Scores of a few candidates against the job, equal to ``score_all(job)[positions]``.
+
+        Only the given candidates are visited, so scoring a newly added resume
+        does not touch the rest of the pool; large subsets use ``score_all``.
+        """
+        with self._lock:
+            arrays = self._materialize()
+            if len(positions) * 8 > arrays["n"]:
+                return self.score_all(job)[np.asarray(positions, dtype=np.int64)]
+            _, keywords, matched_keys = self._terms_for_job(job)
+            scores = np.zeros(len(positions), dtype=np.float64)
+            for row, position in enumerate(positions):
+                skills = self._skills[position]
+                skill_score = sum(1 for skill in skills if skill.lower() in matched_keys) / len(skills) if skills else 0.0
+                exp_end = self._exp_first[position + 1] if position + 1 < len(self._exp_first) else len(self._exp_texts)
+                exp_hits = sum(1 for text in self._exp_texts[self._exp_first[position]:exp_end]
+                               if any(keyword in text for keyword in keywords))
+                exp_score = min(exp_hits * 0.2, 1.0)
+                education_score = 0.3 if self._education_list[position] else 0.0
+                scores[row] = (skill_score * 0.5) + (exp_score * 0.3) + (education_score * 0.2)
+            return scores
+
+    def top_k(self, job: Job, k: int, candidates: Optional[List[int]] = None) -> List[int]:
+        """Positions of the k best candidates, ordered like a stable sort on the rounded score.
+
+        ``candidates`` optionally restricts the ranking to a subset of positions.
+        """
+        return self.rank_scores(self.score_all(job), k, candidates)
+
+    @staticmethod
+    def rank_scores(scores: np.ndarray, k: int, candidates: Optional[List[int]] = None) -> List[int]:
+        """Top-k positions of a precomputed score vector (see ``top_k``)"""
+        pool = np.arange(len(scores)) if candidates is None else np.unique(np.asarray(candidates, dtype=np.int64))
+        if k <= 0 or pool.size == 0:
+            return []
+        if k < pool.size:
+            pool_scores = scores[pool]
+            best = np.argpartition(-pool_scores, k - 1)[:k]
+            threshold = pool_scores[best].min() - TIE_MARGIN
+            pool = pool[pool_scores >= threshold]
+        ranked = sorted(pool.tolist(), key=lambda p: (-round(float(scores[p]) * 100, 1), p))
+        return ranked[:k]
@@ -0,0 +1,133 @@
+from typing import List, Tuple
+import math
+import os
+import re
+
+from models import ChatContext, Job, JobStatus, Resume
+from utils.tokens import count_tokens
+from .embeddings_service import TOKEN_PATTERN
+
+# Token budget for the records put into one chat prompt
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))
+# Most resumes / jobs retrieved per question
+CHAT_CONTEXT_RESUMES = int(os.getenv("CHAT_CONTEXT_RESUMES", "8"))
+CHAT_CONTEXT_JOBS = int(os.getenv("CHAT_CONTEXT_JOBS", "5"))
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "has", "have", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "show", "tell", "that", "the", "to", "what",
+    "which", "who", "with", "about", "any", "all", "list", "give", "there", "their", "them", "this",
+}
+
+
+def _query_terms(text: str) -> List[str]:
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def format_resume(resume: Resume) -> str:
+    """Compact text block for one candidate"""
+    lines = [
+        f"Candidate (resume {resume.resume_id}): {resume.full_name or 'Unknown'}",
+        f"- Email: {resume.email or 'Unknown'}",
+        f"- Phone: {resume.phone_number or 'Unknown'}",
+        f"- Skills: {', '.join(resume.skills)}",
+    ]
+    if resume.work_experience:
+        lines.append("- Work Experience: " + "; ".join(
+            f"{exp.position or 'Unknown'} at {exp.company or 'Unknown'}" for exp in resume.work_experience))
+    if resume.education:
+        lines.append("- Education: " + "; ".join(
+            f"{edu.degree or 'Unknown'} from {edu.institution or 'Unknown'}" for edu in resume.education))
+    if resume.certifications:
+        lines.append("- Certifications: " + "; ".join(
+            f"{cert.title or 'Unknown'} from {cert.issuer or 'Unknown'}" for cert in resume.certifications))
+    lines.append(f"- Uploaded: {resume.timestamp or 'Unknown'}")
+    return "\n".join(lines)
+
+
+def format_job(job: Job, description_chars: int = 400) -> str:
+    """Compact text block for one job; long descriptions are cut"""
+    description = job.description if len(job.description) <= description_chars \
+        else job.description[:description_chars].rsplit(" ", 1)[0] + " ..."
+    return (f"Job {job.jobId}: {job.title} ({job.jobType.value}, {job.employmentType.value}, {job.status.value})\n"
+            f"- Description: {description}")
+
+
+class ChatContextBuilder:
+    """Builds the record context for one chat turn by retrieval, not by dumping the store.
+
+    Resumes are candidates named in the question (by email or full name)
+    followed by the nearest ones in the semantic index; jobs are ranked by
+    lexical overlap with the question. The best resume goes first, then the
+    jobs, then the remaining resumes, each added only while it fits the token
+    budget, so prompt size no longer grows with the number of stored resumes.
+    """
+
+    def __init__(self, matching_service, token_budget: int = CHAT_CONTEXT_TOKENS,
+                 max_resumes: int = CHAT_CONTEXT_RESUMES, max_jobs: int = CHAT_CONTEXT_JOBS):
+        self.matching_service = matching_service
+        self.token_budget = token_budget
+        self.max_resumes = max_resumes
+        self.max_jobs = max_jobs
+
+    def _mentioned_resumes(self, question: str, resumes: List[Resume]) -> List[Resume]:
+        """Candidates named in the question, by email address or full name"""
+        emails = {email.lower() for email in EMAIL_PATTERN.findall(question)}
+        question_lower = question.lower()
+        return [resume for resume in resumes
+                if (resume.email and resume.email.lower() in emails)
+                or (resume.full_name and len(resume.full_name) > 3 and resume.full_name.lower() in question_lower)]
+
+    def _rank_jobs(self, question: str, jobs: List[Job]) -> List[Job]:
+        """Jobs by IDF-weighted overlap of question terms with title (counted twice) and description"""
+        terms = set(_query_terms(question))
+        if not terms or not jobs:
+            return []
+        documents = [set(TOKEN_PATTERN.findall(f"{job.title} {job.title} {job.description}".lower())) for job in jobs]
+        weights = {term: math.log(1 + len(jobs) / (1 + sum(term in document for document in documents)))
+                   for term in terms}
+        scored = []
+        for job, document in zip(jobs, documents):
+            score = sum(weight for term, weight in weights.items() if term in document)
+            if score > 0:
+                scored.append((score, job.status == JobStatus.OPEN, job))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [job for _, _, job in scored[:self.max_jobs]]
+
+    def retrieve(self, question: str) -> Tuple[List[Resume], List[Job]]:
+        """Relevant resumes and jobs for a question, most relevant first"""
+        service = self.matching_service
+        mentioned = self._mentioned_resumes(question, service.load_resumes()) if question else []
+        similar = [resume for resume, _ in service.search_candidates(question, self.max_resumes)] if question else []
+        seen, resumes = set(), []
+        for resume in mentioned + similar:
+            if resume.resume_id not in seen:
+                seen.add(resume.resume_id)
+                resumes.append(resume)
+        return resumes[:max(self.max_resumes, len(mentioned))], self._rank_jobs(question, service.load_jobs())
+
+    def build(self, question: str) -> ChatContext:
+        resumes, jobs = self.retrieve(question)
+        header = (f"The database holds {len(self.matching_service.load_resumes())} resumes and "
+                  f"{len(self.matching_service.load_jobs())} jobs; below are the records most relevant "
+                  f"to the question. Use the tools for anything not shown.")
+        blocks: List[Tuple[str, str, int]] = [("resume", format_resume(resume), resume.resume_id)
+                                              for resume in resumes[:1]]
+        blocks += [("job", format_job(job), job.jobId) for job in jobs]
+        blocks += [("resume", format_resume(resume), resume.resume_id) for resume in resumes[1:]]
+
+        context = ChatContext(text=header, tokens=count_tokens(header), token_budget=self.token_budget)
+        parts = [header]
+        for kind, block, record_id in blocks:
+            block_tokens = count_tokens(block) + 1
+            if context.tokens + block_tokens > self.token_budget:
+                context.omitted += 1
+                continue
+            parts.append(block)
+            context.tokens += block_tokens
+            (context.resume_ids if kind == "resume" else context.job_ids).append(record_id)
+        if len(parts) == 1:
+            parts.append("No stored records match the question.")
+        context.text = "\n\n".join(parts)
+        return context
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import os
+import threading
+import time
+
+# "window" keeps the last CHAT_MEMORY_WINDOW exchanges; "summary" keeps recent
+# messages within CHAT_MEMORY_TOKENS and folds older ones into a running summary
+CHAT_MEMORY_MODE = os.getenv("CHAT_MEMORY_MODE", "window").lower()
+CHAT_MEMORY_WINDOW = int(os.getenv("CHAT_MEMORY_WINDOW", "6"))
+CHAT_MEMORY_TOKENS = int(os.getenv("CHAT_MEMORY_TOKENS", "800"))
+# Sessions kept in memory (least recently used are evicted first) and idle time before eviction
+CHAT_MEMORY_MAX_SESSIONS = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "500"))
+CHAT_MEMORY_TTL = float(os.getenv("CHAT_MEMORY_TTL", str(2 * 3600)))  # seconds
+DEFAULT_SESSION_ID = "default"
+
+
+class ChatSessionStore:
+    """Bounded conversation memory per chat session.
+
+    Each session id gets its own memory, capped either to the last few
+    exchanges or to a token budget with a running summary of older turns, so
+    the history sent with a turn stays the same size however long the
+    conversation runs. Sessions idle longer than the TTL, and the least
+    recently used ones beyond max_sessions, are dropped.
+    """
+
+    def __init__(self, llm=None, mode: str = CHAT_MEMORY_MODE, window: int = CHAT_MEMORY_WINDOW,
+                 max_tokens: int = CHAT_MEMORY_TOKENS, max_sessions: int = CHAT_MEMORY_MAX_SESSIONS,
+                 ttl: float = CHAT_MEMORY_TTL):
+        if mode not in ("window", "summary"):
+            raise ValueError(f"Unknown chat memory mode: {mode}")
+        if mode == "summary" and llm is None:
+            raise ValueError("Summary chat memory needs an llm")
+        self.llm = llm
+        self.mode = mode
+        self.window = window
+        self.max_tokens = max_tokens
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._evicted = {"idle": 0, "lru": 0}
+
+    def _new_memory(self):
+        # Imported here: the langchain package is slow to import and nothing needs it before the first session
+        from langchain.memory import ConversationBufferWindowMemory
+        from .summary_memory import SummaryBufferMemory
+        if self.mode == "summary":
+            return SummaryBufferMemory(llm=self.llm, max_token_limit=self.max_tokens,
+                                       memory_key="history", input_key="input")
+        return ConversationBufferWindowMemory(k=self.window, memory_key="history", input_key="input")
+
+    def _evict(self, now: float) -> None:
+        for session_id in [sid for sid, used in self._last_used.items() if now - used > self.ttl]:
+            del self._sessions[session_id], self._last_used[session_id]
+            self._evicted["idle"] += 1
+        while len(self._sessions) > self.max_sessions:
+            session_id, _ = self._sessions.popitem(last=False)
+            del self._last_used[session_id]
+            self._evicted["lru"] += 1
+
+    def get(self, session_id: Optional[str] = None):
+        """Memory of a session, created on first use"""
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = self._sessions[session_id] = self._new_memory()
+            self._sessions.move_to_end(session_id)
+            self._last_used[session_id] = now
+            self._evict(now)
+            return memory
+
+    def history(self, session_id: Optional[str] = None) -> str:
+        """The session's history as prompt text"""
+        return self.get(session_id).load_memory_variables({})["history"]
+
+    async def asave(self, session_id: Optional[str], message: str, reply: str) -> None:
+        await self.get(session_id).asave_context({"input": message}, {"output": reply})
+
+    def clear(self, session_id: str) -> int:
+        """Drop one session; returns 1 if it existed"""
+        with self._lock:
+            self._last_used.pop(session_id, None)
+            return 1 if self._sessions.pop(session_id, None) is not None else 0
+
+    def clear_all(self) -> int:
+        """Drop every session; returns how many were dropped"""
+        with self._lock:
+            dropped = len(self._sessions)
+            self._sessions.clear()
+            self._last_used.clear()
+            return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "mode": self.mode,
+                "window": self.window if self.mode == "window" else None,
+                "max_tokens": self.max_tokens if self.mode == "summary" else None,
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl,
+                "evicted": dict(self._evicted),
+            }
@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, List, Optional
+import os
+import threading
+import time
+
+from utils.email_service import EmailService
+from .job_matching import JobMatchingService
+from .llm_cache import get_llm_cache
+from .llm_gateway import governed_chat_model
+# from langchain_openai import AzureChatOpenAI  # only with the Azure model below; it adds seconds to startup
+
+# Build every registered service in a background thread at startup; /api/ready reports when it is done
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() in ("1", "true", "yes")
+
+
+class LazyService:
+    """Stand-in that builds its service on first attribute access and then forwards to it"""
+
+    def __init__(self, container: "ServiceContainer", name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._container.get(self._name), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(self._container.get(self._name), attribute, value)
+
+    def __repr__(self) -> str:
+        built = self._name in self._container._instances
+        return f"<LazyService {self._name} ({'built' if built else 'not built'})>"
+
+
+class ServiceContainer:
+    """Process-wide registry of LLM clients, chains, the agent and services.
+
+    Modules register a factory per name at import time, which costs nothing;
+    the object is built on first use, once, and shared by every module that
+    asks for it. warm_up builds everything ahead of traffic (optionally in a
+    background thread) and readiness reports what has been built, how long
+    each build took and which ones failed.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._build_ms: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self._warm_up_ms: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """The service, built on first call"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"No service registered as {name}")
+                started = time.perf_counter()
+                try:
+                    self._instances[name] = self._factories[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self._build_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            return self._instances[name]
+
+    def lazy(self, name: str) -> LazyService:
+        return LazyService(self, name)
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, str]:
+        """Build the named services (all registered ones by default); returns failures by name"""
+        started = time.perf_counter()
+        for name in names or list(self._factories):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+        self._warm_up_ms = round((time.perf_counter() - started) * 1000, 2)
+        return dict(self._errors)
+
+    def start_warm_up(self) -> None:
+        """Warm up in a daemon thread so the server accepts connections meanwhile"""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name="service-warm-up", daemon=True)
+                self._warm_up_thread.start()
+
+    def shutdown(self) -> None:
+        """Call close() on every built service that has one"""
+        with self._lock:
+            instances = list(self._instances.items())
+        for name, instance in instances:
+            close = getattr(instance, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    print(f"Closing {name} failed: {e}")
+
+    def readiness(self) -> Dict[str, Any]:
+        with self._lock:
+            warming = self._warm_up_thread is not None and self._warm_up_thread.is_alive()
+            pending = [name for name in self._factories if name not in self._instances]
+            return {
+                "ready": not warming and not self._errors,
+                "warming_up": warming,
+                "warm_up_ms": self._warm_up_ms,
+                "built": dict(self._build_ms),
+                "pending": pending,
+                "errors": dict(self._errors),
+            }
+
+
+container = ServiceContainer()
+
+
+def _chat_llm():
+    """Gemini client shared by chat, emails and match summaries"""
+    # return AzureChatOpenAI(
+    #     azure_deployment="gpt-4o",
+    #     api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
+    #     temperature=0.7
+    # )
+    return governed_chat_model(
+        model="gemini-2.5-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=0.7,
+        cache=get_llm_cache()
+    )
+
+
+container.register("chat_llm", _chat_llm)
+container.register("job_service", lambda: JobMatchingService(llm=container.get("chat_llm")))
+container.register("email_service", EmailService)
@@ -0,0 +1,275 @@
+from typing import Hashable, List, Dict, Tuple, Iterable, Optional
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from models import Job, Resume
+
+# "hashing" (local, no API) or "google" (Gemini embeddings through LangChain)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing").lower()
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))  # hashing backend only
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")  # google backend only
+RESUME_INDEX_PATH = os.getenv("RESUME_INDEX_PATH", "resume_index.faiss")
+# The index is written to disk after this many unsaved changes, or on the first change
+# once this many seconds passed since the last save, and at shutdown
+RESUME_INDEX_SAVE_EVERY = int(os.getenv("RESUME_INDEX_SAVE_EVERY", "50"))
+RESUME_INDEX_SAVE_INTERVAL = float(os.getenv("RESUME_INDEX_SAVE_INTERVAL", "60"))  # seconds
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def resume_embedding_text(resume: Resume) -> str:
+    """Text that represents a resume for embedding: skills, experience and education"""
+    parts = list(resume.skills)
+    for exp in resume.work_experience:
+        parts.extend(filter(None, [exp.position, exp.company, exp.description]))
+    for edu in resume.education:
+        parts.extend(filter(None, [edu.degree, edu.field, edu.institution]))
+    return "\n".join(parts)
+
+
+def embedding_fingerprint(text: str) -> str:
+    """Short hash of an embedded text, stored per id to notice content changes"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def job_embedding_text(job: Job) -> str:
+    """Text that represents a job description for embedding"""
+    return f"{job.title}\n{job.description}"
+
+
+class HashingEmbedder:
+    """Local embedding backend based on signed feature hashing.
+
+    Unigrams and bigrams are hashed into ``dim`` buckets with a stable hash,
+    weighted with log-scaled term frequency and L2-normalized, so inner product
+    equals cosine similarity. Needs no model download or remote API.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterable[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        yield from tokens
+        yield from (f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[int, float] = {}
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), "little")
+                bucket = digest % self.dim
+                sign = 1.0 if (digest >> 63) & 1 else -1.0
+                counts[bucket] = counts.get(bucket, 0.0) + sign
+            for bucket, value in counts.items():
+                vectors[row, bucket] = np.sign(value) * np.log1p(abs(value))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class LangChainEmbedder:
+    """Adapter for any LangChain ``Embeddings`` implementation.
+
+    When ``dim`` is not given it is found by embedding a probe text once.
+    """
+
+    def __init__(self, embeddings, dim: Optional[int] = None, name: str = "langchain"):
+        self.embeddings = embeddings
+        self._dim = dim
+        self.name = name
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = len(self.embeddings.embed_query("dimension probe"))
+        return self._dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+
+def get_embedding_backend(name: str = EMBEDDING_BACKEND):
+    """Return the embedding backend selected by EMBEDDING_BACKEND"""
+    if name == "hashing":
+        return HashingEmbedder()
+    if name == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+        # The model is part of the name so switching models rebuilds the index
+        return LangChainEmbedder(embeddings, name=f"google:{EMBEDDING_MODEL}")
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {name}")
+
+
+class EmbeddingsService:
+    """Persistent FAISS index of resume embeddings keyed by resume_id.
+
+    The index lives on disk next to a JSON metadata file recording the
+    embedding backend it was built with and a fingerprint of the text embedded
+    for every id. ``sync`` embeds missing ids, drops deleted ones and re-embeds
+    an id whose text no longer matches its fingerprint (a reused id, a
+    migration, a switched storage backend). Like ``MatchScoreTable.sync`` it
+    fingerprints every resume only once per process and resume epoch; within an
+    epoch only new ids are checked. Switching backends rebuilds from scratch.
+
+    Writing the index costs time proportional to its size, so changes are saved
+    in batches (see RESUME_INDEX_SAVE_EVERY / RESUME_INDEX_SAVE_INTERVAL) and
+    by ``flush`` at shutdown. Resumes added since the last save are not lost
+    after a crash: the next ``sync`` embeds them again.
+    """
+
+    def __init__(self, index_path: str = RESUME_INDEX_PATH, backend=None,
+                 save_every: int = RESUME_INDEX_SAVE_EVERY, save_interval: float = RESUME_INDEX_SAVE_INTERVAL):
+        self.index_path = index_path
+        self.meta_path = index_path + ".json"
+        self.backend = backend or get_embedding_backend()
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._index = None
+        self._fingerprints: Dict[int, str] = {}
+        self._verified_epoch: Optional[Hashable] = None
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def _new_index(self):
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.backend.dim))
+
+    def _load(self) -> None:
+        """Load the index from disk, or start an empty one if it is unusable"""
+        if self._index is not None:
+            return
+        meta = {}
+        if os.path.exists(self.meta_path) and os.path.exists(self.index_path):
+            try:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except json.JSONDecodeError:
+                meta = {}
+        if meta.get("backend") == self.backend.name and meta.get("dim") == self.backend.dim:
+            self._index = faiss.read_index(self.index_path)
+            stored = meta.get("fingerprints") or {}
+            # Ids saved without a fingerprint (older metadata) never match and are re-embedded once
+            self._fingerprints = {resume_id: stored.get(str(resume_id), "")
+                                  for resume_id in faiss.vector_to_array(self._index.id_map).tolist()}
+        else:
+            self._index = self._new_index()
+            self._fingerprints = {}
+        self._verified_epoch = None
+
+    def save(self) -> None:
+        with self._lock:
+            self._load()
+            tmp_path = self.index_path + ".tmp"
+            faiss.write_index(self._index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            with open(self.meta_path, 'w', encoding='utf-8') as f:
+                json.dump({"backend": self.backend.name, "dim": self.backend.dim, "count": len(self._fingerprints),
+                           "fingerprints": {str(resume_id): fingerprint
+                                            for resume_id, fingerprint in self._fingerprints.items()}}, f)
+            self._unsaved = 0
+            self._last_save = time.monotonic()
+
+    def _changed(self, count: int) -> None:
+        """Record unsaved changes and save once enough of them, or enough time, accumulated"""
+        self._unsaved += count
+        if self._unsaved >= self.save_every or time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def flush(self) -> None:
+        """Save the index if it has unsaved changes"""
+        with self._lock:
+            if self._unsaved:
+                self.save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._fingerprints)
+
+    def _add(self, resumes: List[Resume], check_all: bool) -> int:
+        """Embed resumes missing from the index, and with ``check_all`` those whose text changed"""
+        pending: Dict[int, Tuple[str, str]] = {}
+        for resume in resumes:
+            if resume.resume_id is None or (not check_all and resume.resume_id in self._fingerprints):
+                continue
+            text = resume_embedding_text(resume)
+            fingerprint = embedding_fingerprint(text)
+            if self._fingerprints.get(resume.resume_id) != fingerprint:
+                pending[resume.resume_id] = (text, fingerprint)
+        if not pending:
+            return 0
+        changed = [resume_id for resume_id in pending if resume_id in self._fingerprints]
+        if changed:
+            self._index.remove_ids(np.asarray(changed, dtype=np.int64))
+        vectors = self.backend.embed([text for text, _ in pending.values()])
+        self._index.add_with_ids(vectors, np.asarray(list(pending), dtype=np.int64))
+        self._fingerprints.update((resume_id, fingerprint) for resume_id, (_, fingerprint) in pending.items())
+        return len(pending)
+
+    def add_resume(self, resume: Resume) -> None:
+        """Embed one newly uploaded resume"""
+        self.add_resumes([resume])
+
+    def add_resumes(self, resumes: List[Resume]) -> None:
+        """Embed a group of newly stored resumes"""
+        with self._lock:
+            self._load()
+            added = self._add(resumes, check_all=True)
+            if added:
+                self._changed(added)
+
+    def sync(self, resumes: List[Resume], epoch: Optional[Hashable] = None) -> int:
+        """Make the index match the stored resumes; returns how many were embedded.
+
+        ``epoch`` identifies the resume epoch of ``resumes`` (see CachedJsonRepository);
+        without it every resume is fingerprinted.
+        """
+        with self._lock:
+            self._load()
+            stale = set(self._fingerprints) - {r.resume_id for r in resumes}
+            if stale:
+                self._index.remove_ids(np.asarray(sorted(stale), dtype=np.int64))
+                for resume_id in stale:
+                    del self._fingerprints[resume_id]
+            added = self._add(resumes, check_all=epoch is None or epoch != self._verified_epoch)
+            self._verified_epoch = epoch
+            if not os.path.exists(self.index_path):
+                self.save()
+            elif added or stale:
+                self._changed(added + len(stale))
+            return added
+
+    def rebuild(self, resumes: List[Resume]) -> int:
+        """Re-embed every resume from scratch"""
+        with self._lock:
+            self._load()
+            self._index = self._new_index()
+            self._fingerprints = {}
+            return self.sync(resumes)
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """k nearest resumes to a free-text query as (resume_id, cosine similarity)"""
+        with self._lock:
+            self._load()
+            if not self._fingerprints or k <= 0:
+                return []
+            query = self.backend.embed([text])
+            scores, ids = self._index.search(query, min(k, len(self._fingerprints)))
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i != -1]
+
+    def search_job(self, job: Job, k: int) -> List[Tuple[int, float]]:
+        """k nearest resumes to a job description"""
+        return self.search(job_embedding_text(job), k)
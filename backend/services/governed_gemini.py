@@ -0,0 +1,40 @@
+from typing import AsyncIterator, Iterator, List
+
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from utils.tokens import count_tokens
+from .llm_gateway import LLM_OUTPUT_TOKEN_ESTIMATE, llm_gateway
+
+
+class GovernedChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """Gemini chat model whose provider calls go through the LLM gateway.
+
+    Cache hits are answered before _generate and never queue. Retries are the
+    gateway's, so the client's own retry loop is limited to one attempt.
+    """
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        return count_tokens(get_buffer_string(messages)) + (self.max_output_tokens or LLM_OUTPUT_TOKEN_ESTIMATE)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        generate = super()._generate
+        return llm_gateway.call(lambda: generate(messages, stop, run_manager, **kwargs),
+                                self._estimate_tokens(messages))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        agenerate = super()._agenerate
+        return await llm_gateway.acall(lambda: agenerate(messages, stop, run_manager, **kwargs),
+                                       self._estimate_tokens(messages))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        stream = super()._stream
+        return llm_gateway.stream(lambda: stream(messages, stop, run_manager, **kwargs),
+                                  self._estimate_tokens(messages))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        astream = super()._astream
+        async for chunk in llm_gateway.astream(lambda: astream(messages, stop, run_manager, **kwargs),
+                                               self._estimate_tokens(messages)):
+            yield chunk
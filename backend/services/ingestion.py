@@ -0,0 +1,300 @@
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, BinaryIO
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+
+from models import IngestionJob, IngestionFile, IngestionFileState
+from utils.extract_text import extract_text_from_pdf
+from utils.uploads import UPLOAD_MAX_BYTES, copy_limited
+from .upload_dedup import CONTENT_HASH_FIELD, TEXT_HASH_FIELD, text_hash
+from .llm_gateway import llm_lane
+
+# Worker processes for PDF text extraction
+INGEST_EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Parse calls in flight per batch
+INGEST_PARSE_CONCURRENCY = int(os.getenv("INGEST_PARSE_CONCURRENCY", "8"))
+# Resumes per storage commit (also the parse batch size)
+INGEST_COMMIT_BATCH = int(os.getenv("INGEST_COMMIT_BATCH", "25"))
+# Largest number of PDFs accepted in one bulk upload (zip entries included)
+INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "1000"))
+# Finished jobs kept for the status endpoint
+INGEST_MAX_JOBS = int(os.getenv("INGEST_MAX_JOBS", "100"))
+
+# Parses a batch of resume texts with at most N calls in flight into records
+# (or the exception raised for that text)
+ParseBatch = Callable[[List[str], int], Awaitable[List[Any]]]
+
+
+# A PDF spooled to disk for ingestion: (filename, path, sha256 of the bytes)
+SpooledPdf = Tuple[str, str, str]
+
+
+def expand_uploads(uploads: List[Tuple[str, BinaryIO]], directory: str) -> List[SpooledPdf]:
+    """Stream uploaded PDFs and zip archive entries into ``directory``; raises ValueError.
+
+    Files are copied in chunks and hashed on the way, so no upload is ever held
+    in memory whole; a file over UPLOAD_MAX_BYTES raises UploadTooLarge.
+    """
+    files = []
+
+    def spool(filename: str, source: BinaryIO) -> None:
+        if len(files) >= INGEST_MAX_FILES:
+            raise ValueError(f"Too many files in one upload (max {INGEST_MAX_FILES})")
+        path = os.path.join(directory, f"{len(files):05d}.pdf")
+        with open(path, 'wb') as target:
+            _, digest = copy_limited(source, target, UPLOAD_MAX_BYTES, filename)
+        files.append((filename, path, digest))
+
+    for filename, upload in uploads:
+        upload.seek(0)
+        if filename.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(upload) as archive:
+                    for entry in archive.infolist():
+                        name = entry.filename
+                        if entry.is_dir() or not name.lower().endswith(".pdf") or name.startswith("__MACOSX/"):
+                            continue
+                        with archive.open(entry) as member:
+                            spool(os.path.basename(name), member)
+            except zipfile.BadZipFile as e:
+                raise ValueError(f"{filename} is not a valid zip archive: {e}")
+        else:
+            spool(filename, upload)
+    return files
+
+
+class IngestionService:
+    """Bulk resume ingestion running in the background of the API process.
+
+    Files move through extract (process pool) -> parse (batched LLM calls with
+    bounded concurrency) -> store (one storage commit per batch). Extraction of
+    later batches overlaps with parsing of earlier ones. Files already seen, by
+    content or by normalized text, reuse the stored parse. Job progress is kept
+    in memory and served by ``get_job``.
+    """
+
+    def __init__(self, matching_service, parse_batch: ParseBatch,
+                 extract_workers: int = INGEST_EXTRACT_WORKERS,
+                 parse_concurrency: int = INGEST_PARSE_CONCURRENCY,
+                 commit_batch: int = INGEST_COMMIT_BATCH):
+        self.matching_service = matching_service
+        self.parse_batch = parse_batch
+        self.extract_workers = extract_workers
+        self.parse_concurrency = parse_concurrency
+        self.commit_batch = commit_batch
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.extract_workers)
+            return self._executor
+
+    def close(self) -> None:
+        """Stop the extraction workers (called by ServiceContainer.shutdown)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    # Jobs ---------------------------------------------------------------
+
+    @staticmethod
+    def spool_directory() -> str:
+        """A fresh directory for the files of one job; removed when the job finishes"""
+        return tempfile.mkdtemp(prefix="staffpilot-ingest-")
+
+    def submit(self, files: List[SpooledPdf], directory: Optional[str] = None,
+               force_reparse: bool = False) -> IngestionJob:
+        """Start ingesting spooled PDFs; must be called from the event loop.
+
+        Files whose bytes or normalized text were stored before are answered
+        from the stored parse unless ``force_reparse`` is set. ``directory``,
+        if given, is deleted once the job is done.
+        """
+        job = IngestionJob(
+            job_id=uuid.uuid4().hex,
+            files=[IngestionFile(filename=filename) for filename, _, _ in files],
+            total=len(files),
+            created_at=datetime.now().isoformat(),
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, files, directory, force_reparse))
+        return job
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status == "completed"]
+        for job_id in finished[:max(0, len(self._jobs) - INGEST_MAX_JOBS)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.started_at:
+            end = datetime.fromisoformat(job.finished_at) if job.finished_at else datetime.now()
+            job.elapsed_seconds = round((end - datetime.fromisoformat(job.started_at)).total_seconds(), 3)
+            done = job.stored + job.failed
+            job.files_per_second = round(done / job.elapsed_seconds, 3) if job.elapsed_seconds else 0.0
+        return job
+
+    # Pipeline -----------------------------------------------------------
+
+    @staticmethod
+    def _fail(job: IngestionJob, index: int, error: str) -> None:
+        job.files[index].state = IngestionFileState.FAILED
+        job.files[index].error = error
+        job.failed += 1
+
+    def _dedup(self, job: IngestionJob, index: int, record: Dict[str, Any], matched_on: str) -> None:
+        """Mark a file as answered by an already stored parse"""
+        job.files[index].state = IngestionFileState.STORED
+        job.files[index].resume_id = record.get("resume_id")
+        job.files[index].deduplicated = True
+        job.stored += 1
+        job.llm_calls_saved += 1
+        self.matching_service.upload_index.record_hit(matched_on)
+
+    async def _extract(self, job: IngestionJob, index: int, path: str) -> Optional[str]:
+        job.files[index].state = IngestionFileState.EXTRACTING
+        try:
+            # Workers memory-map the spooled file; only the path crosses the process boundary
+            text = await asyncio.get_running_loop().run_in_executor(
+                self._pool(), partial(extract_text_from_pdf, parallel=False), path
+            )
+        except Exception as e:
+            self._fail(job, index, f"Text extraction failed: {e}")
+            return None
+        if not text.strip():
+            self._fail(job, index, "No text extracted from PDF")
+            return None
+        return text
+
+    async def _run(self, job: IngestionJob, files: List[SpooledPdf], directory: Optional[str],
+                   force_reparse: bool) -> None:
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        upload_index = self.matching_service.upload_index
+        run = _IngestionRun(force_reparse)
+        extractions = {}
+        try:
+            # Repeated files (earlier uploads or earlier in this one) skip extraction and parsing
+            for index, (_, path, digest) in enumerate(files):
+                run.content_hashes[index] = digest
+                existing = None if force_reparse else await asyncio.to_thread(upload_index.find_by_content, digest)
+                if existing:
+                    self._dedup(job, index, existing, "content")
+                elif digest in run.first_by_content:
+                    run.links[index] = (run.first_by_content[digest], "content")
+                else:
+                    run.first_by_content[digest] = index
+                    extractions[index] = asyncio.ensure_future(self._extract(job, index, path))
+
+            pending = sorted(extractions)
+            for start in range(0, len(pending), self.commit_batch):
+                batch = pending[start:start + self.commit_batch]
+                texts = await asyncio.gather(*(extractions[index] for index in batch))
+                await self._process_batch(job, run, dict(zip(batch, texts)))
+        except Exception as e:
+            for index, file in enumerate(job.files):
+                if file.state not in (IngestionFileState.STORED, IngestionFileState.FAILED) and index not in run.links:
+                    self._fail(job, index, f"Ingestion aborted: {e}")
+        finally:
+            self._resolve_links(job, run)
+            for extraction in extractions.values():
+                extraction.cancel()
+            if directory:
+                await asyncio.to_thread(shutil.rmtree, directory, True)
+            job.status = "completed"
+            job.finished_at = datetime.now().isoformat()
+            self._tasks.pop(job.job_id, None)
+
+    def _resolve_links(self, job: IngestionJob, run: "_IngestionRun") -> None:
+        """Give duplicates within the upload the outcome of the file they repeat"""
+        for index, (original, matched_on) in run.links.items():
+            source = job.files[original]
+            if source.state == IngestionFileState.STORED:
+                self._dedup(job, index, {"resume_id": source.resume_id}, matched_on)
+            else:
+                self._fail(job, index, source.error or "Duplicate of a file that was not stored")
+
+    async def _process_batch(self, job: IngestionJob, run: "_IngestionRun", texts: Dict[int, Optional[str]]) -> None:
+        """Parse one batch of extracted texts and store the successes in one commit"""
+        upload_index = self.matching_service.upload_index
+        indexes = []
+        for index, text in texts.items():
+            if text is None:
+                continue
+            digest = run.text_hashes[index] = text_hash(text)
+            existing = None if run.force_reparse else await asyncio.to_thread(upload_index.find_by_text, digest)
+            if existing:
+                self._dedup(job, index, existing, "text")
+            elif digest in run.first_by_text:
+                run.links[index] = (run.first_by_text[digest], "text")
+            else:
+                run.first_by_text[digest] = index
+                indexes.append(index)
+        if not indexes:
+            return
+        for index in indexes:
+            job.files[index].state = IngestionFileState.PARSING
+        # Background parsing yields to interactive LLM calls
+        with llm_lane("bulk"):
+            outputs = await self.parse_batch([texts[index] for index in indexes], self.parse_concurrency)
+
+        records, stored_indexes = [], []
+        for index, output in zip(indexes, outputs):
+            if isinstance(output, Exception):
+                self._fail(job, index, str(output))
+                continue
+            output["timestamp"] = datetime.now().isoformat()
+            output["filename"] = job.files[index].filename
+            output[CONTENT_HASH_FIELD] = run.content_hashes[index]
+            output[TEXT_HASH_FIELD] = run.text_hashes[index]
+            records.append(output)
+            stored_indexes.append(index)
+        if not records:
+            return
+
+        try:
+            replaced = await asyncio.to_thread(self._replaced_ids, records) if run.force_reparse else []
+            records = await self.matching_service.aadd_resumes(records)
+            if replaced:
+                await asyncio.to_thread(self.matching_service.remove_resumes, replaced)
+        except Exception as e:
+            for index in stored_indexes:
+                self._fail(job, index, f"Storage failed: {e}")
+            return
+        for index, record in zip(stored_indexes, records):
+            job.files[index].state = IngestionFileState.STORED
+            job.files[index].resume_id = record.get("resume_id")
+            job.stored += 1
+
+
+    def _replaced_ids(self, records: List[Dict[str, Any]]) -> List[int]:
+        """Stored resumes that forced re-parses of these records supersede"""
+        return self.matching_service.upload_index.superseded_ids(records)
+
+
+class _IngestionRun:
+    """Per-job bookkeeping for deduplication"""
+
+    def __init__(self, force_reparse: bool):
+        self.force_reparse = force_reparse
+        self.content_hashes: Dict[int, str] = {}
+        self.text_hashes: Dict[int, str] = {}
+        self.first_by_content: Dict[str, int] = {}
+        self.first_by_text: Dict[str, int] = {}
+        self.links: Dict[int, Tuple[int, str]] = {}  # duplicate index -> (original index, matched_on)
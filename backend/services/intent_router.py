@@ -0,0 +1,90 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import re
+import threading
+import time
+
+# Handler for one recognized command; receives the pattern's named groups and
+# returns the reply, or None to hand the message to the agent after all
+IntentHandler = Callable[..., Awaitable[Optional[str]]]
+
+POLITE_PREFIX = re.compile(r"^(?:please|pls|can you|could you|kindly)\s+", re.IGNORECASE)
+
+
+def normalize_command(message: str) -> str:
+    """Collapse whitespace, drop a polite prefix and trailing punctuation"""
+    text = " ".join(message.split())
+    text = POLITE_PREFIX.sub("", text)
+    return text.rstrip(" .!?")
+
+
+class IntentRouter:
+    """Deterministic fast path for the fixed chat commands.
+
+    Each intent is a regular expression that must match the whole
+    (normalized) message; the first matching intent's handler answers without
+    going through the agent's reasoning loop. Messages no intent matches, and
+    messages whose handler declines, fall back to the agent. Counters record
+    how much traffic each path took and how long it took.
+    """
+
+    def __init__(self):
+        self._intents: List[Tuple[str, re.Pattern, IntentHandler]] = []
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Any] = {"messages": 0, "fast_path": 0, "fallback": 0, "declined": 0, "errors": 0}
+        self._by_intent: Dict[str, int] = {}
+        self._latency_ms = {"fast_path": 0.0, "fallback": 0.0}
+
+    def add(self, name: str, pattern: str, handler: IntentHandler) -> None:
+        self._intents.append((name, re.compile(pattern, re.IGNORECASE), handler))
+
+    def match(self, message: str) -> Optional[Tuple[str, IntentHandler, Dict[str, str]]]:
+        command = normalize_command(message)
+        for name, pattern, handler in self._intents:
+            matched = pattern.fullmatch(command)
+            if matched:
+                return name, handler, {key: value.strip() for key, value in matched.groupdict().items() if value}
+        return None
+
+    async def route(self, message: str) -> Optional[Tuple[str, str]]:
+        """(intent, reply) when the fast path answered, None when the agent should"""
+        started = time.perf_counter()
+        matched = self.match(message)
+        if matched is None:
+            return None
+        name, handler, groups = matched
+        try:
+            reply = await handler(**groups)
+        except Exception as e:
+            print(f"Fast-path intent {name} failed, falling back to the agent: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+        if reply is None:
+            with self._lock:
+                self._counters["declined"] += 1
+            return None
+        with self._lock:
+            self._counters["messages"] += 1
+            self._counters["fast_path"] += 1
+            self._by_intent[name] = self._by_intent.get(name, 0) + 1
+            self._latency_ms["fast_path"] += (time.perf_counter() - started) * 1000
+        return name, reply
+
+    def record_fallback(self, elapsed_ms: float) -> None:
+        """Count a message answered by the agent"""
+        with self._lock:
+            self._counters["messages"] += 1
+            self._counters["fallback"] += 1
+            self._latency_ms["fallback"] += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            messages = self._counters["messages"]
+            fast, fallback = self._counters["fast_path"], self._counters["fallback"]
+            return {
+                **self._counters,
+                "fast_path_rate": round(fast / messages, 3) if messages else 0.0,
+                "by_intent": dict(self._by_intent),
+                "avg_fast_path_ms": round(self._latency_ms["fast_path"] / fast, 2) if fast else 0.0,
+                "avg_fallback_ms": round(self._latency_ms["fallback"] / fallback, 2) if fallback else 0.0,
+            }
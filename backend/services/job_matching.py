@@ -1,21 +1,65 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import asyncio
 import json
 import os
+import time
 
-from langchain_openai import AzureChatOpenAI
-from models import Job, Resume, JobMatchResult
-from langchain_google_genai import ChatGoogleGenerativeAI
+# from langchain_openai import AzureChatOpenAI  # only with the Azure model below; it adds seconds to startup
+from models import (
+    Job, Resume, JobStatus, JobMatchResult, MatchCascadeConfig, MatchPipelineResult, MatchStage, RetrievalStrategy,
+    FitVerdict, MatchAssessment
+)
+from .storage import get_storage
+from .batch_scorer import BatchScorer
+from .embeddings_service import EmbeddingsService
+from .match_scores import MatchScoreTable
+from .llm_cache import get_llm_cache
+from .upload_dedup import UploadDedupIndex
+from .llm_gateway import governed_chat_model, llm_lane
+import numpy as np
 import re
 from dotenv import load_dotenv
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from langchain_core.prompts import PromptTemplate
 
 load_dotenv()
 
+# Maximum number of match summaries generated in parallel
+SUMMARY_CONCURRENCY = int(os.getenv("MATCH_SUMMARY_CONCURRENCY", "5"))
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milliseconds elapsed since a perf_counter() reading"""
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+# Order of the fit verdicts in the LLM rerank stage
+FIT_VERDICT_RANK = {FitVerdict.STRONG: 0, FitVerdict.GOOD: 1, FitVerdict.WEAK: 2}
+
+
+def _fallback_verdict(score: float) -> FitVerdict:
+    """Verdict matching _fallback_summary, used when the LLM call fails"""
+    if score >= 0.7:
+        return FitVerdict.STRONG
+    return FitVerdict.GOOD if score >= 0.4 else FitVerdict.WEAK
+
+
 class JobMatchingService:
-    def __init__(self):
-        self.llm = self._initialize_llm()
+    def __init__(self, llm=None):
+        self.storage = get_storage()
+        self.upload_index = UploadDedupIndex(self.storage)
+        self.scorer = BatchScorer()
+        self.embeddings = EmbeddingsService()
+        self._embedded_version = None
+        self.match_scores = MatchScoreTable()
+        self._scored_versions = None
+        self.llm = llm or self._initialize_llm()
+        self.match_summary_prompt = self._initialize_match_summary_prompt()
         self.match_summary_chain = self._initialize_match_summary_chain()
+        self._match_assessment_chain = None
+
+    def close(self) -> None:
+        """Save what is still buffered in memory (called at shutdown)"""
+        self.embeddings.flush()
 
     def _initialize_llm(self):
         """Initialize the LLM with proper configuration."""
@@ -25,16 +69,17 @@ class JobMatchingService:
         #     temperature=0.7
         # )
 
-        return ChatGoogleGenerativeAI(
+        return governed_chat_model(
             model="gemini-2.5-flash",
             temperature=0.7,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            cache=get_llm_cache()
         )
     
 
-    def _initialize_match_summary_chain(self):
-        """Create an LLMChain for generating match summaries."""
-        prompt = PromptTemplate(
+    def _initialize_match_summary_prompt(self) -> PromptTemplate:
+        """Prompt shared by the summary chain and the rerank (assessment) chain."""
+        return PromptTemplate(
             input_variables=[
                 "job_title", "job_description", "job_type", "employment_type",
                 "candidate_name", "candidate_skills", "matching_skills",
@@ -62,31 +107,72 @@ Provide a 2-3 sentence summary highlighting:
 Keep it professional and concise.
 """
         )
-        return LLMChain(llm=self.llm, prompt=prompt)
+
+    def _initialize_match_summary_chain(self):
+        """Create an LLMChain for generating match summaries."""
+        # Imported here: the langchain package is slow to import and only this chain needs it
+        from langchain.chains import LLMChain
+        return LLMChain(llm=self.llm, prompt=self.match_summary_prompt)
+
+    @property
+    def match_assessment_chain(self):
+        """Summary plus a fit verdict as structured output; used by the LLM rerank stage"""
+        if self._match_assessment_chain is None:
+            self._match_assessment_chain = self.match_summary_prompt | self.llm.with_structured_output(MatchAssessment)
+        return self._match_assessment_chain
 
     def load_jobs(self) -> List[Job]:
-        """Load job descriptions from JSON file"""
-        job_file_path = "job_des.json"
-        if os.path.exists(job_file_path):
-            try:
-                with open(job_file_path, 'r', encoding='utf-8') as f:
-                    jobs_data = json.load(f)
-                return [Job(**job) for job in jobs_data]
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+        """Load job descriptions from the configured storage backend"""
+        return self.storage.load_jobs()
     
     def load_resumes(self) -> List[Resume]:
-        """Load parsed resumes from JSON file"""
-        resume_file_path = "parsed_resumes.json"
-        if os.path.exists(resume_file_path):
-            try:
-                with open(resume_file_path, 'r', encoding='utf-8') as f:
-                    resumes_data = json.load(f)
-                return [Resume(**resume) for resume in resumes_data]
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+        """Load parsed resumes from the configured storage backend"""
+        return self.storage.load_resumes()
+    
+    def get_job_by_id(self, job_id: int) -> Optional[Job]:
+        """Look up a job by its ID"""
+        return self.storage.get_job(job_id)
+    
+    def find_candidate_by_email(self, email: str) -> Optional[Resume]:
+        """Look up a candidate by exact email address"""
+        return self.storage.find_resume_by_email(email)
+    
+    async def afind_candidate_by_email(self, email: str) -> Optional[Resume]:
+        """Async variant of find_candidate_by_email (storage reads run in a worker thread)"""
+        return await asyncio.to_thread(self.find_candidate_by_email, email)
+    
+    def add_resume(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a parsed resume and add it to the semantic index; returns the stored record"""
+        Resume(**record)  # raises ValidationError before anything malformed is written
+        record = self.storage.add_resume(record)
+        self.embeddings.add_resume(Resume(**record))
+        self.upload_index.add([record])
+        return record
+    
+    def remove_resumes(self, resume_ids: List[int]) -> int:
+        """Delete stored resumes (e.g. parses replaced by a forced re-parse); returns how many existed"""
+        return sum(1 for resume_id in resume_ids if self.storage.delete_resume(resume_id))
+    
+    async def aadd_resume(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of add_resume (file/database writes run in a worker thread)"""
+        return await asyncio.to_thread(self.add_resume, record)
+    
+    def add_resumes(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Persist a group of parsed resumes in one storage commit and embed them together"""
+        for record in records:
+            Resume(**record)  # validate the whole group before the commit
+        records = self.storage.add_resumes(records)
+        self.embeddings.add_resumes([Resume(**record) for record in records])
+        self.upload_index.add(records)
+        return records
+    
+    async def aadd_resumes(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async variant of add_resumes"""
+        return await asyncio.to_thread(self.add_resumes, records)
+    
+    def search_jobs(self, title: str = None, job_type: str = None, employment_type: str = None) -> List[Job]:
+        """Search jobs by title substring, job type and employment type"""
+        return self.storage.search_jobs(title, job_type, employment_type)
     
     def find_job_by_title(self, job_title: str) -> Job:
         """Find a job by title (case-insensitive partial match)"""
@@ -141,98 +227,397 @@ Keep it professional and concise.
         
         return relevant_exp
     
-    def match_candidates_to_job(self, job_title: str, top_n: int = 5) -> List[JobMatchResult]:
-        """Match candidates to a specific job and return top matches"""
-        # Find the job
+    def score_candidate(self, resume: Resume, job: Job,
+                        skill_match: Optional[Tuple[float, List[str]]] = None) -> JobMatchResult:
+        """Score a single candidate against a job without calling the LLM.
+        
+        ``skill_match`` can carry a precomputed (score, matching_skills) pair,
+        e.g. from the skill index.
+        """
+        # Calculate skill match
+        if skill_match is None:
+            skill_match = self.calculate_skill_match_score(
+                resume.skills, 
+                f"{job.title} {job.description}"
+            )
+        skill_score, matching_skills = skill_match
+        
+        # Extract relevant experience
+        relevant_exp = self.extract_relevant_experience(
+            [exp.dict() if hasattr(exp, 'dict') else exp for exp in resume.work_experience],
+            job.title,
+            job.description
+        )
+        
+        # Calculate experience score
+        exp_score = min(len(relevant_exp) * 0.2, 1.0)  # Max 1.0 for 5+ relevant experiences
+        
+        # Calculate education match (simple heuristic)
+        education_score = 0.3 if resume.education else 0.0  # Basic score for having education
+        education_match = "Has formal education" if resume.education else "No formal education listed"
+        
+        # Overall match score (weighted average)
+        overall_score = (skill_score * 0.5) + (exp_score * 0.3) + (education_score * 0.2)
+        
+        return JobMatchResult(
+            candidate_name=resume.full_name or "Unknown",
+            candidate_email=resume.email or "Unknown",
+            match_score=round(overall_score * 100, 1),  # Convert to percentage
+            matching_skills=matching_skills,
+            relevant_experience=relevant_exp,
+            education_match=education_match,
+            summary="",
+            resume_data=resume
+        )
+    
+    def match_candidate(self, resume: Resume, job: Job) -> JobMatchResult:
+        """Score one candidate against a job, taking an open job's score from the materialized table.
+        
+        The matching skills and experience are still derived here; jobs that are
+        not materialized (closed, paused) are scored on the fly.
+        """
+        result = self.score_candidate(resume, job)
+        if job.status == JobStatus.OPEN and resume.resume_id is not None:
+            resumes = self.load_resumes()
+            self._sync_match_scores(resumes, self._scorer_for(resumes))
+            score = self.match_scores.get_score(job.jobId, resume.resume_id)
+            if score is not None:
+                result.match_score = round(score * 100, 1)
+        return result
+    
+    def _synced_resumes(self) -> Dict[int, Resume]:
+        """Stored resumes by id, with the semantic index brought up to date"""
+        resumes = self.load_resumes()
+        version = self.storage.resume_version()
+        if version != self._embedded_version:
+            self.embeddings.sync(resumes, epoch=version[0])
+            self._embedded_version = version
+        return {resume.resume_id: resume for resume in resumes}
+    
+    def find_similar_candidates(self, job: Job, k: int) -> List[Tuple[Resume, float]]:
+        """k nearest candidates to a job in the semantic (FAISS) index"""
+        by_id = self._synced_resumes()
+        return [(by_id[resume_id], similarity) for resume_id, similarity in self.embeddings.search_job(job, k)
+                if resume_id in by_id]
+    
+    def search_candidates(self, text: str, k: int) -> List[Tuple[Resume, float]]:
+        """k nearest candidates to a free-text query (e.g. a chat question)"""
+        by_id = self._synced_resumes()
+        return [(by_id[resume_id], similarity) for resume_id, similarity in self.embeddings.search(text, k)
+                if resume_id in by_id]
+    
+    def _scorer_for(self, resumes: List[Resume]) -> BatchScorer:
+        """Read-only view of the shared scorer at exactly this resume list.
+        
+        Requests running in other threads may sync the shared scorer to a newer
+        list at any time; every position taken from the view refers to ``resumes``.
+        """
+        return self.scorer.snapshot(resumes, self.storage.resume_version())
+    
+    def _sync_match_scores(self, resumes: List[Resume], scorer: BatchScorer) -> None:
+        """Apply resume/job changes since the last call to the materialized score table"""
+        versions = (self.storage.resume_version(), self.storage.job_version())
+        if versions != self._scored_versions:
+            self.match_scores.sync(self.load_jobs(), resumes, scorer, epoch=versions[0][0])
+            self._scored_versions = versions
+    
+    def rank_candidates(self, job: Job, resumes: List[Resume], top_n: int = 5,
+                        positions: Optional[List[int]] = None) -> List[JobMatchResult]:
+        """Score candidates deterministically and keep the top N.
+        
+        Open jobs are read from the materialized score table; ``positions``
+        optionally restricts ranking to a subset of ``resumes`` and is scored
+        on the fly.
+        """
+        scorer = self._scorer_for(resumes)
+        ranked = None
+        if positions is None and job.status == JobStatus.OPEN:
+            self._sync_match_scores(resumes, scorer)
+            position_by_id = {resume.resume_id: position for position, resume in enumerate(resumes)}
+            ranked = [position_by_id.get(resume_id) for resume_id, _ in self.match_scores.top_candidates(job.jobId, top_n)]
+            if None in ranked or len(ranked) < min(top_n, len(resumes)):
+                # The table was synced to another resume list meanwhile; score this one directly
+                ranked = None
+        if ranked is None:
+            ranked = scorer.top_k(job, top_n, positions)
+        skill_matches = scorer.match_positions(f"{job.title} {job.description}", ranked)
+        return [self.score_candidate(resumes[position], job, skill_matches[position]) for position in ranked]
+    
+    def _retrieve(self, job: Job, resumes: List[Resume], cascade: MatchCascadeConfig) -> Optional[List[int]]:
+        """Candidate generation stage; returns positions in ``resumes`` or None for everyone"""
+        if cascade.retrieval == RetrievalStrategy.LEXICAL:
+            return self._scorer_for(resumes).retrieve(f"{job.title} {job.description}", cascade.retrieve_limit)
+        if cascade.retrieval == RetrievalStrategy.VECTOR:
+            position_by_id = {resume.resume_id: position for position, resume in enumerate(resumes)}
+            return [position_by_id[resume.resume_id]
+                    for resume, _ in self.find_similar_candidates(job, cascade.retrieve_limit)]
+        return None
+    
+    def _run_cheap_stages(self, job_title: str, top_n: int,
+                          cascade: MatchCascadeConfig) -> MatchPipelineResult:
+        """Load, retrieve and score stages of the cascade (no LLM calls)"""
+        report = MatchPipelineResult()
+        started = time.perf_counter()
+        
+        # Find the job and load all resumes
         job = self.find_job_by_title(job_title)
-        if not job:
-            return []
+        resumes = self.load_resumes() if job else []
+        report.job = job
+        report.stages.append(MatchStage(
+            name="load", input_count=len(resumes), output_count=len(resumes), duration_ms=_elapsed_ms(started)
+        ))
+        if not job or not resumes:
+            return report
         
-        # Load all resumes
+        # Candidate generation narrows the pool
+        stage_started = time.perf_counter()
+        positions = self._retrieve(job, resumes, cascade)
+        pool_size = len(resumes) if positions is None else len(positions)
+        report.stages.append(MatchStage(
+            name="retrieve", strategy=cascade.retrieval.value,
+            limit=None if cascade.retrieval == RetrievalStrategy.ALL else cascade.retrieve_limit,
+            input_count=len(resumes), output_count=pool_size, duration_ms=_elapsed_ms(stage_started)
+        ))
+        
+        # Deterministic scorer ranks the pool; only the handful for the LLM survive
+        stage_started = time.perf_counter()
+        keep = max(cascade.rerank_limit or top_n, top_n) if cascade.llm_rerank else top_n
+        report.results = self.rank_candidates(job, resumes, keep, positions) if pool_size else []
+        report.stages.append(MatchStage(
+            name="score", strategy="deterministic", limit=keep,
+            input_count=pool_size, output_count=len(report.results), duration_ms=_elapsed_ms(stage_started)
+        ))
+        return report
+    
+    def _finish_llm_stage(self, report: MatchPipelineResult, top_n: int, cascade: MatchCascadeConfig,
+                          stage_started: float, started: float) -> MatchPipelineResult:
+        """Optionally rerank by the LLM's fit verdict, cut to top_n and record the stage"""
+        candidates = len(report.results)
+        if cascade.llm_rerank:
+            report.results.sort(key=lambda r: (FIT_VERDICT_RANK[r.fit_verdict], -r.match_score))
+        report.results = report.results[:top_n]
+        report.stages.append(MatchStage(
+            name="rerank" if cascade.llm_rerank else "summarize", strategy="llm", limit=top_n,
+            input_count=candidates, output_count=len(report.results), duration_ms=_elapsed_ms(stage_started)
+        ))
+        report.total_ms = _elapsed_ms(started)
+        return report
+    
+    def run_match_pipeline(self, job_title: str, top_n: int = 5,
+                           cascade: Optional[MatchCascadeConfig] = None) -> MatchPipelineResult:
+        """Cascaded match: retrieve -> deterministic score -> LLM summary/rerank.
+        
+        Only the final handful of candidates reach the LLM. The report carries
+        per-stage limits, candidate counts and timings in milliseconds.
+        """
+        cascade = cascade or MatchCascadeConfig()
+        started = time.perf_counter()
+        report = self._run_cheap_stages(job_title, top_n, cascade)
+        if not report.results:
+            report.total_ms = _elapsed_ms(started)
+            return report
+        
+        stage_started = time.perf_counter()
+        self.generate_match_summaries(report.job, report.results, with_verdict=cascade.llm_rerank)
+        return self._finish_llm_stage(report, top_n, cascade, stage_started, started)
+    
+    async def arun_match_pipeline(self, job_title: str, top_n: int = 5,
+                                  cascade: Optional[MatchCascadeConfig] = None) -> MatchPipelineResult:
+        """Async variant of run_match_pipeline.
+        
+        The CPU-bound load/retrieve/score stages run in a worker thread and the
+        summary calls are batched with ``abatch``.
+        """
+        cascade = cascade or MatchCascadeConfig()
+        started = time.perf_counter()
+        report = await asyncio.to_thread(self._run_cheap_stages, job_title, top_n, cascade)
+        if not report.results:
+            report.total_ms = _elapsed_ms(started)
+            return report
+        
+        stage_started = time.perf_counter()
+        await self.agenerate_match_summaries(report.job, report.results, with_verdict=cascade.llm_rerank)
+        return self._finish_llm_stage(report, top_n, cascade, stage_started, started)
+    
+    def score_candidates_to_job(self, job_title: str, top_n: int = 5) -> MatchPipelineResult:
+        """Deterministic ranking only (load, retrieve, score): no LLM calls, empty summaries"""
+        return self._run_cheap_stages(job_title, top_n, MatchCascadeConfig())
+    
+    def match_candidates_to_job(self, job_title: str, top_n: int = 5,
+                                cascade: Optional[MatchCascadeConfig] = None) -> List[JobMatchResult]:
+        """Match candidates to a specific job and return top matches"""
+        return self.run_match_pipeline(job_title, top_n, cascade).results
+    
+    async def amatch_candidates_to_job(self, job_title: str, top_n: int = 5,
+                                       cascade: Optional[MatchCascadeConfig] = None) -> List[JobMatchResult]:
+        """Async variant of match_candidates_to_job"""
+        return (await self.arun_match_pipeline(job_title, top_n, cascade)).results
+    
+    def iter_match_matrix(self, top_k: int = 5, best_jobs: int = 3, include_summaries: bool = False,
+                          status_filter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Score every job against every candidate in one pass and yield the results row by row.
+        
+        Yields one ``{"type": "job", ...}`` record per job with its top_k
+        candidates, then one ``{"type": "candidate", ...}`` record per candidate
+        with their best_jobs jobs, then a final ``{"type": "summary", ...}``.
+        Only one job's score column and a (candidates x best_jobs) table are held
+        in memory at a time. Summaries are skipped unless requested.
+        """
+        started = time.perf_counter()
+        jobs = self.get_available_jobs(status_filter)
         resumes = self.load_resumes()
-        if not resumes:
-            return []
+        # Every row of this response is computed from one view of the scorer
+        scorer = self._scorer_for(resumes)
         
-        results = []
+        best_jobs = max(best_jobs, 0)
+        best_scores = np.full((len(resumes), best_jobs), -np.inf)
+        best_job_index = np.full((len(resumes), best_jobs), -1, dtype=np.int64)
         
-        for resume in resumes:
-            # Calculate skill match
-            skill_score, matching_skills = self.calculate_skill_match_score(
-                resume.skills, 
-                f"{job.title} {job.description}"
-            )
-            
-            # Extract relevant experience
-            relevant_exp = self.extract_relevant_experience(
-                [exp.dict() if hasattr(exp, 'dict') else exp for exp in resume.work_experience],
-                job.title,
-                job.description
-            )
-            
-            # Calculate experience score
-            exp_score = min(len(relevant_exp) * 0.2, 1.0)  # Max 1.0 for 5+ relevant experiences
-            
-            # Calculate education match (simple heuristic)
-            education_score = 0.3 if resume.education else 0.0  # Basic score for having education
-            education_match = "Has formal education" if resume.education else "No formal education listed"
-            
-            # Overall match score (weighted average)
-            overall_score = (skill_score * 0.5) + (exp_score * 0.3) + (education_score * 0.2)
-            
-            # Generate AI summary
-            summary = self.generate_match_summary(resume, job, matching_skills, relevant_exp, overall_score)
-            
-            result = JobMatchResult(
-                candidate_name=resume.full_name or "Unknown",
-                candidate_email=resume.email or "Unknown",
-                match_score=round(overall_score * 100, 1),  # Convert to percentage
-                matching_skills=matching_skills,
-                relevant_experience=relevant_exp,
-                education_match=education_match,
-                summary=summary,
-                resume_data=resume
-            )
+        for job_index, job in enumerate(jobs):
+            scores = scorer.score_all(job)
+            positions = scorer.rank_scores(scores, top_k)
+            skill_matches = scorer.match_positions(f"{job.title} {job.description}", positions)
+            results = [self.score_candidate(resumes[position], job, skill_matches[position])
+                       for position in positions]
+            if include_summaries:
+                with llm_lane("bulk"):
+                    self.generate_match_summaries(job, results)
+            yield {
+                "type": "job",
+                "job": job.dict(),
+                "candidates": [
+                    {"resume_id": resumes[position].resume_id, **result.dict(exclude={"resume_data"})}
+                    for position, result in zip(positions, results)
+                ],
+            }
             
-            results.append(result)
+            if best_jobs and len(resumes):
+                # Merge this job's column into each candidate's running best list; the
+                # stable sort keeps earlier jobs first on equal scores
+                merged_scores = np.hstack([best_scores, scores[:, None]])
+                merged_jobs = np.hstack([best_job_index, np.full((len(resumes), 1), job_index, dtype=np.int64)])
+                order = np.argsort(-merged_scores, axis=1, kind="stable")[:, :best_jobs]
+                best_scores = np.take_along_axis(merged_scores, order, axis=1)
+                best_job_index = np.take_along_axis(merged_jobs, order, axis=1)
+        
+        for position, resume in enumerate(resumes):
+            yield {
+                "type": "candidate",
+                "resume_id": resume.resume_id,
+                "candidate_name": resume.full_name or "Unknown",
+                "candidate_email": resume.email or "Unknown",
+                "best_jobs": [
+                    {"jobId": jobs[job_index].jobId, "title": jobs[job_index].title,
+                     "match_score": round(float(score) * 100, 1)}
+                    for job_index, score in zip(best_job_index[position], best_scores[position])
+                    if job_index >= 0
+                ],
+            }
         
-        # Sort by match score and return top N
-        results.sort(key=lambda x: x.match_score, reverse=True)
-        return results[:top_n]
+        yield {
+            "type": "summary",
+            "jobs": len(jobs),
+            "candidates": len(resumes),
+            "top_k": top_k,
+            "best_jobs": best_jobs,
+            "include_summaries": include_summaries,
+            "duration_ms": _elapsed_ms(started),
+        }
+    
+    def _summary_inputs(self, resume: Resume, job: Job, matching_skills: List[str],
+                        relevant_exp: List[str], score: float) -> Dict[str, Any]:
+        """Build the prompt inputs for the match summary chain"""
+        return {
+            "job_title": job.title,
+            "job_description": job.description,
+            "job_type": job.jobType,
+            "employment_type": job.employmentType,
+            "candidate_name": resume.full_name or "Unknown",
+            "candidate_skills": ', '.join(resume.skills) if resume.skills else "None listed",
+            "matching_skills": ', '.join(matching_skills) if matching_skills else "None",
+            "relevant_experience": '; '.join(relevant_exp) if relevant_exp else "None identified",
+            "education_count": len(resume.education),
+            "overall_score": score
+        }
+    
+    def _fallback_summary(self, matching_skills: List[str], score: float) -> str:
+        """Fallback summary used when the LLM call fails"""
+        if score >= 0.7:
+            return f"Strong candidate with {len(matching_skills)} matching skills and relevant experience. Highly recommended."
+        elif score >= 0.4:
+            return f"Good candidate with some matching skills ({len(matching_skills)}) and experience. Worth considering."
+        else:
+            return f"Limited match with few relevant skills ({len(matching_skills)}). May require additional training."
+    
+    def _apply_summaries(self, results: List[JobMatchResult], outputs: List[Any], with_verdict: bool = False) -> None:
+        """Copy batch outputs onto the results, falling back on failures.
+        
+        Assessment outputs also carry the fit verdict; a failed or empty
+        assessment gets the verdict matching its fallback summary.
+        """
+        for result, output in zip(results, outputs):
+            score = result.match_score / 100
+            if isinstance(output, MatchAssessment):
+                result.summary = output.summary
+                result.fit_verdict = output.verdict
+            elif isinstance(output, dict):
+                result.summary = output[self.match_summary_chain.output_key]
+            else:
+                result.summary = self._fallback_summary(result.matching_skills, score)
+                if with_verdict:
+                    result.fit_verdict = _fallback_verdict(score)
+    
+    def _summary_batch(self, job: Job, results: List[JobMatchResult], with_verdict: bool):
+        """Chain and inputs for one batch of summaries"""
+        inputs = [
+            self._summary_inputs(r.resume_data, job, r.matching_skills, r.relevant_experience, r.match_score / 100)
+            for r in results
+        ]
+        return (self.match_assessment_chain if with_verdict else self.match_summary_chain), inputs
+    
+    def generate_match_summaries(self, job: Job, results: List[JobMatchResult], with_verdict: bool = False) -> None:
+        """Fill in AI summaries for already-ranked results, running the calls concurrently.
+        
+        ``with_verdict`` also asks for a structured fit verdict (see FitVerdict).
+        """
+        if not results:
+            return
+        chain, inputs = self._summary_batch(job, results, with_verdict)
+        outputs = chain.batch(inputs, config={"max_concurrency": SUMMARY_CONCURRENCY}, return_exceptions=True)
+        self._apply_summaries(results, outputs, with_verdict)
+    
+    async def agenerate_match_summaries(self, job: Job, results: List[JobMatchResult],
+                                        with_verdict: bool = False) -> None:
+        """Async variant of generate_match_summaries"""
+        if not results:
+            return
+        chain, inputs = self._summary_batch(job, results, with_verdict)
+        outputs = await chain.abatch(inputs, config={"max_concurrency": SUMMARY_CONCURRENCY}, return_exceptions=True)
+        self._apply_summaries(results, outputs, with_verdict)
     
     def generate_match_summary(self, resume: Resume, job: Job, matching_skills: List[str], 
                                 relevant_exp: List[str], score: float) -> str:
         """Generate an AI-powered summary of the candidate match using LLMChain."""
         try:
-            inputs = {
-                "job_title": job.title,
-                "job_description": job.description,
-                "job_type": job.jobType,
-                "employment_type": job.employmentType,
-                "candidate_name": resume.full_name or "Unknown",
-                "candidate_skills": ', '.join(resume.skills) if resume.skills else "None listed",
-                "matching_skills": ', '.join(matching_skills) if matching_skills else "None",
-                "relevant_experience": '; '.join(relevant_exp) if relevant_exp else "None identified",
-                "education_count": len(resume.education),
-                "overall_score": score
-            }
+            inputs = self._summary_inputs(resume, job, matching_skills, relevant_exp, score)
             return self.match_summary_chain.run(inputs)
         except Exception as e:
             # Fallback summary if AI fails
-            if score >= 0.7:
-                return f"Strong candidate with {len(matching_skills)} matching skills and relevant experience. Highly recommended."
-            elif score >= 0.4:
-                return f"Good candidate with some matching skills ({len(matching_skills)}) and experience. Worth considering."
-            else:
-                return f"Limited match with few relevant skills ({len(matching_skills)}). May require additional training."
+            return self._fallback_summary(matching_skills, score)
+    
+    async def agenerate_match_summary(self, resume: Resume, job: Job, matching_skills: List[str],
+                                      relevant_exp: List[str], score: float) -> str:
+        """Async variant of generate_match_summary"""
+        try:
+            inputs = self._summary_inputs(resume, job, matching_skills, relevant_exp, score)
+            outputs = await self.match_summary_chain.ainvoke(inputs)
+            return outputs[self.match_summary_chain.output_key]
+        except Exception:
+            return self._fallback_summary(matching_skills, score)
     
     def get_available_jobs(self, status_filter: str = None) -> List[Job]:
         """Get list of available jobs, optionally filtered by status"""
-        jobs = self.load_jobs()
-        
-        if status_filter:
-            jobs = [job for job in jobs if job.status.value.lower() == status_filter.lower()]
-        
-        return jobs
+        return self.storage.jobs_by_status(status_filter)
     
     def get_job_statistics(self) -> Dict[str, Any]:
         """Get statistics about jobs and candidates"""
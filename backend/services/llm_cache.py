@@ -0,0 +1,197 @@
+from typing import Any, Dict, Optional, Sequence
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
+import json
+import os
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from sqlalchemy import create_engine, event, select, delete, func, Float, String, Text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))  # on disk
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+
+# Set for the current request/task to skip cached responses (fresh ones are still stored)
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache(enabled: bool = True):
+    """Within this block LLM calls ignore cached responses"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class CacheRow(Base):
+    __tablename__ = "llm_cache"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    created: Mapped[float] = mapped_column(Float)
+    accessed: Mapped[float] = mapped_column(Float, index=True)
+    value: Mapped[str] = mapped_column(Text)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash of the rendered prompt and the model settings (model name, temperature, ...)"""
+    return hashlib.sha256(f"{llm_string}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache with an in-memory LRU in front of a SQLite store.
+
+    Attach it to a model with ``cache=``; every invoke/batch/agent call through
+    that model is then looked up by a hash of the rendered prompt plus the
+    model settings. Entries expire after ``ttl`` seconds and the disk store
+    keeps at most ``max_entries``, evicting the least recently used.
+    """
+
+    def __init__(self, database_path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.database_path = database_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.engine = create_engine(f"sqlite:///{database_path}")
+        event.listen(self.engine, "connect", self._configure_connection)
+        self.Session = sessionmaker(self.engine, expire_on_commit=False)
+        self._lock = threading.RLock()
+        self._ready = False
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    def _ensure_schema(self) -> None:
+        if not self._ready:
+            Base.metadata.create_all(self.engine)
+            self._ready = True
+
+    def _remember(self, key: str, created: float, generations) -> None:
+        self._memory[key] = (created, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _serialize(generations: Sequence[Generation]) -> str:
+        return json.dumps([dumps(generation) for generation in generations])
+
+    @staticmethod
+    def _deserialize(value: str) -> list:
+        return [loads(generation) for generation in json.loads(value)]
+
+    # BaseCache ----------------------------------------------------------
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        if _bypass.get():
+            with self._lock:
+                self._counters["bypassed"] += 1
+            return None
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached and now - cached[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return cached[1]
+
+            self._ensure_schema()
+            with self.Session.begin() as session:
+                row = session.get(CacheRow, key)
+                if row is None or now - row.created > self.ttl:
+                    if row is not None:
+                        session.delete(row)
+                    self._memory.pop(key, None)
+                    self._counters["misses"] += 1
+                    return None
+                row.accessed = now
+                created, value = row.created, row.value
+            try:
+                generations = self._deserialize(value)
+            except Exception:
+                self._counters["misses"] += 1
+                return None
+            self._remember(key, created, generations)
+            self._counters["disk_hits"] += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._ensure_schema()
+            with self.Session.begin() as session:
+                session.merge(CacheRow(key=key, created=now, accessed=now, value=self._serialize(return_val)))
+                self._evict(session, now)
+            self._remember(key, now, list(return_val))
+            self._counters["writes"] += 1
+
+    def _evict(self, session, now: float) -> None:
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        evicted = session.execute(delete(CacheRow).where(CacheRow.created < now - self.ttl)).rowcount or 0
+        excess = session.scalar(select(func.count()).select_from(CacheRow)) - self.max_entries
+        if excess > 0:
+            oldest = select(CacheRow.key).order_by(CacheRow.accessed).limit(excess).scalar_subquery()
+            evicted += session.execute(delete(CacheRow).where(CacheRow.key.in_(oldest))).rowcount or 0
+        self._counters["evictions"] += evicted
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._ensure_schema()
+            self._memory.clear()
+            with self.Session.begin() as session:
+                session.execute(delete(CacheRow))
+
+    # Metrics ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_schema()
+            with self.Session() as session:
+                disk_entries = session.scalar(select(func.count()).select_from(CacheRow))
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide LLM response cache, or None if LLM_CACHE_ENABLED is off"""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
@@ -0,0 +1,455 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from google.api_core.exceptions import (
+    DeadlineExceeded, InternalServerError, ResourceExhausted, ServiceUnavailable, TooManyRequests,
+)
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Provider budgets shared by every LLM call in the process (0 disables a limit)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "250000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Concurrency slots only the interactive lane may use, so chat never queues behind a full pipe of bulk work
+LLM_INTERACTIVE_RESERVE = int(os.getenv("LLM_INTERACTIVE_RESERVE", "2"))
+# Output tokens assumed when reserving budget for a call; corrected from usage afterwards
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "512"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+LLM_RETRY_MAX_WAIT = float(os.getenv("LLM_RETRY_MAX_WAIT", "30"))  # seconds
+
+# Lanes in priority order: queued interactive calls are granted before default ones, default before bulk
+LANES = {"interactive": 0, "default": 1, "bulk": 2}
+
+_lane: ContextVar[str] = ContextVar("llm_lane", default="default")
+# Set while a call holds a gateway slot, so nested fallbacks (async -> executor) are not governed twice
+_governed: ContextVar[bool] = ContextVar("llm_governed", default=False)
+
+
+_STREAM_END = object()
+
+
+def _governed_step(fn: Callable, *args):
+    """Call fn with nested LLM calls marked as governed, for this call only.
+
+    Streams use it around each step of the provider iterator rather than across
+    their yields, so the consumer's own LLM calls between chunks stay governed.
+    """
+    marker = _governed.set(True)
+    try:
+        return fn(*args)
+    finally:
+        _governed.reset(marker)
+
+
+async def _agoverned_step(fn: Callable, *args):
+    """Async variant of _governed_step"""
+    marker = _governed.set(True)
+    try:
+        return await fn(*args)
+    finally:
+        _governed.reset(marker)
+
+
+async def _anext_or_end(iterator: AsyncIterator):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_END
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """LLM calls made within this block are queued in the given lane"""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, overload and transient server errors"""
+    if isinstance(error, (ResourceExhausted, TooManyRequests, ServiceUnavailable, InternalServerError, DeadlineExceeded)):
+        return True
+    cause = error.__cause__
+    return cause is not None and cause is not error and is_retryable(cause)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return isinstance(error, (ResourceExhausted, TooManyRequests)) or "429" in str(error)
+
+
+class TokenBucket:
+    """Refills per_minute units evenly over a minute; never holds more than per_minute"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount units are available"""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take amount units; a negative amount returns them"""
+        if not self.unlimited:
+            # Overruns are carried as debt, down to one minute's budget
+            self.level = min(self.capacity, max(-self.capacity, self.level - min(amount, self.capacity)))
+
+
+class _Ticket:
+    """A queued call; woken when it may be at the head of the queue"""
+
+    def __init__(self, lane: str, seq: int, tokens: int, loop: Optional[asyncio.AbstractEventLoop]):
+        self.lane = lane
+        self.priority = LANES[lane]
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.loop = loop
+        self.event = threading.Event() if loop is None else asyncio.Event()
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class LLMGateway:
+    """Single admission point for provider LLM calls.
+
+    Calls wait in a priority queue (interactive before default before bulk,
+    first come first served within a lane) until a concurrency slot is free
+    and the requests-per-minute and tokens-per-minute buckets can cover them.
+    The token reservation is the prompt size plus an output estimate and is
+    corrected from reported usage once the call finishes. Rate-limit and
+    transient errors are retried with jittered exponential backoff, each
+    attempt queuing again; a rate-limit response also drains the request
+    bucket so other callers back off with it.
+    """
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 interactive_reserve: int = LLM_INTERACTIVE_RESERVE, max_attempts: int = LLM_MAX_ATTEMPTS,
+                 retry_max_wait: float = LLM_RETRY_MAX_WAIT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.interactive_reserve = min(max(0, interactive_reserve), self.max_concurrency - 1)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_max_wait = retry_max_wait
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._waiting: List[_Ticket] = []
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {lane: {"granted": 0, "wait_ms": 0.0, "max_wait_ms": 0.0} for lane in LANES}
+        self._counters = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0,
+                          "estimated_tokens": 0, "used_tokens": 0}
+
+    # Admission
+
+    def _wake_head(self) -> None:
+        if self._waiting:
+            self._waiting[0].wake()
+
+    def _enqueue(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None) -> _Ticket:
+        with self._lock:
+            ticket = _Ticket(_lane.get(), next(self._seq), tokens, loop)
+            heapq.heappush(self._waiting, ticket)
+            self._wake_head()
+            return ticket
+
+    def _try_grant(self, ticket: _Ticket) -> Optional[float]:
+        """0 when the ticket was granted, else seconds to wait (None: until woken)"""
+        with self._lock:
+            if self._waiting[0] is not ticket:
+                return None
+            reserve = 0 if ticket.lane == "interactive" else self.interactive_reserve
+            if self._in_flight >= self.max_concurrency - reserve:
+                return None
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            delay = max(self._requests.wait_time(1), self._tokens.wait_time(ticket.tokens))
+            if delay > 0:
+                return delay
+            self._requests.consume(1)
+            self._tokens.consume(ticket.tokens)
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            waited = (now - ticket.enqueued) * 1000
+            stats = self._stats[ticket.lane]
+            stats["granted"] += 1
+            stats["wait_ms"] += waited
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], waited)
+            self._counters["estimated_tokens"] += ticket.tokens
+            self._wake_head()
+            return 0.0
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        with self._lock:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._wake_head()
+
+    def _release(self, ticket: _Ticket, used_tokens: Optional[int], error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._counters["calls"] += 1
+            if used_tokens is not None:
+                # Settle the reservation against what the call actually used
+                self._counters["used_tokens"] += used_tokens
+                self._tokens.consume(used_tokens - ticket.tokens)
+            if error is not None and is_rate_limited(error):
+                self._counters["rate_limited"] += 1
+                self._requests.level = min(self._requests.level, 0.0)
+            self._wake_head()
+
+    def acquire(self, tokens: int) -> _Ticket:
+        ticket = self._enqueue(tokens)
+        try:
+            while True:
+                ticket.event.clear()
+                delay = self._try_grant(ticket)
+                if delay == 0:
+                    return ticket
+                ticket.event.wait(min(delay, 1.0) if delay else 1.0)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, tokens: int) -> _Ticket:
+        ticket = self._enqueue(tokens, asyncio.get_running_loop())
+        try:
+            while True:
+                ticket.event.clear()
+                delay = self._try_grant(ticket)
+                if delay == 0:
+                    return ticket
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), min(delay, 1.0) if delay else 1.0)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    # Calls
+
+    def _count_retry(self, *_) -> None:
+        with self._lock:
+            self._counters["retries"] += 1
+
+    def _retry_wait(self, attempt_number: int) -> float:
+        return wait_random_exponential(multiplier=1, max=self.retry_max_wait)(_RetryState(attempt_number))
+
+    def _retrying(self, retrying_class):
+        return retrying_class(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=1, max=self.retry_max_wait),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=self._count_retry,
+            reraise=True,
+        )
+
+    def _failed(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+
+    def call(self, fn: Callable[[], ChatResult], tokens: int) -> ChatResult:
+        if _governed.get():
+            return fn()
+        try:
+            for attempt in self._retrying(Retrying):
+                with attempt:
+                    ticket = self.acquire(tokens)
+                    marker = _governed.set(True)
+                    result, error = None, None
+                    try:
+                        result = fn()
+                        return result
+                    except Exception as e:
+                        error = e
+                        raise
+                    finally:
+                        _governed.reset(marker)
+                        self._release(ticket, result_tokens(result), error)
+        except Exception:
+            self._failed()
+            raise
+
+    async def acall(self, fn: Callable[[], Any], tokens: int) -> ChatResult:
+        if _governed.get():
+            return await fn()
+        try:
+            async for attempt in self._retrying(AsyncRetrying):
+                with attempt:
+                    ticket = await self.aacquire(tokens)
+                    marker = _governed.set(True)
+                    result, error = None, None
+                    try:
+                        result = await fn()
+                        return result
+                    except Exception as e:
+                        error = e
+                        raise
+                    finally:
+                        _governed.reset(marker)
+                        self._release(ticket, result_tokens(result), error)
+        except Exception:
+            self._failed()
+            raise
+
+    def stream(self, fn: Callable[[], Iterator[ChatGenerationChunk]], tokens: int) -> Iterator[ChatGenerationChunk]:
+        """Governed stream; retried only while nothing has been yielded yet"""
+        if _governed.get():
+            yield from fn()
+            return
+        for attempt_number in itertools.count(1):
+            ticket = self.acquire(tokens)
+            used, started, error, chunks = 0, False, None, None
+            try:
+                chunks = _governed_step(fn)
+                while True:
+                    chunk = _governed_step(next, chunks, _STREAM_END)
+                    if chunk is _STREAM_END:
+                        return
+                    used += chunk_tokens(chunk)
+                    started = True
+                    yield chunk
+            except Exception as e:
+                error = e
+                if started or attempt_number >= self.max_attempts or not is_retryable(e):
+                    self._failed()
+                    raise
+            finally:
+                if chunks is not None and hasattr(chunks, "close"):
+                    chunks.close()
+                self._release(ticket, used or None, error)
+            self._count_retry()
+            time.sleep(self._retry_wait(attempt_number))
+
+    async def astream(self, fn: Callable[[], AsyncIterator[ChatGenerationChunk]],
+                      tokens: int) -> AsyncIterator[ChatGenerationChunk]:
+        """Async governed stream; retried only while nothing has been yielded yet"""
+        if _governed.get():
+            async for chunk in fn():
+                yield chunk
+            return
+        for attempt_number in itertools.count(1):
+            ticket = await self.aacquire(tokens)
+            used, started, error, chunks = 0, False, None, None
+            try:
+                chunks = _governed_step(fn)
+                while True:
+                    chunk = await _agoverned_step(_anext_or_end, chunks)
+                    if chunk is _STREAM_END:
+                        return
+                    used += chunk_tokens(chunk)
+                    started = True
+                    yield chunk
+            except Exception as e:
+                error = e
+                if started or attempt_number >= self.max_attempts or not is_retryable(e):
+                    self._failed()
+                    raise
+            finally:
+                self._release(ticket, used or None, error)
+                if chunks is not None and hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+            self._count_retry()
+            await asyncio.sleep(self._retry_wait(attempt_number))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            depth = {lane: 0 for lane in LANES}
+            oldest = {lane: 0.0 for lane in LANES}
+            for ticket in self._waiting:
+                depth[ticket.lane] += 1
+                oldest[ticket.lane] = max(oldest[ticket.lane], (now - ticket.enqueued) * 1000)
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "interactive_reserve": self.interactive_reserve,
+                "queue_depth": sum(depth.values()),
+                "requests_available": None if self._requests.unlimited else round(self._requests.level, 2),
+                "tokens_available": None if self._tokens.unlimited else round(self._tokens.level),
+                "lanes": {
+                    lane: {
+                        "queued": depth[lane],
+                        "oldest_wait_ms": round(oldest[lane], 2),
+                        "granted": stats["granted"],
+                        "avg_wait_ms": round(stats["wait_ms"] / stats["granted"], 2) if stats["granted"] else 0.0,
+                        "max_wait_ms": round(stats["max_wait_ms"], 2),
+                    }
+                    for lane, stats in self._stats.items()
+                },
+            }
+
+
+class _RetryState:
+    """Minimal stand-in for tenacity's RetryCallState, enough for its wait strategies"""
+
+    def __init__(self, attempt_number: int):
+        self.attempt_number = attempt_number
+
+
+def result_tokens(result: Optional[ChatResult]) -> Optional[int]:
+    """Total tokens reported for a completed call, None when the provider reported none"""
+    if result is None:
+        return None
+    total = 0
+    for generation in result.generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            total += usage.get("total_tokens", 0)
+    return total or None
+
+
+def chunk_tokens(chunk: ChatGenerationChunk) -> int:
+    usage = getattr(chunk.message, "usage_metadata", None)
+    return usage.get("total_tokens", 0) if usage else 0
+
+
+llm_gateway = LLMGateway()
+
+
+def governed_chat_model(**kwargs):
+    """Gemini chat model admitted through the shared LLM gateway"""
+    # Imported here: langchain_google_genai is slow to import and nothing needs it before the first model
+    from .governed_gemini import GovernedChatGoogleGenerativeAI
+    kwargs.setdefault("max_retries", 1)
+    return GovernedChatGoogleGenerativeAI(**kwargs)
@@ -0,0 +1,252 @@
+from typing import Hashable, List, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+from sqlalchemy import create_engine, event, select, delete, insert, Float, Index, Integer, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+from models import Job, Resume, JobStatus
+from .batch_scorer import BatchScorer, experience_text
+
+MATCH_SCORES_PATH = os.getenv("MATCH_SCORES_PATH", "match_scores.db")
+# Bumped when the table layout changes; a table with another version is rebuilt
+SCHEMA_VERSION = 2
+
+# Rows per DELETE ... IN (...) statement, below SQLite's variable limit
+DELETE_CHUNK = 500
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class MatchScoreRow(Base):
+    __tablename__ = "match_scores"
+    __table_args__ = (
+        Index("ix_match_scores_rank", "job_id", "rank_score", "resume_id"),
+        Index("ix_match_scores_resume", "resume_id"),
+    )
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    resume_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    score: Mapped[float] = mapped_column(Float)
+    rank_score: Mapped[float] = mapped_column(Float)  # percent rounded to 1 decimal, as shown to users
+
+
+class ScoredJobRow(Base):
+    """Jobs present in the table with a fingerprint of the text they were scored on"""
+    __tablename__ = "scored_jobs"
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String)
+
+
+class ScoredResumeRow(Base):
+    """Resumes present in the table with a fingerprint of the content they were scored on"""
+    __tablename__ = "scored_resumes"
+
+    resume_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String)
+
+
+def job_fingerprint(job: Job) -> str:
+    """Hash of the job fields that feed the match score"""
+    return hashlib.sha256(f"{job.title}\n{job.description}".encode('utf-8')).hexdigest()
+
+
+def resume_fingerprint(resume: Resume) -> str:
+    """Hash of the resume fields that feed the match score"""
+    content = [resume.skills, [experience_text(exp) for exp in resume.work_experience], bool(resume.education)]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _rank_score(score: float) -> float:
+    return round(float(score) * 100, 1)
+
+
+class MatchScoreTable:
+    """Materialized match scores of every open job against every candidate.
+
+    Rows are keyed by (job_id, resume_id) and indexed by (job_id, rank_score,
+    resume_id), so the top candidates of a job are a range scan in the same
+    order as ``BatchScorer.top_k``. ``sync`` applies only what changed since the
+    last call: new resumes are scored against the open jobs, deleted resumes
+    are dropped, and new, edited or reopened jobs are scored against all
+    candidates. Closed and paused jobs are not materialized.
+
+    Every scored resume and job is stored with a fingerprint of its content, so
+    a resume whose id now holds different content (compaction, a migration, a
+    switched storage backend, a reused id) is rescored. Fingerprinting every
+    resume is only needed once per process and after a new resume epoch; within
+    an epoch stored resumes cannot change and only new ones are checked.
+    """
+
+    def __init__(self, database_path: str = MATCH_SCORES_PATH):
+        self.database_path = database_path
+        self.engine = create_engine(f"sqlite:///{database_path}")
+        event.listen(self.engine, "connect", self._configure_connection)
+        self.Session = sessionmaker(self.engine, expire_on_commit=False)
+        self._lock = threading.RLock()
+        self._ready = False
+        self._verified_epoch: Optional[Hashable] = None
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    def _ensure_schema(self) -> None:
+        if not self._ready:
+            with self.engine.begin() as connection:
+                if connection.exec_driver_sql("PRAGMA user_version").scalar() != SCHEMA_VERSION:
+                    # Derived data only: an older layout is dropped and recomputed on the next sync
+                    Base.metadata.drop_all(connection)
+                    connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                Base.metadata.create_all(connection)
+            self._verified_epoch = None
+            self._ready = True
+
+    @staticmethod
+    def materialized_jobs(jobs: List[Job]) -> Dict[int, Job]:
+        return {job.jobId: job for job in jobs if job.status == JobStatus.OPEN}
+
+    # Maintenance --------------------------------------------------------
+
+    @staticmethod
+    def _delete_in(session, column, values: List[int]) -> None:
+        for start in range(0, len(values), DELETE_CHUNK):
+            chunk = values[start:start + DELETE_CHUNK]
+            session.execute(delete(column.class_).where(column.in_(chunk)))
+
+    @staticmethod
+    def _insert_scores(session, job_id: int, resume_ids: List[int], scores) -> None:
+        if resume_ids:
+            session.execute(insert(MatchScoreRow), [
+                {"job_id": job_id, "resume_id": resume_id, "score": float(score), "rank_score": _rank_score(score)}
+                for resume_id, score in zip(resume_ids, scores)
+            ])
+
+    def sync(self, jobs: List[Job], resumes: List[Resume], scorer: BatchScorer,
+             epoch: Optional[Hashable] = None) -> Dict[str, int]:
+        """Apply resume and job changes incrementally; ``scorer`` must be synced to ``resumes``.
+
+        ``epoch`` identifies the resume epoch of ``resumes`` (see CachedJsonRepository);
+        while it stays the same only resumes not yet in the table are fingerprinted.
+        Without it every resume is checked.
+        """
+        with self._lock, self.Session.begin() as session:
+            self._ensure_schema()
+            stored_jobs = dict(session.execute(select(ScoredJobRow.job_id, ScoredJobRow.fingerprint)).all())
+            stored_resumes = dict(session.execute(select(ScoredResumeRow.resume_id, ScoredResumeRow.fingerprint)).all())
+            open_jobs = self.materialized_jobs(jobs)
+
+            # Resumes whose id is gone or now holds different content are dropped (and rescored below)
+            check_all = epoch is None or epoch != self._verified_epoch
+            fingerprints: Dict[int, str] = {}
+            for resume in resumes:
+                if check_all or resume.resume_id not in stored_resumes:
+                    fingerprints[resume.resume_id] = resume_fingerprint(resume)
+            current_ids = {resume.resume_id for resume in resumes}
+            changed_ids = [resume_id for resume_id, fingerprint in fingerprints.items()
+                           if resume_id in stored_resumes and stored_resumes[resume_id] != fingerprint]
+            removed_ids = sorted(set(stored_resumes) - current_ids) + sorted(changed_ids)
+            self._delete_in(session, MatchScoreRow.resume_id, removed_ids)
+            self._delete_in(session, ScoredResumeRow.resume_id, removed_ids)
+            for resume_id in removed_ids:
+                stored_resumes.pop(resume_id, None)
+
+            stale_jobs = sorted(job_id for job_id, fingerprint in stored_jobs.items()
+                                if job_id not in open_jobs or job_fingerprint(open_jobs[job_id]) != fingerprint)
+            self._delete_in(session, MatchScoreRow.job_id, stale_jobs)
+            self._delete_in(session, ScoredJobRow.job_id, stale_jobs)
+
+            new_positions = [position for position, resume in enumerate(resumes)
+                             if resume.resume_id not in stored_resumes]
+            new_ids = [resumes[position].resume_id for position in new_positions]
+            all_ids = [resume.resume_id for resume in resumes]
+            rescored_jobs = 0
+            for job_id, job in open_jobs.items():
+                if job_id in stored_jobs and job_id not in stale_jobs:
+                    # Unchanged job: only the new candidates need a score
+                    if new_positions:
+                        self._insert_scores(session, job_id, new_ids, scorer.score_positions(job, new_positions))
+                else:
+                    self._insert_scores(session, job_id, all_ids, scorer.score_all(job))
+                    session.add(ScoredJobRow(job_id=job_id, fingerprint=job_fingerprint(job)))
+                    rescored_jobs += 1
+            if new_ids:
+                session.execute(insert(ScoredResumeRow), [
+                    {"resume_id": resume_id, "fingerprint": fingerprints[resume_id]} for resume_id in new_ids
+                ])
+            self._verified_epoch = epoch
+
+        return {
+            "resumes_added": len(new_ids) - len(changed_ids),
+            "resumes_changed": len(changed_ids),
+            "resumes_removed": len(removed_ids) - len(changed_ids),
+            "jobs_scored": rescored_jobs,
+            "jobs_removed": len([job_id for job_id in stale_jobs if job_id not in open_jobs]),
+        }
+
+    def rebuild(self, jobs: List[Job], resumes: List[Resume], scorer: BatchScorer) -> Dict[str, int]:
+        """Drop every materialized score and recompute the table"""
+        with self._lock:
+            self._ensure_schema()
+            with self.Session.begin() as session:
+                session.execute(delete(MatchScoreRow))
+                session.execute(delete(ScoredJobRow))
+                session.execute(delete(ScoredResumeRow))
+            self._verified_epoch = None
+            return self.sync(jobs, resumes, scorer)
+
+    # Reads --------------------------------------------------------------
+
+    def has_job(self, job_id: int) -> bool:
+        with self._lock, self.Session() as session:
+            self._ensure_schema()
+            return session.get(ScoredJobRow, job_id) is not None
+
+    def top_candidates(self, job_id: int, k: int) -> List[Tuple[int, float]]:
+        """(resume_id, score) of the k best candidates of a job, best first"""
+        with self._lock, self.Session() as session:
+            self._ensure_schema()
+            rows = session.execute(
+                select(MatchScoreRow.resume_id, MatchScoreRow.score)
+                .where(MatchScoreRow.job_id == job_id)
+                .order_by(MatchScoreRow.rank_score.desc(), MatchScoreRow.resume_id)
+                .limit(k)
+            )
+            return [(resume_id, score) for resume_id, score in rows]
+
+    def get_score(self, job_id: int, resume_id: int) -> Optional[float]:
+        with self._lock, self.Session() as session:
+            self._ensure_schema()
+            row = session.get(MatchScoreRow, (job_id, resume_id))
+            return row.score if row else None
+
+    # Consistency --------------------------------------------------------
+
+    def verify(self, jobs: List[Job], resumes: List[Resume], scorer: BatchScorer) -> List[str]:
+        """Compare the table with a full recompute; returns mismatch descriptions"""
+        mismatches = []
+        open_jobs = self.materialized_jobs(jobs)
+        with self._lock, self.Session() as session:
+            self._ensure_schema()
+            stored_jobs = set(session.scalars(select(ScoredJobRow.job_id)))
+            for job_id in sorted(stored_jobs ^ set(open_jobs)):
+                mismatches.append(f"job {job_id}: {'stale' if job_id in stored_jobs else 'missing'} in table")
+            for job_id in sorted(stored_jobs & set(open_jobs)):
+                stored = dict(session.execute(
+                    select(MatchScoreRow.resume_id, MatchScoreRow.score).where(MatchScoreRow.job_id == job_id)
+                ).all())
+                expected = scorer.score_all(open_jobs[job_id])
+                for resume, score in zip(resumes, expected):
+                    actual = stored.pop(resume.resume_id, None)
+                    if actual is None or abs(actual - float(score)) > 1e-9:
+                        mismatches.append(f"job {job_id} / resume {resume.resume_id}: {float(score)} != {actual}")
+                for resume_id in stored:
+                    mismatches.append(f"job {job_id} / resume {resume_id}: deleted resume still scored")
+        return mismatches
@@ -0,0 +1,138 @@
+from typing import List, Dict, Any, Optional, Tuple, Type
+import json
+import os
+import threading
+
+from pydantic import BaseModel
+from models import Job, Resume
+from .resume_store import ResumeStore, resume_store
+
+
+class CachedJsonRepository:
+    """Keeps a JSON array file deserialized in memory.
+
+    The file is only re-read when its mtime or size changes. Every reload bumps
+    ``version`` so that derived caches can tell when they are stale. ``epoch``
+    is bumped only when previously loaded records may have changed, so caches
+    that can extend themselves with appended records only rebuild on a new epoch.
+    """
+
+    def __init__(self, file_path: str, model: Type[BaseModel]):
+        self.file_path = file_path
+        self.model = model
+        self.version = 0
+        self.epoch = 0
+        self._lock = threading.RLock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._records: List[Dict[str, Any]] = []
+        self._models: Optional[List[BaseModel]] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of the backing file, or None if it is missing"""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_records(self) -> List[Dict[str, Any]]:
+        """Read the raw records from disk"""
+        if not os.path.exists(self.file_path):
+            return []
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return []
+        if not isinstance(data, list):
+            data = [data]
+        return data
+
+    def refresh(self) -> int:
+        """Reload the file if it changed on disk and return the current version"""
+        with self._lock:
+            signature = self._stat_signature()
+            if not self._loaded or signature != self._signature:
+                self._records = self._read_records()
+                self._models = None
+                self._signature = signature
+                self._loaded = True
+                self.version += 1
+                self.epoch += 1
+            return self.version
+
+    def invalidate(self) -> None:
+        """Force the next access to re-read the file"""
+        with self._lock:
+            self._loaded = False
+
+    def load_records(self) -> List[Dict[str, Any]]:
+        """Return the raw records (shared, treat as read-only)"""
+        with self._lock:
+            self.refresh()
+            return list(self._records)
+
+    def load_models(self) -> List[BaseModel]:
+        """Return the records deserialized into ``model`` instances"""
+        with self._lock:
+            self.refresh()
+            if self._models is None:
+                self._models = [self.model(**record) for record in self._records]
+            return list(self._models)
+
+
+class CachedJsonlRepository(CachedJsonRepository):
+    """Cached view over an append-only ResumeStore.
+
+    When the file has only grown, just the appended lines are read and
+    deserialized; tombstones or a compaction trigger a full reload.
+    """
+
+    def __init__(self, store: ResumeStore, model: Type[BaseModel]):
+        super().__init__(store.file_path, model)
+        self.store = store
+        self._offset = 0
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> int:
+        with self._lock:
+            self.store.ensure_ready()
+            signature = self._stat_signature()
+            if self._loaded and signature == self._signature:
+                return self.version
+
+            appended = (
+                self._loaded and self._signature is not None and signature is not None
+                and signature[0] == self._signature[0] and signature[2] >= self._signature[2]
+            )
+            if appended:
+                records, deleted, offset = self.store.read_from(self._offset)
+                if deleted:
+                    appended = False
+                else:
+                    self._records.extend(records)
+                    if self._models is not None:
+                        self._models.extend(self.model(**record) for record in records)
+            if not appended:
+                records, deleted, offset = self.store.read_from(0)
+                self._records = records
+                self._models = None
+                self.epoch += 1
+
+            self._offset = offset
+            self._signature = signature
+            self._loaded = True
+            self.version += 1
+            return self.version
+
+
+# Shared repositories used by the services and routes
+resume_repository = CachedJsonlRepository(resume_store, Resume)
+job_repository = CachedJsonRepository("job_des.json", Job)
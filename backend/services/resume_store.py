@@ -0,0 +1,401 @@
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+# When to fsync the data file: "always" (every append), "batch" (every
+# RESUME_STORE_FSYNC_BATCH appends) or "never" (leave it to the OS)
+FSYNC_POLICY = os.getenv("RESUME_STORE_FSYNC", "always").lower()
+FSYNC_BATCH_SIZE = int(os.getenv("RESUME_STORE_FSYNC_BATCH", "32"))
+
+# Sidecar index entry: resume_id (negative for tombstones), byte offset of the line
+INDEX_ENTRY = struct.Struct("<qQ")
+
+
+class ResumeStore:
+    """Append-only JSON Lines store for parsed resumes.
+
+    Every resume is written as a single line, so an upload costs one append
+    regardless of how many resumes are stored. A sidecar ``.idx`` file maps
+    resume ids to byte offsets, deletions are recorded as tombstone lines and
+    ``compact()`` rewrites the file without them.
+    """
+
+    def __init__(self, file_path: str = "parsed_resumes.jsonl",
+                 legacy_path: Optional[str] = "parsed_resumes.json",
+                 fsync_policy: str = FSYNC_POLICY):
+        if fsync_policy not in ("always", "batch", "never"):
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.file_path = file_path
+        self.index_path = file_path + ".idx"
+        self.legacy_path = legacy_path
+        self.fsync_policy = fsync_policy
+        self._lock = threading.RLock()
+        self._ready = False
+        self._offsets: Dict[int, int] = {}
+        self._next_id = 1
+        self._end_offset = 0
+        self._unsynced = 0
+
+    # ------------------------------------------------------------------
+    # Opening, migration and index maintenance
+    # ------------------------------------------------------------------
+
+    def ensure_ready(self) -> None:
+        """Migrate the legacy JSON file if needed and load the offset index"""
+        with self._lock:
+            if self._ready:
+                return
+            if not os.path.exists(self.file_path):
+                self.migrate_legacy()
+            if not os.path.exists(self.file_path):
+                open(self.file_path, 'ab').close()
+            self._load_index()
+            self._ready = True
+
+    def migrate_legacy(self) -> int:
+        """One-time conversion of the legacy JSON array file into JSON Lines.
+
+        The legacy file is renamed to ``<name>.migrated`` afterwards. Returns
+        the number of migrated records.
+        """
+        with self._lock:
+            if os.path.exists(self.file_path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+                return 0
+            try:
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except json.JSONDecodeError:
+                records = []
+            if not isinstance(records, list):
+                records = [records]
+
+            tmp_path = self.file_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                for resume_id, record in enumerate(records, 1):
+                    record = dict(record)
+                    record.setdefault("resume_id", resume_id)
+                    f.write(self._encode(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            os.replace(self.legacy_path, self.legacy_path + ".migrated")
+            self._remove_index()
+            return len(records)
+
+    def _remove_index(self) -> None:
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def _load_index(self) -> None:
+        """Load the sidecar index, rebuilding it if it is missing or stale"""
+        entries = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            entries = [INDEX_ENTRY.unpack_from(data, pos) for pos in range(0, usable, INDEX_ENTRY.size)]
+
+        if entries and not self._entry_matches(*entries[-1]):
+            entries = []
+            self._remove_index()
+
+        self._offsets = {}
+        self._next_id = 1
+        self._end_offset = 0
+        for resume_id, offset in entries:
+            self._apply_entry(resume_id, offset)
+        if entries:
+            self._end_offset = self._line_end(entries[-1][1])
+        else:
+            self._remove_index()
+        self._catch_up()
+
+    def _entry_matches(self, resume_id: int, offset: int) -> bool:
+        """Check that an index entry still points at the expected line"""
+        line = self._read_line(offset)
+        if line is None or not line.endswith(b"\n"):
+            return False
+        record = self._decode(line)
+        return record is not None and self._entry_id(record) == resume_id
+
+    def _line_end(self, offset: int) -> int:
+        line = self._read_line(offset)
+        return offset + len(line) if line else offset
+
+    def _read_line(self, offset: int) -> Optional[bytes]:
+        try:
+            with open(self.file_path, 'rb') as f:
+                f.seek(offset)
+                return f.readline()
+        except FileNotFoundError:
+            return None
+
+    def _apply_entry(self, resume_id: int, offset: int) -> None:
+        if resume_id < 0:
+            self._offsets.pop(-resume_id, None)
+        else:
+            self._offsets[resume_id] = offset
+        self._next_id = max(self._next_id, abs(resume_id) + 1)
+
+    def _catch_up(self) -> None:
+        """Index any complete lines written past the known end of the file.
+
+        This covers a missing index as well as appends made by other processes.
+        """
+        new_entries = []
+        with open(self.file_path, 'rb') as f:
+            f.seek(self._end_offset)
+            offset = self._end_offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write, ignored until the next append pads it
+                record = self._decode(line)
+                if record is not None:
+                    entry = (self._entry_id(record), offset)
+                    self._apply_entry(*entry)
+                    new_entries.append(entry)
+                offset += len(line)
+            self._end_offset = offset
+        if new_entries:
+            self._append_index(new_entries)
+
+    def _append_index(self, entries: List[Tuple[int, int]]) -> None:
+        with open(self.index_path, 'ab') as f:
+            f.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+
+    def rebuild_index(self) -> int:
+        """Rebuild the sidecar index from the data file"""
+        with self._lock, self._file_lock():
+            self._remove_index()
+            self._offsets = {}
+            self._next_id = 1
+            self._end_offset = 0
+            self._catch_up()
+            self._ready = True
+            return len(self._offsets)
+
+    # ------------------------------------------------------------------
+    # Encoding helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode('utf-8')
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            record = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(record, dict) or not isinstance(record.get("resume_id"), int):
+            return None
+        return record
+
+    @staticmethod
+    def _entry_id(record: Dict[str, Any]) -> int:
+        return -record["resume_id"] if record.get("_deleted") else record["resume_id"]
+
+    def _file_lock(self):
+        return _FileLock(self.file_path if fcntl else None)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _write_lines(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Assign ids to the payloads and append them in a single write"""
+        self.ensure_ready()
+        with self._lock, self._file_lock():
+            self._catch_up()
+
+            size = os.path.getsize(self.file_path)
+            prefix = b"\n" if size > self._end_offset else b""  # pad a torn trailing line
+
+            chunks = []
+            entries = []
+            offset = size + len(prefix)
+            for payload in payloads:
+                if "resume_id" not in payload:
+                    payload["resume_id"] = self._next_id
+                    self._next_id += 1
+                line = self._encode(payload)
+                entries.append((self._entry_id(payload), offset))
+                chunks.append(line)
+                offset += len(line)
+
+            fd = os.open(self.file_path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+            try:
+                os.write(fd, prefix + b"".join(chunks))
+                self._unsynced += len(payloads)
+                if self.fsync_policy == "always" or (
+                        self.fsync_policy == "batch" and self._unsynced >= FSYNC_BATCH_SIZE):
+                    os.fsync(fd)
+                    self._unsynced = 0
+            finally:
+                os.close(fd)
+
+            for entry in entries:
+                self._apply_entry(*entry)
+            self._append_index(entries)
+            self._end_offset = offset
+            return payloads
+
+    def append(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Append one resume record and return it with its assigned ``resume_id``"""
+        return self._write_lines([dict(record)])[0]
+
+    def append_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append several resume records with a single write"""
+        if not records:
+            return []
+        return self._write_lines([dict(record) for record in records])
+
+    def delete(self, resume_id: int) -> bool:
+        """Record a tombstone for a resume. Returns False if it does not exist"""
+        self.ensure_ready()
+        with self._lock:
+            self._catch_up()
+            if resume_id not in self._offsets:
+                return False
+            self._write_lines([{"resume_id": resume_id, "_deleted": True}])
+            return True
+
+    def sync(self) -> None:
+        """Flush pending appends to disk (used with the "batch" fsync policy)"""
+        with self._lock:
+            if self._unsynced and os.path.exists(self.file_path):
+                fd = os.open(self.file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            self._unsynced = 0
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the data file keeping only live records, then rebuild the index"""
+        self.ensure_ready()
+        with self._lock, self._file_lock():
+            self._catch_up()
+            before = os.path.getsize(self.file_path)
+            records = self._read_live()
+
+            # Ids are never reused: when the highest issued id belongs to a deleted
+            # resume, its tombstone is kept so the next id survives a reopen
+            last_id = self.last_id()
+            if last_id and last_id not in self._offsets:
+                records.append({"resume_id": last_id, "_deleted": True})
+
+            tmp_path = self.file_path + ".tmp"
+            entries = []
+            offset = 0
+            with open(tmp_path, 'wb') as f:
+                for record in records:
+                    line = self._encode(record)
+                    f.write(line)
+                    entries.append((self._entry_id(record), offset))
+                    offset += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+
+            self._remove_index()
+            self._append_index(entries)
+            self._offsets = {}
+            for entry in entries:
+                self._apply_entry(*entry)
+            self._end_offset = offset
+            self._unsynced = 0
+            return {"records": len(self._offsets), "bytes_before": before, "bytes_after": offset}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _read_live(self) -> List[Dict[str, Any]]:
+        records, deleted, _ = self.read_from(0)
+        return [record for record in records if record["resume_id"] not in deleted]
+
+    def read_from(self, offset: int) -> Tuple[List[Dict[str, Any]], set, int]:
+        """Read complete lines starting at a byte offset.
+
+        Returns the records, the ids deleted by tombstones in that range and the
+        offset just past the last complete line, so callers can tail the file.
+        """
+        self.ensure_ready()
+        records = []
+        deleted = set()
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                record = self._decode(line)
+                if record is None:
+                    continue
+                if record.get("_deleted"):
+                    deleted.add(record["resume_id"])
+                    records = [r for r in records if r["resume_id"] != record["resume_id"]]
+                else:
+                    records.append(record)
+        return records, deleted, offset
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Return every live resume record in insertion order"""
+        return self._read_live()
+
+    def get(self, resume_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single resume by id using the offset index"""
+        self.ensure_ready()
+        with self._lock:
+            self._catch_up()
+            offset = self._offsets.get(resume_id)
+        if offset is None:
+            return None
+        line = self._read_line(offset)
+        return self._decode(line) if line else None
+
+    def last_id(self) -> int:
+        """Highest resume id issued so far, including deleted resumes (0 when empty)"""
+        self.ensure_ready()
+        with self._lock:
+            self._catch_up()
+            return self._next_id - 1
+
+    def __len__(self) -> int:
+        self.ensure_ready()
+        with self._lock:
+            self._catch_up()
+            return len(self._offsets)
+
+
+class _FileLock:
+    """Advisory cross-process lock on the data file (no-op without fcntl)"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if self.path:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+# Shared store used by the upload route and the resume repository
+resume_store = ResumeStore()
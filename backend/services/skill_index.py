@@ -0,0 +1,178 @@
+from typing import List, Dict, Tuple, Optional, Callable, Set
+import copy
+import threading
+
+from models import Job, Resume
+
+# Candidate skills are bucketed by their first PREFIX_LENGTH characters so a job
+# text only has to be checked against skills whose prefix occurs in it
+PREFIX_LENGTH = 3
+
+
+class SkillIndex:
+    """Inverted index from normalized (lower-cased) skill to candidate postings.
+
+    Matching keeps the semantics of ``calculate_skill_match_score``: a skill
+    matches when its lower-cased form is a substring of the lower-cased job
+    text. Instead of scanning every skill of every candidate, the job text is
+    broken into its short prefixes once, only the distinct skills sharing one of
+    those prefixes are checked, and their postings are merged per candidate.
+
+    Candidates are addressed by their position in the resume list the index was
+    built from. Within an epoch the containers are only appended to, and a new
+    epoch replaces them, so ``snapshot`` can hand out a read-only copy that
+    keeps seeing exactly the candidates indexed when it was taken.
+    """
+
+    def __init__(self):
+        self._size: Optional[int] = None  # fixed candidate count of a snapshot
+        self._lock = threading.RLock()
+        self._skills: List[List[str]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._buckets: Dict[str, Set[str]] = {}
+        self._version: Optional[Tuple[int, int]] = None
+        self._last_resume_id = None
+
+    def __len__(self) -> int:
+        return len(self._skills) if self._size is None else self._size
+
+    def _check_writable(self) -> None:
+        if self._size is not None:
+            raise RuntimeError("Index snapshots are read-only")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._skills = []
+            self._postings = {}
+            self._buckets = {}
+            self._version = None
+            self._last_resume_id = None
+
+    def add(self, resume: Resume) -> int:
+        """Index one more candidate and return its position"""
+        self._check_writable()
+        with self._lock:
+            position = len(self._skills)
+            skills = list(resume.skills)
+            self._skills.append(skills)
+            for offset, skill in enumerate(skills):
+                key = skill.lower()
+                postings = self._postings.get(key)
+                if postings is None:
+                    postings = self._postings[key] = []
+                    self._buckets.setdefault(key[:PREFIX_LENGTH], set()).add(key)
+                postings.append((position, offset))
+            self._last_resume_id = resume.resume_id
+            return position
+
+    def sync(self, resumes: List[Resume], version: Tuple[int, int]) -> None:
+        """Bring the index up to date with a resume list at a storage version.
+
+        Within one epoch the list only grows, so just the new tail is indexed;
+        a new epoch (deletes, compaction, a different file) rebuilds the index.
+        """
+        self._check_writable()
+        with self._lock:
+            if version == self._version and len(resumes) == len(self._skills):
+                return
+            extendable = (
+                self._version is not None
+                and version[0] == self._version[0]
+                and len(resumes) >= len(self._skills)
+                and (not self._skills or resumes[len(self._skills) - 1].resume_id == self._last_resume_id)
+            )
+            if not extendable:
+                self.clear()
+            for resume in resumes[len(self._skills):]:
+                self.add(resume)
+            self._version = version
+
+    def snapshot(self, resumes: List[Resume], version: Tuple[int, int]) -> "SkillIndex":
+        """Sync to a resume list and return a read-only view of the index at that list.
+
+        Positions returned by the view always refer to ``resumes``, even while
+        other threads sync the shared index to a newer list.
+        """
+        with self._lock:
+            self.sync(resumes, version)
+            self._freeze()
+            view = copy.copy(self)
+            view._size = len(self._skills)
+            return view
+
+    def _freeze(self) -> None:
+        """Hook for subclasses to finish derived state before a snapshot is copied"""
+
+    def _matched_skills(self, text_lower: str) -> List[str]:
+        """Distinct indexed skills that occur as substrings of the text"""
+        prefixes = {""}
+        for length in range(1, PREFIX_LENGTH + 1):
+            prefixes.update(text_lower[i:i + length] for i in range(len(text_lower) - length + 1))
+        matched = []
+        for prefix in prefixes:
+            for key in self._buckets.get(prefix, ()):
+                if key in text_lower:
+                    matched.append(key)
+        return matched
+
+    def match(self, job_requirements: str) -> Dict[int, Tuple[float, List[str]]]:
+        """Score every candidate against a job text.
+
+        Returns ``{position: (score, matching_skills)}`` for candidates with at
+        least one matching skill; everyone else scores ``(0.0, [])``.
+        """
+        if not job_requirements:
+            return {}
+        with self._lock:
+            size = len(self)
+            hits: Dict[int, List[int]] = {}
+            for key in self._matched_skills(job_requirements.lower()):
+                for position, offset in self._postings[key]:
+                    if position < size:
+                        hits.setdefault(position, []).append(offset)
+
+            results = {}
+            for position, offsets in hits.items():
+                skills = self._skills[position]
+                offsets.sort()
+                results[position] = (len(offsets) / len(skills), [skills[offset] for offset in offsets])
+            return results
+
+    def match_positions(self, job_requirements: str, positions: List[int]) -> Dict[int, Tuple[float, List[str]]]:
+        """Like ``match`` but only for the given candidate positions"""
+        results = {}
+        with self._lock:
+            matched = set(self._matched_skills(job_requirements.lower())) if job_requirements else set()
+            for position in positions:
+                skills = self._skills[position]
+                matching = [skill for skill in skills if skill.lower() in matched]
+                results[position] = (len(matching) / len(skills) if matching else 0.0, matching)
+        return results
+
+    def retrieve(self, job_requirements: str, limit: int) -> List[int]:
+        """Candidate generation: positions with the most matching skills (at most ``limit``)"""
+        if not job_requirements or limit <= 0:
+            return []
+        with self._lock:
+            size = len(self)
+            hit_counts: Dict[int, int] = {}
+            for key in self._matched_skills(job_requirements.lower()):
+                for position, _ in self._postings[key]:
+                    if position < size:
+                        hit_counts[position] = hit_counts.get(position, 0) + 1
+        ranked = sorted(hit_counts, key=lambda position: (-hit_counts[position], position))
+        return ranked[:limit]
+
+    def verify(self, resumes: List[Resume], jobs: List[Job],
+               reference: Callable[[List[str], str], tuple]) -> List[str]:
+        """Compare index results with a reference scorer; returns mismatch descriptions"""
+        mismatches = []
+        for job in jobs:
+            job_text = f"{job.title} {job.description}"
+            indexed = self.match(job_text)
+            for position, resume in enumerate(resumes):
+                expected = reference(resume.skills, job_text)
+                actual = indexed.get(position, (0.0, []))
+                if tuple(expected) != tuple(actual):
+                    mismatches.append(f"job {job.jobId} / resume {resume.resume_id}: {expected} != {actual}")
+        return mismatches
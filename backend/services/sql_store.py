@@ -0,0 +1,353 @@
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import os
+import threading
+
+from sqlalchemy import (
+    create_engine, event, select, func, delete,
+    ForeignKey, Index, Integer, String, Text,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+from models import Job, Resume, JobStatus, JobType, EmploymentType
+from .repository import CachedJsonRepository
+from .resume_store import ResumeStore, resume_store
+from .storage import EMAIL_LOG_FILE, normalize_enum_value
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "staffpilot.db")
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class ResumeRow(Base):
+    __tablename__ = "resumes"
+
+    resume_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    email: Mapped[Optional[str]] = mapped_column(String, index=True)
+    full_name: Mapped[Optional[str]] = mapped_column(String)
+    data: Mapped[str] = mapped_column(Text)
+
+
+class ResumeSkillRow(Base):
+    __tablename__ = "resume_skills"
+    __table_args__ = (Index("ix_resume_skills_skill_key", "skill_key", "resume_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    resume_id: Mapped[int] = mapped_column(ForeignKey("resumes.resume_id", ondelete="CASCADE"), index=True)
+    skill: Mapped[str] = mapped_column(String)
+    skill_key: Mapped[str] = mapped_column(String)
+
+
+class JobRow(Base):
+    __tablename__ = "jobs"
+
+    jobId: Mapped[int] = mapped_column(Integer, primary_key=True)
+    clientId: Mapped[int] = mapped_column(Integer)
+    title: Mapped[str] = mapped_column(String)
+    description: Mapped[str] = mapped_column(Text)
+    jobType: Mapped[str] = mapped_column(String, index=True)
+    employmentType: Mapped[str] = mapped_column(String, index=True)
+    status: Mapped[str] = mapped_column(String, index=True)
+    createdDate: Mapped[str] = mapped_column(String)
+
+
+class EmailLogRow(Base):
+    __tablename__ = "email_logs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    timestamp: Mapped[Optional[str]] = mapped_column(String)
+    recipient: Mapped[Optional[str]] = mapped_column(String, index=True)
+    data: Mapped[str] = mapped_column(Text)
+
+
+class StoreMetaRow(Base):
+    """Per-table version counters, bumped in the same transaction as writes"""
+    __tablename__ = "store_meta"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    epoch: Mapped[int] = mapped_column(Integer, default=1)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+
+
+class IdCounterRow(Base):
+    """Highest id ever issued per table, so ids of deleted rows are not handed out again"""
+    __tablename__ = "id_counters"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, default=0)
+
+
+def _job_row(job: Job) -> JobRow:
+    return JobRow(
+        jobId=job.jobId, clientId=job.clientId, title=job.title, description=job.description,
+        jobType=job.jobType.value, employmentType=job.employmentType.value,
+        status=job.status.value, createdDate=job.createdDate,
+    )
+
+
+def _job_model(row: JobRow) -> Job:
+    return Job(
+        jobId=row.jobId, clientId=row.clientId, title=row.title, description=row.description,
+        jobType=row.jobType, employmentType=row.employmentType,
+        status=row.status, createdDate=row.createdDate,
+    )
+
+
+class SqlStorage:
+    """SQLite storage for resumes, jobs and email logs.
+
+    Exposes the same interface as JsonStorage, but candidate-by-email, job-by-id,
+    status/type filters and skill lookups are index seeks. A fresh database is
+    populated from the JSON files on first use; afterwards `python manage.py
+    sql-store import` upserts edits to job_des.json.
+    """
+
+    def __init__(self, database_path: str = SQLITE_PATH,
+                 store: ResumeStore = resume_store,
+                 job_file: str = "job_des.json",
+                 email_log_file: str = EMAIL_LOG_FILE):
+        self.engine = create_engine(f"sqlite:///{database_path}")
+        event.listen(self.engine, "connect", self._configure_connection)
+        self.Session = sessionmaker(self.engine, expire_on_commit=False)
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Tuple[int, int], list]] = {}
+
+        Base.metadata.create_all(self.engine)
+        with self.Session() as session:
+            is_new = session.get(StoreMetaRow, "resumes") is None
+        if is_new:
+            self.import_from_json(store, job_file, email_log_file)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    # Versions -----------------------------------------------------------
+
+    def _version(self, name: str) -> Tuple[int, int]:
+        with self.Session() as session:
+            row = session.get(StoreMetaRow, name)
+            return (row.epoch, row.version) if row else (0, 0)
+
+    @staticmethod
+    def _bump(session, name: str, new_epoch: bool = False) -> None:
+        row = session.get(StoreMetaRow, name)
+        if row is None:
+            session.add(StoreMetaRow(name=name, epoch=1, version=1))
+            return
+        row.version += 1
+        if new_epoch:
+            row.epoch += 1
+
+    @staticmethod
+    def _id_counter(session, name: str, id_column) -> IdCounterRow:
+        """The table's id counter, seeded from its largest id in databases created before it existed"""
+        row = session.get(IdCounterRow, name)
+        if row is None:
+            row = IdCounterRow(name=name, last_id=session.scalar(select(func.max(id_column))) or 0)
+            session.add(row)
+        return row
+
+    def resume_version(self) -> Tuple[int, int]:
+        return self._version("resumes")
+
+    def job_version(self) -> Tuple[int, int]:
+        return self._version("jobs")
+
+    def _cached(self, key: str, table: str, loader) -> list:
+        """Return a full-table load, re-running ``loader`` only after a write to ``table``"""
+        version = self._version(table)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == version:
+                return list(cached[1])
+        rows = loader()
+        with self._lock:
+            self._cache[key] = (version, rows)
+        return list(rows)
+
+    # Import -------------------------------------------------------------
+
+    def is_empty(self) -> bool:
+        with self.Session() as session:
+            return not any(session.scalar(select(func.count()).select_from(table)) for table in
+                           (ResumeRow, JobRow, EmailLogRow))
+
+    def import_from_json(self, store: ResumeStore = resume_store, job_file: str = "job_des.json",
+                         email_log_file: str = EMAIL_LOG_FILE, replace: bool = False) -> Dict[str, int]:
+        """Replace the database contents with the JSON-backed data.
+
+        In sqlite mode uploads and email logs exist only in the database, so a
+        database that holds data is only cleared when ``replace`` is set.
+        """
+        if not replace and not self.is_empty():
+            raise ValueError("The database already holds data; importing would replace it (pass replace=True)")
+        resumes = store.read_all()
+        jobs = CachedJsonRepository(job_file, Job).load_models()
+        try:
+            with open(email_log_file, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            logs = []
+
+        with self.Session.begin() as session:
+            session.execute(delete(ResumeSkillRow))
+            session.execute(delete(ResumeRow))
+            session.execute(delete(JobRow))
+            session.execute(delete(EmailLogRow))
+            for record in resumes:
+                self._insert_resume(session, record)
+            counter = self._id_counter(session, "resumes", ResumeRow.resume_id)
+            counter.last_id = max([counter.last_id, store.last_id()] + [record["resume_id"] for record in resumes])
+            session.add_all(_job_row(job) for job in jobs)
+            session.add_all(self._email_log_row(entry) for entry in logs)
+            for name in ("resumes", "jobs", "email_logs"):
+                self._bump(session, name, new_epoch=True)
+        return {"resumes": len(resumes), "jobs": len(jobs), "email_logs": len(logs)}
+
+    def import_jobs(self, job_file: str = "job_des.json") -> Dict[str, int]:
+        """Upsert the jobs of job_des.json, leaving resumes and email logs alone"""
+        jobs = CachedJsonRepository(job_file, Job).load_models()
+        return {"jobs": len(jobs), "changed": self.upsert_jobs(jobs)}
+
+    # Resumes ------------------------------------------------------------
+
+    @staticmethod
+    def _insert_resume(session, record: Dict[str, Any]) -> None:
+        session.add(ResumeRow(
+            resume_id=record.get("resume_id"),
+            email=record.get("email"),
+            full_name=record.get("full_name"),
+            data=json.dumps(record, ensure_ascii=False),
+        ))
+        skills = record.get("skills") or []
+        session.add_all(
+            ResumeSkillRow(resume_id=record["resume_id"], skill=skill, skill_key=skill.strip().lower())
+            for skill in skills if isinstance(skill, str)
+        )
+
+    def load_resume_records(self) -> List[Dict[str, Any]]:
+        def loader():
+            with self.Session() as session:
+                rows = session.scalars(select(ResumeRow.data).order_by(ResumeRow.resume_id))
+                return [json.loads(data) for data in rows]
+        return self._cached("resume_records", "resumes", loader)
+
+    def load_resumes(self) -> List[Resume]:
+        return self._cached(
+            "resumes", "resumes",
+            lambda: [Resume(**record) for record in self.load_resume_records()]
+        )
+
+    def add_resumes(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        records = [dict(record) for record in records]
+        with self.Session.begin() as session:
+            counter = self._id_counter(session, "resumes", ResumeRow.resume_id)
+            for record in records:
+                if "resume_id" not in record:
+                    record["resume_id"] = counter.last_id + 1
+                counter.last_id = max(counter.last_id, record["resume_id"])
+                self._insert_resume(session, record)
+            self._bump(session, "resumes")
+        return records
+
+    def add_resume(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return self.add_resumes([record])[0]
+
+    def delete_resume(self, resume_id: int) -> bool:
+        with self.Session.begin() as session:
+            deleted = session.execute(delete(ResumeRow).where(ResumeRow.resume_id == resume_id)).rowcount
+            if deleted:
+                self._bump(session, "resumes", new_epoch=True)
+        return bool(deleted)
+
+    def find_resume_by_email(self, email: str) -> Optional[Resume]:
+        with self.Session() as session:
+            data = session.scalar(
+                select(ResumeRow.data).where(ResumeRow.email == email).order_by(ResumeRow.resume_id).limit(1)
+            )
+        return Resume(**json.loads(data)) if data else None
+
+    def find_resumes_by_skill(self, skill: str) -> List[Resume]:
+        with self.Session() as session:
+            rows = session.scalars(
+                select(ResumeRow.data)
+                .join(ResumeSkillRow, ResumeSkillRow.resume_id == ResumeRow.resume_id)
+                .where(ResumeSkillRow.skill_key == skill.strip().lower())
+                .distinct()
+                .order_by(ResumeRow.resume_id)
+            )
+            return [Resume(**json.loads(data)) for data in rows]
+
+    # Jobs ---------------------------------------------------------------
+
+    def load_jobs(self) -> List[Job]:
+        def loader():
+            with self.Session() as session:
+                return [_job_model(row) for row in session.scalars(select(JobRow).order_by(JobRow.jobId))]
+        return self._cached("jobs", "jobs", loader)
+
+    def upsert_jobs(self, jobs: List[Job]) -> int:
+        """Insert or update jobs by jobId; returns how many were new or changed"""
+        changed = 0
+        with self.Session.begin() as session:
+            for job in jobs:
+                row = session.get(JobRow, job.jobId)
+                if row is not None and _job_model(row) == job:
+                    continue
+                session.merge(_job_row(job))
+                changed += 1
+            if changed:
+                self._bump(session, "jobs", new_epoch=True)
+        return changed
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        with self.Session() as session:
+            row = session.get(JobRow, job_id)
+            return _job_model(row) if row else None
+
+    def jobs_by_status(self, status: Optional[str] = None) -> List[Job]:
+        if not status:
+            return self.load_jobs()
+        with self.Session() as session:
+            rows = session.scalars(
+                select(JobRow).where(JobRow.status == normalize_enum_value(JobStatus, status)).order_by(JobRow.jobId)
+            )
+            return [_job_model(row) for row in rows]
+
+    def search_jobs(self, title: Optional[str] = None, job_type: Optional[str] = None,
+                    employment_type: Optional[str] = None) -> List[Job]:
+        query = select(JobRow).order_by(JobRow.jobId)
+        if job_type:
+            query = query.where(JobRow.jobType == normalize_enum_value(JobType, job_type))
+        if employment_type:
+            query = query.where(JobRow.employmentType == normalize_enum_value(EmploymentType, employment_type))
+        with self.Session() as session:
+            jobs = [_job_model(row) for row in session.scalars(query)]
+        if title:
+            jobs = [job for job in jobs if title.lower() in job.title.lower()]
+        return jobs
+
+    # Email logs ---------------------------------------------------------
+
+    @staticmethod
+    def _email_log_row(entry: Dict[str, Any]) -> EmailLogRow:
+        return EmailLogRow(
+            timestamp=entry.get("timestamp"),
+            recipient=entry.get("recipient") or entry.get("candidate_email"),
+            data=json.dumps(entry, ensure_ascii=False),
+        )
+
+    def load_email_logs(self) -> Optional[List[Dict[str, Any]]]:
+        with self.Session() as session:
+            return [json.loads(data) for data in session.scalars(select(EmailLogRow.data).order_by(EmailLogRow.id))]
+
+    def append_email_log(self, entry: Dict[str, Any]) -> None:
+        with self.Session.begin() as session:
+            session.add(self._email_log_row(entry))
+            self._bump(session, "email_logs")
@@ -0,0 +1,161 @@
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import os
+import threading
+
+from models import Job, Resume, JobStatus
+from .repository import CachedJsonRepository, job_repository, resume_repository
+from .resume_store import ResumeStore, resume_store
+
+# Storage backend used by the services: "json" (default) or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()
+EMAIL_LOG_FILE = "email_logs.json"
+
+
+def normalize_enum_value(enum_cls, value: Optional[str]) -> Optional[str]:
+    """Map a case-insensitive filter value onto the enum's stored value"""
+    if value is None:
+        return None
+    return next((member.value for member in enum_cls if member.value.lower() == value.lower()), "")
+
+
+class JsonStorage:
+    """Storage backed by the JSONL resume store and the JSON job/email files.
+
+    Lookups by email, job id and status use dictionaries that are rebuilt only
+    when the underlying repository version changes.
+    """
+
+    def __init__(self, resumes: CachedJsonRepository = resume_repository,
+                 jobs: CachedJsonRepository = job_repository,
+                 store: ResumeStore = resume_store,
+                 email_log_file: str = EMAIL_LOG_FILE):
+        self.resumes = resumes
+        self.jobs = jobs
+        self.store = store
+        self.email_log_file = email_log_file
+        self._lock = threading.Lock()
+        self._email_index: Tuple[int, Dict[str, Resume]] = (-1, {})
+        self._job_index: Tuple[int, Dict[int, Job], Dict[str, List[Job]]] = (-1, {}, {})
+
+    # Versions -----------------------------------------------------------
+
+    def resume_version(self) -> Tuple[int, int]:
+        """(epoch, version) of the resume data; see CachedJsonRepository"""
+        self.resumes.refresh()
+        return self.resumes.epoch, self.resumes.version
+
+    def job_version(self) -> Tuple[int, int]:
+        """(epoch, version) of the job data"""
+        self.jobs.refresh()
+        return self.jobs.epoch, self.jobs.version
+
+    # Resumes ------------------------------------------------------------
+
+    def load_resumes(self) -> List[Resume]:
+        return self.resumes.load_models()
+
+    def load_resume_records(self) -> List[Dict[str, Any]]:
+        return self.resumes.load_records()
+
+    def add_resume(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return self.store.append(record)
+
+    def add_resumes(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.store.append_many(records)
+
+    def delete_resume(self, resume_id: int) -> bool:
+        return self.store.delete(resume_id)
+
+    def find_resume_by_email(self, email: str) -> Optional[Resume]:
+        with self._lock:
+            resumes = self.resumes.load_models()
+            version = self.resumes.version
+            if self._email_index[0] != version:
+                index = {}
+                for resume in resumes:
+                    if resume.email is not None:
+                        index.setdefault(resume.email, resume)  # first match wins, as before
+                self._email_index = (version, index)
+            return self._email_index[1].get(email)
+
+    def find_resumes_by_skill(self, skill: str) -> List[Resume]:
+        skill_key = skill.strip().lower()
+        return [resume for resume in self.load_resumes()
+                if any(s.strip().lower() == skill_key for s in resume.skills)]
+
+    # Jobs ---------------------------------------------------------------
+
+    def load_jobs(self) -> List[Job]:
+        return self.jobs.load_models()
+
+    def _job_indexes(self) -> Tuple[Dict[int, Job], Dict[str, List[Job]]]:
+        with self._lock:
+            jobs = self.jobs.load_models()
+            version = self.jobs.version
+            if self._job_index[0] != version:
+                by_id = {}
+                by_status = {}
+                for job in jobs:
+                    by_id.setdefault(job.jobId, job)
+                    by_status.setdefault(job.status.value, []).append(job)
+                self._job_index = (version, by_id, by_status)
+            return self._job_index[1], self._job_index[2]
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        return self._job_indexes()[0].get(job_id)
+
+    def jobs_by_status(self, status: Optional[str] = None) -> List[Job]:
+        if not status:
+            return self.load_jobs()
+        return list(self._job_indexes()[1].get(normalize_enum_value(JobStatus, status), []))
+
+    def search_jobs(self, title: Optional[str] = None, job_type: Optional[str] = None,
+                    employment_type: Optional[str] = None) -> List[Job]:
+        jobs = self.load_jobs()
+        if title:
+            jobs = [job for job in jobs if title.lower() in job.title.lower()]
+        if job_type:
+            jobs = [job for job in jobs if job.jobType.value.lower() == job_type.lower()]
+        if employment_type:
+            jobs = [job for job in jobs if job.employmentType.value.lower() == employment_type.lower()]
+        return jobs
+
+    # Email logs ---------------------------------------------------------
+
+    def load_email_logs(self) -> Optional[List[Dict[str, Any]]]:
+        """Return the email log, or None if nothing has been logged yet"""
+        if not os.path.exists(self.email_log_file):
+            return None
+        with open(self.email_log_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def append_email_log(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                with open(self.email_log_file, 'r', encoding='utf-8') as f:
+                    logs = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                logs = []
+            logs.append(entry)
+            with open(self.email_log_file, 'w', encoding='utf-8') as f:
+                json.dump(logs, f, indent=2, ensure_ascii=False)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "sqlite":
+                from .sql_store import SqlStorage
+                _storage = SqlStorage()
+            elif STORAGE_BACKEND == "json":
+                _storage = JsonStorage()
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        return _storage
@@ -0,0 +1,31 @@
+from typing import List
+
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain_core.messages import BaseMessage, get_buffer_string
+
+from utils.tokens import count_tokens
+
+
+def _messages_tokens(messages: List[BaseMessage]) -> int:
+    return count_tokens(get_buffer_string(messages))
+
+
+class SummaryBufferMemory(ConversationSummaryBufferMemory):
+    """Summary buffer memory that sizes its buffer locally instead of asking the model to count tokens"""
+
+    def _pruned_messages(self) -> List[BaseMessage]:
+        buffer = self.chat_memory.messages
+        pruned = []
+        while buffer and _messages_tokens(buffer) > self.max_token_limit:
+            pruned.append(buffer.pop(0))
+        return pruned
+
+    def prune(self) -> None:
+        pruned = self._pruned_messages()
+        if pruned:
+            self.moving_summary_buffer = self.predict_new_summary(pruned, self.moving_summary_buffer)
+
+    async def aprune(self) -> None:
+        pruned = self._pruned_messages()
+        if pruned:
+            self.moving_summary_buffer = await self.apredict_new_summary(pruned, self.moving_summary_buffer)
@@ -0,0 +1,99 @@
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import threading
+
+CONTENT_HASH_FIELD = "content_sha256"
+TEXT_HASH_FIELD = "text_sha256"
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of the uploaded file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of the extracted text, ignoring case and whitespace differences"""
+    return hashlib.sha256(" ".join(text.lower().split()).encode('utf-8')).hexdigest()
+
+
+class UploadDedupIndex:
+    """Finds stored parses of previously uploaded resumes.
+
+    Stored records carry the SHA-256 of the uploaded bytes and of the
+    normalized extracted text. The lookup dictionaries are derived from the
+    storage records: uploads are added as they are stored, records appended by
+    other writers are indexed from the tail of the record list, and only a new
+    resume epoch (deletes, compaction, another backend) rescans every record.
+    When the same content was stored more than once the latest record wins.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._version = None
+        self._indexed = 0  # storage records covered by the dictionaries
+        self._last_resume_id = None
+        self._by_content: Dict[str, Dict[str, Any]] = {}
+        self._by_text: Dict[str, Dict[str, Any]] = {}
+        self._counters = {"content_hits": 0, "text_hits": 0, "llm_calls_saved": 0, "extractions_saved": 0}
+
+    def _index(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            if record.get(CONTENT_HASH_FIELD):
+                self._by_content[record[CONTENT_HASH_FIELD]] = record
+            if record.get(TEXT_HASH_FIELD):
+                self._by_text[record[TEXT_HASH_FIELD]] = record
+
+    def _indexes(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        version = self.storage.resume_version()
+        with self._lock:
+            if version != self._version:
+                records = self.storage.load_resume_records()
+                # Within one epoch records are only appended, so just the new tail is indexed
+                extendable = (
+                    self._version is not None
+                    and version[0] == self._version[0]
+                    and len(records) >= self._indexed
+                    and (not self._indexed or records[self._indexed - 1].get("resume_id") == self._last_resume_id)
+                )
+                if not extendable:
+                    self._by_content, self._by_text, self._indexed = {}, {}, 0
+                self._index(records[self._indexed:])
+                self._indexed = len(records)
+                self._last_resume_id = records[-1].get("resume_id") if records else None
+                self._version = version
+            return self._by_content, self._by_text
+
+    def add(self, records: List[Dict[str, Any]]) -> None:
+        """Index just-stored records so the next lookup sees them without reading the store"""
+        with self._lock:
+            self._index(records)
+
+    def find_by_content(self, digest: str) -> Optional[Dict[str, Any]]:
+        return self._indexes()[0].get(digest)
+
+    def find_by_text(self, digest: str) -> Optional[Dict[str, Any]]:
+        return self._indexes()[1].get(digest)
+
+    def superseded_ids(self, records: List[Dict[str, Any]]) -> List[int]:
+        """resume_ids of stored parses with the same content or text hash as the given records"""
+        by_content, by_text = self._indexes()
+        ids = set()
+        for record in records:
+            for index, field in ((by_content, CONTENT_HASH_FIELD), (by_text, TEXT_HASH_FIELD)):
+                existing = index.get(record.get(field))
+                if existing and existing.get("resume_id") is not None:
+                    ids.add(existing["resume_id"])
+        return sorted(ids)
+
+    def record_hit(self, matched_on: str) -> None:
+        """Count a deduplicated upload; a content match also skipped text extraction"""
+        with self._lock:
+            self._counters[f"{matched_on}_hits"] += 1
+            self._counters["llm_calls_saved"] += 1
+            if matched_on == "content":
+                self._counters["extractions_saved"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from models import Job, Resume
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILES = ("job_des.json", "parsed_resumes.json")
+
+
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory):
+    """A working directory holding copies of the sample data.
+
+    The stores, score table and FAISS index use paths relative to the working
+    directory, so the tests never touch the files in backend/.
+    """
+    path = tmp_path_factory.mktemp("data")
+    for name in SAMPLE_FILES:
+        shutil.copy(os.path.join(BACKEND_DIR, name), path / name)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(path)
+        yield path
+
+
+@pytest.fixture(scope="session")
+def service(workdir):
+    """JobMatchingService on the sample data with a canned LLM"""
+    from services.job_matching import JobMatchingService
+    return JobMatchingService(llm=FakeListChatModel(responses=["Good fit."]))
+
+
+@pytest.fixture(scope="session")
+def sample_jobs():
+    with open(os.path.join(BACKEND_DIR, "job_des.json"), "r", encoding="utf-8") as f:
+        return [Job(**job) for job in json.load(f)]
+
+
+@pytest.fixture(scope="session")
+def sample_resumes():
+    with open(os.path.join(BACKEND_DIR, "parsed_resumes.json"), "r", encoding="utf-8") as f:
+        return [Resume(resume_id=position + 1, **record) for position, record in enumerate(json.load(f))]
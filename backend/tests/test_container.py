@@ -0,0 +1,35 @@
+"""ServiceContainer.shutdown releases what the built services hold."""
+import pytest
+
+from services.container import ServiceContainer
+from services.ingestion import IngestionService
+from utils.email_service import EmailService
+from utils.smtp_pool import _PooledConnection
+
+
+def test_shutdown_stops_the_extraction_pool():
+    container = ServiceContainer()
+    container.register("ingestion_service", lambda: IngestionService(None, None, extract_workers=1))
+    service = container.get("ingestion_service")
+    pool = service._pool()
+    assert pool.submit(sum, [1, 2]).result() == 3
+    container.shutdown()
+    assert service._executor is None
+    with pytest.raises(RuntimeError):
+        pool.submit(sum, [1, 2])
+
+
+def test_shutdown_closes_pooled_smtp_sessions():
+    class FakeSMTP:
+        closed = False
+
+        def quit(self):
+            self.closed = True
+
+    container = ServiceContainer()
+    container.register("email_service", EmailService)
+    pool = container.get("email_service").pool
+    sessions = [FakeSMTP(), FakeSMTP()]
+    pool._idle = [_PooledConnection(smtp) for smtp in sessions]
+    container.shutdown()
+    assert all(smtp.closed for smtp in sessions) and pool.stats()["idle"] == 0
@@ -0,0 +1,79 @@
+"""The FAISS index must hold the embedding of each id's current content."""
+import json
+
+import numpy as np
+import pytest
+
+from models import Resume
+from services.embeddings_service import EmbeddingsService, HashingEmbedder, resume_embedding_text
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def make_resume(resume_id: int, skills) -> Resume:
+    return Resume(resume_id=resume_id, skills=skills)
+
+
+def open_service(tmp_path) -> EmbeddingsService:
+    return EmbeddingsService(str(tmp_path / "index.faiss"), backend=CountingEmbedder(), save_every=1)
+
+
+def stored_vector(service: EmbeddingsService, resume: Resume) -> bool:
+    """Whether the index holds exactly the embedding of the resume's current text"""
+    vector = service._index.reconstruct(resume.resume_id)
+    return np.allclose(vector, service.backend.embed([resume_embedding_text(resume)])[0])
+
+
+@pytest.fixture
+def resumes():
+    return [make_resume(1, ["Python", "SQL"]), make_resume(2, ["Welding"])]
+
+
+def test_sync_within_an_epoch_embeds_only_new_ids(tmp_path, resumes):
+    service = open_service(tmp_path)
+    assert service.sync(resumes, epoch=1) == 2
+    assert service.sync(resumes + [make_resume(3, ["Nursing"])], epoch=1) == 1
+    assert len(service.backend.embedded) == 3
+
+
+def test_changed_content_under_a_known_id_is_reembedded(tmp_path, resumes):
+    service = open_service(tmp_path)
+    service.sync(resumes, epoch=1)
+    # Resume 2 deleted and its id reused: a new epoch with different content behind id 2
+    rewritten = [resumes[0], make_resume(2, ["Python", "SQL", "Data Analysis"])]
+    assert service.sync(rewritten, epoch=2) == 1
+    assert len(service) == 2 and all(stored_vector(service, resume) for resume in rewritten)
+    assert service.search("data analysis", 1)[0][0] == 2
+
+    # The add path checks the ids it is given
+    service.add_resume(make_resume(1, ["Forklift"]))
+    assert stored_vector(service, make_resume(1, ["Forklift"]))
+
+
+def test_changes_between_processes_are_detected(tmp_path, resumes):
+    open_service(tmp_path).sync(resumes, epoch=1)
+    rewritten = [make_resume(1, ["Welding"]), make_resume(2, ["Python", "SQL"])]
+    restarted = open_service(tmp_path)
+    assert restarted.sync(rewritten, epoch=1) == 2
+    assert all(stored_vector(restarted, resume) for resume in rewritten)
+    assert open_service(tmp_path).sync(rewritten, epoch=1) == 0
+
+
+def test_index_saved_without_fingerprints_is_reembedded_once(tmp_path, resumes):
+    service = open_service(tmp_path)
+    service.sync(resumes, epoch=1)
+    with open(service.meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    del meta["fingerprints"]
+    with open(service.meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    assert open_service(tmp_path).sync(resumes, epoch=1) == 2
+    assert open_service(tmp_path).sync(resumes, epoch=1) == 0
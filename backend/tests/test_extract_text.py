@@ -0,0 +1,88 @@
+"""PDF extraction must return every page once, use the process pool for uploads and stop stuck pages."""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from pypdf import PageObject
+
+from utils import extract_text
+from utils.extract_text import extract_pdf
+from utils.pdf_samples import text_pdf
+
+PAGES = [f"Page {number}\nPython SQL reporting line {number}" for number in range(20)]
+DOCUMENT = text_pdf(PAGES)
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    """A pool forked after the test's monkeypatches, with three workers"""
+    monkeypatch.setattr(extract_text, "PDF_EXTRACT_WORKERS", 3)
+    monkeypatch.setattr(extract_text, "_page_pool", None)
+    yield
+    extract_text.shutdown_pool()
+
+
+def slow_page(monkeypatch, stuck_text: str):
+    original = PageObject.extract_text
+
+    def extract(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        if text.startswith(stuck_text):
+            time.sleep(30)
+        return text
+    monkeypatch.setattr(PageObject, "extract_text", extract)
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_sources_give_the_same_text(tmp_path, fresh_pool, parallel):
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(DOCUMENT)
+    for source in (DOCUMENT, str(path), BytesIO(DOCUMENT)):
+        result = extract_pdf(source, parallel=parallel)
+        assert result.text == "\n".join(PAGES)
+        assert (result.page_count, result.pages_extracted, result.truncated, result.timed_out) == (20, 20, False, False)
+    assert extract_pdf(DOCUMENT, max_pages=5).text == "\n".join(PAGES[:5])
+
+
+@pytest.mark.parametrize("spool_size, sent_as", [(10 * len(DOCUMENT), bytes), (1024, str)])
+def test_uploads_are_extracted_in_the_pool(monkeypatch, spool_size, sent_as):
+    submitted = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(args)
+            return super().submit(fn, *args)
+
+    with RecordingPool(max_workers=2) as pool, tempfile.SpooledTemporaryFile(max_size=spool_size) as spooled:
+        monkeypatch.setattr(extract_text, "_pool", lambda: pool)
+        spooled.write(DOCUMENT)
+        assert extract_pdf(spooled).text == "\n".join(PAGES)
+    # A spool still in memory crosses over as bytes; one on disk as the path of a temporary copy,
+    # removed afterwards; neither is parsed in the calling thread
+    assert submitted and all(isinstance(args[0], sent_as) for args in submitted)
+    if sent_as is str:
+        assert not os.path.exists(submitted[0][0])
+
+
+def test_stuck_page_is_interrupted_in_the_caller(monkeypatch):
+    slow_page(monkeypatch, "Page 3\n")
+    started = time.perf_counter()
+    result = extract_pdf(DOCUMENT, timeout=0.5, parallel=False)
+    assert time.perf_counter() - started < 5
+    assert result.timed_out and result.pages_extracted == 3
+    assert result.text == "\n".join(PAGES[:3])
+
+
+def test_stuck_page_is_interrupted_in_the_worker(monkeypatch, fresh_pool):
+    slow_page(monkeypatch, "Page 3\n")
+    started = time.perf_counter()
+    result = extract_pdf(DOCUMENT, timeout=0.5)
+    assert time.perf_counter() - started < 5
+    assert result.timed_out and result.pages_extracted == 3
+    # The interrupted worker is free again for the next document
+    started = time.perf_counter()
+    assert extract_pdf(text_pdf(PAGES[:2]), timeout=10).pages_extracted == 2
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,74 @@
+"""Governed streams mark only the provider's own work as governed."""
+import asyncio
+import contextvars
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from services.llm_gateway import LLMGateway, _governed
+
+
+def chunk(text: str) -> ChatGenerationChunk:
+    return ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+def provider(seen):
+    for text in "abc":
+        seen.append(_governed.get())
+        yield chunk(text)
+
+
+async def aprovider(seen):
+    for text in "abc":
+        seen.append(_governed.get())
+        yield chunk(text)
+
+
+def test_consumer_calls_between_chunks_stay_governed():
+    gateway, seen, between = LLMGateway(), [], []
+    for _ in gateway.stream(lambda: provider(seen), tokens=10):
+        between.append(_governed.get())
+    assert seen == [True] * 3 and between == [False] * 3
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_async_consumer_calls_between_chunks_stay_governed():
+    gateway, seen, between = LLMGateway(), [], []
+
+    async def consume():
+        async for _ in gateway.astream(lambda: aprovider(seen), tokens=10):
+            between.append(_governed.get())
+    asyncio.run(consume())
+    assert seen == [True] * 3 and between == [False] * 3
+
+
+def test_stream_closed_from_another_context():
+    gateway, seen = LLMGateway(), []
+    stream = gateway.stream(lambda: provider(seen), tokens=10)
+    contextvars.copy_context().run(next, stream)
+    stream.close()  # used to raise ValueError from resetting the marker in the wrong context
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_cancelled_async_stream_releases_its_slot():
+    gateway, seen = LLMGateway(), []
+
+    async def main():
+        started = asyncio.Event()
+
+        async def slow_provider():
+            yield chunk("a")
+            await asyncio.sleep(30)
+            yield chunk("b")
+
+        async def consume():
+            async for _ in gateway.astream(slow_provider, tokens=10):
+                started.set()
+
+        task = asyncio.create_task(consume())
+        await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert _governed.get() is False
+    asyncio.run(main())
+    assert gateway.stats()["in_flight"] == 0
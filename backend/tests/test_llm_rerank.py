@@ -0,0 +1,22 @@
+"""The LLM rerank stage orders candidates by the structured verdict, never by the summary wording."""
+from models import FitVerdict, MatchAssessment, MatchCascadeConfig
+
+
+class CannedChain:
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        return self.outputs[:len(inputs)]
+
+
+def test_rerank_uses_structured_verdict(service, sample_jobs, monkeypatch):
+    monkeypatch.setattr(service, "_match_assessment_chain", CannedChain([
+        MatchAssessment(summary="Not a strong fit for this role.", verdict=FitVerdict.WEAK),
+        RuntimeError("LLM unavailable"),
+        MatchAssessment(summary="Solid background.", verdict=FitVerdict.STRONG),
+    ]))
+    report = service.run_match_pipeline(sample_jobs[0].title, 3, MatchCascadeConfig(llm_rerank=True))
+    assert [result.summary for result in report.results][0] == "Solid background."
+    assert [result.fit_verdict for result in report.results] == [FitVerdict.STRONG, FitVerdict.WEAK, FitVerdict.WEAK]
+    assert report.stages[-1].name == "rerank"
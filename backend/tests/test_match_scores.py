@@ -0,0 +1,128 @@
+"""The materialized match score table must always equal a full recompute."""
+import pytest
+
+from models import Job, JobStatus, Resume
+from services.batch_scorer import BatchScorer
+from services.match_scores import MatchScoreTable
+
+
+def make_job(job_id: int, title: str, description: str, status: str = "Open") -> Job:
+    return Job(jobId=job_id, clientId=1, title=title, description=description,
+               jobType="Remote", employmentType="Full-Time", status=status, createdDate="")
+
+
+def make_resume(resume_id: int, skills, position: str = "Analyst") -> Resume:
+    return Resume(resume_id=resume_id, full_name=f"Candidate {resume_id}", skills=skills,
+                  work_experience=[{"position": position, "company": "Acme"}], education=[{"degree": "BSc"}])
+
+
+JOBS = [
+    make_job(1, "Data Analyst", "Python and SQL reporting"),
+    make_job(2, "Welder", "MIG and TIG welding, blueprint reading"),
+    make_job(3, "Nurse", "Registered nurse", status="Closed"),
+]
+
+
+class Harness:
+    """A table, a scorer and the resume list they are synced to"""
+
+    def __init__(self, path):
+        self.path = path
+        self.table = MatchScoreTable(str(path))
+        self.scorer = BatchScorer()
+        self.epoch = 1
+        self.version = 0
+
+    def sync(self, jobs, resumes, new_epoch: bool = False, epoch=True):
+        if new_epoch:
+            self.epoch += 1
+        self.version += 1
+        self.scorer.sync(resumes, (self.epoch, self.version))
+        report = self.table.sync(jobs, resumes, self.scorer, epoch=self.epoch if epoch else None)
+        assert self.table.verify(jobs, resumes, self.scorer) == []
+        return report
+
+    def top(self, job_id: int, k: int = 10):
+        return [resume_id for resume_id, _ in self.table.top_candidates(job_id, k)]
+
+
+@pytest.fixture
+def harness(tmp_path):
+    return Harness(tmp_path / "match_scores.db")
+
+
+def test_incremental_changes_match_full_recompute(harness):
+    resumes = [make_resume(1, ["Python", "SQL"]), make_resume(2, ["Welding"], "Welder"), make_resume(3, [])]
+    assert harness.sync(JOBS, resumes)["jobs_scored"] == 2
+
+    # Appended resumes within the epoch
+    resumes = resumes + [make_resume(4, ["SQL", "Tableau"]), make_resume(5, ["TIG", "MIG"])]
+    assert harness.sync(JOBS, resumes)["resumes_added"] == 2
+
+    # Edited, closed and reopened jobs
+    jobs = [make_job(1, "Data Analyst", "Tableau dashboards"), make_job(2, "Welder", "TIG", status="Paused"),
+            make_job(3, "Nurse", "Registered nurse")]
+    report = harness.sync(jobs, resumes)
+    assert report["jobs_scored"] == 2 and report["jobs_removed"] == 1
+    assert not harness.table.has_job(2)
+
+    # Deleted resumes (a new epoch)
+    resumes = resumes[1:]
+    assert harness.sync(jobs, resumes, new_epoch=True)["resumes_removed"] == 1
+
+
+def test_reused_id_with_new_content_is_rescored(harness):
+    resumes = [make_resume(1, ["Python", "SQL"]), make_resume(2, ["Knitting"])]
+    harness.sync(JOBS, resumes)
+    assert harness.top(1, 1) == [1]
+
+    # Resume 2 is deleted and its id reused by a new upload; the id set is unchanged
+    resumes = [make_resume(1, ["Cobol"], "Clerk"), make_resume(2, ["Python", "SQL", "Data Analyst"])]
+    report = harness.sync(JOBS, resumes, new_epoch=True)
+    assert report["resumes_changed"] == 2
+    assert harness.top(1, 1) == [2]
+
+
+def test_changes_between_processes_are_detected(harness):
+    resumes = [make_resume(1, ["Python", "SQL"]), make_resume(2, ["Welding"], "Welder")]
+    harness.sync(JOBS, resumes)
+
+    # Compaction or a switched storage backend while the app was down: a fresh process
+    # starts at the same epoch number, with different content behind the same ids
+    restarted = Harness(harness.path)
+    resumes = [make_resume(1, ["Welding"], "Welder"), make_resume(2, ["Python", "SQL"])]
+    assert restarted.sync(JOBS, resumes)["resumes_changed"] == 2
+    assert restarted.top(1, 1) == [2] and restarted.top(2, 1) == [1]
+
+
+def test_sync_without_epoch_checks_every_resume(harness):
+    resumes = [make_resume(1, ["Python"]), make_resume(2, ["SQL"])]
+    harness.sync(JOBS, resumes, epoch=False)
+    resumes = [make_resume(1, ["SQL"]), make_resume(2, ["Python"])]
+    assert harness.sync(JOBS, resumes, epoch=False)["resumes_changed"] == 2
+
+
+def test_sample_data_matches_full_recompute(harness, sample_jobs, sample_resumes):
+    harness.sync(sample_jobs, sample_resumes)
+    for job in sample_jobs:
+        if harness.table.has_job(job.jobId):
+            assert harness.top(job.jobId, 5) == [sample_resumes[p].resume_id for p in harness.scorer.top_k(job, 5)]
+
+
+def test_older_table_layout_is_rebuilt(harness):
+    with harness.table.engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE scored_resumes (resume_id INTEGER PRIMARY KEY)")
+        connection.exec_driver_sql("INSERT INTO scored_resumes VALUES (1)")
+    harness.sync(JOBS, [make_resume(1, ["Python"])])
+
+
+def test_quick_match_reads_open_jobs_from_the_table(service, sample_jobs, monkeypatch):
+    reads = []
+    get_score = service.match_scores.get_score
+    monkeypatch.setattr(service.match_scores, "get_score",
+                        lambda job_id, resume_id: reads.append(job_id) or get_score(job_id, resume_id))
+    resumes = service.load_resumes()
+    for job in sample_jobs:
+        for resume in resumes:
+            assert service.match_candidate(resume, job).match_score == service.score_candidate(resume, job).match_score
+    assert set(reads) == {job.jobId for job in sample_jobs if job.status == JobStatus.OPEN}
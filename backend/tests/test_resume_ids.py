@@ -0,0 +1,43 @@
+"""Resume ids are never handed out twice, even after deletes, compaction and a restart."""
+import json
+
+from services.resume_store import ResumeStore
+from services.sql_store import SqlStorage
+
+
+def open_store(tmp_path) -> ResumeStore:
+    return ResumeStore(str(tmp_path / "resumes.jsonl"), legacy_path=None, fsync_policy="never")
+
+
+def test_compacted_store_keeps_deleted_trailing_ids(tmp_path):
+    store = open_store(tmp_path)
+    assert [r["resume_id"] for r in store.append_many([{"full_name": name} for name in "abc"])] == [1, 2, 3]
+    assert store.delete(3)
+    assert store.compact()["records"] == 2
+
+    reopened = open_store(tmp_path)
+    assert [r["resume_id"] for r in reopened.read_all()] == [1, 2]
+    assert reopened.append({"full_name": "d"})["resume_id"] == 4
+    assert open_store(tmp_path).rebuild_index() == 3
+    assert open_store(tmp_path).append({"full_name": "e"})["resume_id"] == 5
+
+
+def test_sql_storage_does_not_reuse_deleted_ids(tmp_path):
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps([]), encoding="utf-8")
+
+    def open_storage():
+        return SqlStorage(str(tmp_path / "store.db"), store=open_store(tmp_path), job_file=str(jobs),
+                          email_log_file=str(tmp_path / "emails.json"))
+
+    storage = open_storage()
+    assert [r["resume_id"] for r in storage.add_resumes([{"full_name": name} for name in "abc"])] == [1, 2, 3]
+    assert storage.delete_resume(3)
+    assert open_storage().add_resume({"full_name": "d"})["resume_id"] == 4
+
+    # A replacing import keeps the counter, including ids issued by the JSON store
+    store = open_store(tmp_path)
+    store.append_many([{"full_name": "x"}] * 6)
+    store.delete(6)
+    storage.import_from_json(store, str(jobs), str(tmp_path / "emails.json"), replace=True)
+    assert storage.add_resume({"full_name": "e"})["resume_id"] == 7
@@ -0,0 +1,49 @@
+"""Requests keep scoring the resume list they loaded while other threads sync the shared scorer."""
+import numpy as np
+
+from models import Resume
+from services.batch_scorer import BatchScorer
+
+
+def extra_resume(resume_id: int) -> Resume:
+    return Resume(resume_id=resume_id, full_name="Late Upload", skills=["Python", "SQL", "Welding"],
+                  education=[{"degree": "BSc"}])
+
+
+def test_snapshot_is_unaffected_by_later_syncs(sample_resumes, sample_jobs):
+    scorer = BatchScorer()
+    view = scorer.snapshot(sample_resumes, (1, 1))
+    expected = {job.jobId: view.score_all(job) for job in sample_jobs}
+
+    grown = sample_resumes + [extra_resume(100)]
+    scorer.sync(grown, (1, 2))
+    for job in sample_jobs:
+        assert len(scorer.score_all(job)) == len(grown)
+        assert np.array_equal(view.score_all(job), expected[job.jobId])
+        text = f"{job.title} {job.description}"
+        assert all(position < len(sample_resumes) for position in view.match(text))
+        assert all(position < len(sample_resumes) for position in view.retrieve(text, 50))
+
+    # A new epoch rebuilds the shared scorer; the view keeps its own candidates
+    scorer.sync(grown[3:], (2, 1))
+    for job in sample_jobs:
+        assert np.array_equal(view.score_all(job), expected[job.jobId])
+    assert len(view) == len(sample_resumes)
+
+
+def test_match_matrix_survives_concurrent_sync(service):
+    resumes = service.load_resumes()
+    rows = service.iter_match_matrix(top_k=3, best_jobs=2)
+    first = next(rows)
+
+    # Another request syncs the shared scorer to a longer list mid-stream
+    grown = resumes + [extra_resume(max(r.resume_id for r in resumes) + 1)]
+    job = service.load_jobs()[0]
+    ranked = service.rank_candidates(job, grown, 3, positions=list(range(len(grown))))
+    assert len(ranked) == 3
+
+    rest = list(rows)
+    candidates = [row for row in rest if row["type"] == "candidate"]
+    assert first["type"] == "job"
+    assert [row["resume_id"] for row in candidates] == [r.resume_id for r in resumes]
+    assert rest[-1]["candidates"] == len(resumes)
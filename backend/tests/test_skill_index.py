@@ -0,0 +1,118 @@
+"""SkillIndex and BatchScorer must give the same results as the per-candidate scorer they replace."""
+import numpy as np
+import pytest
+
+from models import Job, Resume
+from services.batch_scorer import BatchScorer
+from services.skill_index import SkillIndex
+
+JOB_TEXT = "Senior JavaScript developer: React, Node.js, SQL and C. R or Go is a plus."
+
+
+def make_job(job_id: int, title: str, description: str) -> Job:
+    return Job(jobId=job_id, clientId=1, title=title, description=description,
+               jobType="Remote", employmentType="Full-Time", status="Open", createdDate="")
+
+
+JOBS = [
+    make_job(1, "Senior Developer", JOB_TEXT),
+    make_job(2, "Data Analyst", "Python, pandas and SQL reporting for the finance team"),
+    make_job(3, "Nurse", "Registered nurse for night shifts"),
+    make_job(4, "", ""),
+]
+
+RESUMES = [
+    # Duplicate skills, in different case
+    Resume(resume_id=1, skills=["Python", "python", "Python", "SQL"],
+           work_experience=[{"position": "Data Analyst", "company": "Finance Corp"}], education=[{"degree": "BSc"}]),
+    # No skills at all
+    Resume(resume_id=2, skills=[], work_experience=[{"position": "Night shift nurse"}]),
+    # Short skills that occur inside longer words of the job text
+    Resume(resume_id=3, skills=["C", "R", "Go", "JS"], education=[{"degree": "MSc"}]),
+    # Skills sharing a prefix with each other and with job words
+    Resume(resume_id=4, skills=["Java", "JavaScript", "Jav", "Javelin", "Node", "Node.js", "React Native"],
+           work_experience=[{"position": "Senior Developer", "company": "Web Shop", "description": "react apps"}]),
+    # Multi-word skills, surrounding whitespace and nothing that matches
+    Resume(resume_id=5, skills=["Data Analysis", " SQL ", "Registered Nurse", "Cobol"]),
+    Resume(resume_id=6, skills=["Knitting"], work_experience=[{"position": "Designer"}] * 6),
+]
+
+
+@pytest.fixture(scope="module")
+def reference(service):
+    return service
+
+
+def job_text(job: Job) -> str:
+    return f"{job.title} {job.description}"
+
+
+def baseline_ranking(reference, resumes, job, top_n):
+    """Ranking of the original match_candidates_to_job: stable sort on the rounded score"""
+    results = [reference.score_candidate(resume, job) for resume in resumes]
+    order = sorted(range(len(resumes)), key=lambda position: -results[position].match_score)
+    return order[:top_n]
+
+
+def build(index_cls, resumes):
+    index = index_cls()
+    index.sync(resumes, (1, 1))
+    return index
+
+
+@pytest.mark.parametrize("index_cls", [SkillIndex, BatchScorer])
+def test_match_equals_substring_scorer(reference, index_cls):
+    index = build(index_cls, RESUMES)
+    assert index.verify(RESUMES, JOBS, reference.calculate_skill_match_score) == []
+    for job in JOBS:
+        positions = list(range(len(RESUMES)))
+        by_position = index.match_positions(job_text(job), positions)
+        for position, resume in enumerate(RESUMES):
+            assert by_position[position] == reference.calculate_skill_match_score(resume.skills, job_text(job))
+
+
+def test_batch_scores_equal_score_candidate(reference):
+    scorer = build(BatchScorer, RESUMES)
+    for job in JOBS:
+        scores = scorer.score_all(job)
+        expected = [reference.score_candidate(resume, job).match_score for resume in RESUMES]
+        assert [round(float(score) * 100, 1) for score in scores] == expected
+        positions = [5, 0, 3]
+        assert np.array_equal(scorer.score_positions(job, positions), scores[positions])
+
+
+@pytest.mark.parametrize("top_n", [1, 3, len(RESUMES), len(RESUMES) + 2])
+def test_top_k_equals_baseline_ranking(reference, top_n):
+    scorer = build(BatchScorer, RESUMES)
+    for job in JOBS:
+        assert scorer.top_k(job, top_n) == baseline_ranking(reference, RESUMES, job, top_n)
+
+
+def test_incremental_sync_equals_fresh_build(reference):
+    scorer = build(BatchScorer, RESUMES[:3])
+    scorer.score_all(JOBS[0])
+    scorer.sync(RESUMES, (1, 2))
+    fresh = build(BatchScorer, RESUMES)
+    for job in JOBS:
+        assert np.array_equal(scorer.score_all(job), fresh.score_all(job))
+    # A new epoch rebuilds rather than extending a list that changed underneath
+    scorer.sync(RESUMES[1:], (2, 1))
+    assert scorer.verify(RESUMES[1:], JOBS, reference.calculate_skill_match_score) == []
+
+
+@pytest.mark.parametrize("top_n", [1, 3, 8])
+def test_sample_data_ranking_equals_baseline(reference, sample_jobs, sample_resumes, top_n):
+    scorer = build(BatchScorer, sample_resumes)
+    assert scorer.verify(sample_resumes, sample_jobs, reference.calculate_skill_match_score) == []
+    for job in sample_jobs:
+        assert scorer.top_k(job, top_n) == baseline_ranking(reference, sample_resumes, job, top_n)
+
+
+@pytest.mark.parametrize("top_n", [1, 3, 8])
+def test_default_pipeline_equals_baseline(service, sample_jobs, top_n):
+    resumes = service.load_resumes()
+    for job in sample_jobs:
+        report = service.score_candidates_to_job(job.title, top_n)
+        expected = baseline_ranking(service, resumes, job, top_n)
+        assert [result.resume_data.resume_id for result in report.results] == \
+            [resumes[position].resume_id for position in expected]
@@ -0,0 +1,79 @@
+"""The upload dedup index must stay equal to a full rescan of the stored records."""
+from services.upload_dedup import UploadDedupIndex, CONTENT_HASH_FIELD, TEXT_HASH_FIELD
+
+
+class ListStorage:
+    """Resume records with an (epoch, version) like the real backends"""
+
+    def __init__(self):
+        self.records = []
+        self.epoch, self.version = 1, 0
+
+    def resume_version(self):
+        return self.epoch, self.version
+
+    def load_resume_records(self):
+        return list(self.records)
+
+    def add_resumes(self, records):
+        self.records.extend(records)
+        self.version += 1
+        return records
+
+    def delete_resume(self, resume_id):
+        self.records = [record for record in self.records if record["resume_id"] != resume_id]
+        self.epoch += 1
+        self.version += 1
+
+
+def record(resume_id, content, text):
+    return {"resume_id": resume_id, CONTENT_HASH_FIELD: content, TEXT_HASH_FIELD: text}
+
+
+def rescanned(storage):
+    return UploadDedupIndex(storage)._indexes()
+
+
+class CountingIndex(UploadDedupIndex):
+    def __init__(self, storage):
+        super().__init__(storage)
+        self.indexed = []
+
+    def _index(self, records):
+        self.indexed.extend(record["resume_id"] for record in records)
+        super()._index(records)
+
+
+def test_appends_extend_the_index():
+    storage = ListStorage()
+    index = CountingIndex(storage)
+    storage.add_resumes([record(1, "c1", "t1"), record(2, "c2", "t2")])
+    assert index.find_by_content("c1")["resume_id"] == 1
+
+    for resume_id in range(3, 6):
+        index.add(storage.add_resumes([record(resume_id, f"c{resume_id}", "t1")]))
+        assert index.find_by_text("t1")["resume_id"] == resume_id
+    # Each upload is indexed by the add path and once more from the tail, never by a rescan
+    assert index.indexed == [1, 2, 3, 3, 4, 4, 5, 5]
+    assert index._indexes() == rescanned(storage)
+
+
+def test_new_epoch_rescans():
+    storage = ListStorage()
+    index = UploadDedupIndex(storage)
+    storage.add_resumes([record(1, "c1", "t1"), record(2, "c2", "t1")])
+    assert index.find_by_text("t1")["resume_id"] == 2
+    storage.delete_resume(2)
+    assert index.find_by_content("c2") is None
+    assert index.find_by_text("t1")["resume_id"] == 1
+    assert index._indexes() == rescanned(storage)
+
+
+def test_superseded_ids_and_stats():
+    storage = ListStorage()
+    index = UploadDedupIndex(storage)
+    storage.add_resumes([record(1, "c1", "t1"), record(2, "c2", "t2")])
+    assert index.superseded_ids([record(None, "c1", "t2")]) == [1, 2]
+    index.record_hit("content")
+    index.record_hit("text")
+    assert index.stats() == {"content_hits": 1, "text_hits": 1, "llm_calls_saved": 2, "extractions_saved": 1}
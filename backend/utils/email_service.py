@@ -1,4 +1,4 @@
-import smtplib
+import asyncio
 import json
 import os
 from datetime import datetime
@@ -7,15 +7,22 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from dotenv import load_dotenv
+from services.storage import get_storage
+from utils.smtp_pool import SMTPConnectionPool
 
 load_dotenv()
 
+# Maximum number of SMTP sends in flight for async bulk email
+BULK_EMAIL_CONCURRENCY = int(os.getenv("BULK_EMAIL_CONCURRENCY", "4"))
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
         self.sender_email = os.getenv("SENDER_EMAIL")
         self.sender_password = os.getenv("SENDER_PASSWORD")  # Use App Password for Gmail
+        # Authenticated sessions are reused across messages (SMTP_POOL_* settings)
+        self.pool = SMTPConnectionPool(self.smtp_server, self.smtp_port, self.sender_email, self.sender_password)
         
     def send_professional_email(self, recipient_email, subject, body, candidate_name="Candidate"):
         """Send a professional email with custom subject and body"""
@@ -43,13 +50,8 @@ www.staffpilot.com
         message.attach(MIMEText(clean_body, "plain"))
         
         try:
-            # Connect to server and send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.sender_email, self.sender_password)
-            text = message.as_string()
-            server.sendmail(self.sender_email, recipient_email, text)
-            server.quit()
+            # Send over a pooled, already authenticated connection
+            self.pool.send(self.sender_email, recipient_email, message.as_string())
             
             # Log the email
             self._log_email(recipient_email, subject, "SUCCESS")
@@ -60,50 +62,63 @@ www.staffpilot.com
             print(f"Failed to send email: {e}")
             return False
     
-    def send_bulk_email(self, recipients, subject, body, job_title=None):
-        """Send emails to multiple recipients (bulk email)"""
-        results = []
-        successful_sends = 0
-        failed_sends = 0
-        
-        for recipient in recipients:
-            # Personalize the email body for each candidate
-            if isinstance(recipient, dict):
-                email = recipient.get('email')
-                name = recipient.get('name', 'Candidate')
-                match_score = recipient.get('match_score', '')
-            else:
-                email = recipient
-                name = 'Candidate'
-                match_score = ''
-            
-            # Personalize body
-            personalized_body = body.replace('[Candidate Name]', name)
-            if job_title:
-                personalized_body = personalized_body.replace('[Job Title]', job_title)
-            if match_score:
-                personalized_body = personalized_body.replace('[Match Score]', f"{match_score}%")
-            
-            # Send individual email
-            success = self.send_professional_email(email, subject, personalized_body, name)
-            
-            results.append({
-                'email': email,
-                'name': name,
-                'status': 'SUCCESS' if success else 'FAILED'
-            })
-            
-            if success:
-                successful_sends += 1
-            else:
-                failed_sends += 1
-        
+    async def asend_professional_email(self, recipient_email, subject, body, candidate_name="Candidate"):
+        """Async variant of send_professional_email; the blocking SMTP exchange runs in a worker thread"""
+        return await asyncio.to_thread(self.send_professional_email, recipient_email, subject, body, candidate_name)
+    
+    def _personalize(self, recipient, body, job_title=None):
+        """Return (email, name, personalized body) for a bulk email recipient"""
+        if isinstance(recipient, dict):
+            email = recipient.get('email')
+            name = recipient.get('name', 'Candidate')
+            match_score = recipient.get('match_score', '')
+        else:
+            email = recipient
+            name = 'Candidate'
+            match_score = ''
+        
+        # Personalize body
+        personalized_body = body.replace('[Candidate Name]', name)
+        if job_title:
+            personalized_body = personalized_body.replace('[Job Title]', job_title)
+        if match_score:
+            personalized_body = personalized_body.replace('[Match Score]', f"{match_score}%")
+        return email, name, personalized_body
+    
+    def _bulk_summary(self, recipients, sends):
+        """Summarize (email, name, success) tuples of a bulk send"""
+        results = [{'email': email, 'name': name, 'status': 'SUCCESS' if success else 'FAILED'}
+                   for email, name, success in sends]
+        successful_sends = sum(1 for _, _, success in sends if success)
         return {
             'total_sent': len(recipients),
             'successful': successful_sends,
-            'failed': failed_sends,
+            'failed': len(sends) - successful_sends,
             'results': results
         }
+    
+    def send_bulk_email(self, recipients, subject, body, job_title=None):
+        """Send emails to multiple recipients (bulk email)"""
+        sends = []
+        for recipient in recipients:
+            email, name, personalized_body = self._personalize(recipient, body, job_title)
+            # Send individual email
+            success = self.send_professional_email(email, subject, personalized_body, name)
+            sends.append((email, name, success))
+        return self._bulk_summary(recipients, sends)
+    
+    async def asend_bulk_email(self, recipients, subject, body, job_title=None):
+        """Async variant of send_bulk_email with up to BULK_EMAIL_CONCURRENCY sends in flight"""
+        semaphore = asyncio.Semaphore(BULK_EMAIL_CONCURRENCY)
+        
+        async def send(recipient):
+            email, name, personalized_body = self._personalize(recipient, body, job_title)
+            async with semaphore:
+                success = await self.asend_professional_email(email, subject, personalized_body, name)
+            return email, name, success
+        
+        sends = await asyncio.gather(*(send(recipient) for recipient in recipients))
+        return self._bulk_summary(recipients, list(sends))
 
     def send_resume_notification(self, recipient_email, candidate_name, resume_data):
         """Send notification email when a new resume is parsed"""
@@ -136,13 +151,8 @@ www.staffpilot.com
         message.attach(MIMEText(body, "plain"))
         
         try:
-            # Connect to server and send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.sender_email, self.sender_password)
-            text = message.as_string()
-            server.sendmail(self.sender_email, recipient_email, text)
-            server.quit()
+            # Send over a pooled, already authenticated connection
+            self.pool.send(self.sender_email, recipient_email, message.as_string())
             
             # Log the email
             self._log_email(recipient_email, candidate_name, "SUCCESS")
@@ -153,6 +163,10 @@ www.staffpilot.com
             print(f"Failed to send email: {e}")
             return False
     
+    async def asend_resume_notification(self, recipient_email, candidate_name, resume_data):
+        """Async variant of send_resume_notification"""
+        return await asyncio.to_thread(self.send_resume_notification, recipient_email, candidate_name, resume_data)
+    
     def _log_email(self, recipient, subject, status):
         """Log email sending attempts"""
         log_entry = {
@@ -162,20 +176,11 @@ www.staffpilot.com
             "status": status
         }
         
-        # Load existing logs
-        log_file = "email_logs.json"
-        try:
-            with open(log_file, 'r') as f:
-                logs = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            logs = []
-        
-        # Add new log entry
-        logs.append(log_entry)
-        
-        # Save updated logs
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+        get_storage().append_email_log(log_entry)
+    
+    def close(self):
+        """Close the pooled SMTP sessions (called by ServiceContainer.shutdown)"""
+        self.pool.close()
 
 # Usage example
 def send_test_email():
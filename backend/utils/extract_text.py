@@ -1,7 +1,198 @@
-from PyPDF2 import PdfReader
+import asyncio
+import mmap
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
 from io import BytesIO
+from typing import BinaryIO, List, NamedTuple, Optional, Union
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    reader = PdfReader(BytesIO(file_bytes))
-    text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    return text
+from pypdf import PdfReader
+
+# Pages beyond this are ignored (resumes are short; long scans are mostly noise)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+# Wall-clock budget for one document, in seconds (0 disables the limit)
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "30"))
+# Documents with at least this many pages are split across the process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Extra wait for a pool worker to return the pages it finished before the deadline
+PDF_DEADLINE_GRACE = 1.0
+
+
+# Raw PDF bytes, a path to a PDF on disk, or a seekable binary file object
+PdfSource = Union[bytes, str, BinaryIO]
+
+
+class PdfExtraction(NamedTuple):
+    text: str
+    page_count: int
+    pages_extracted: int
+    truncated: bool  # stopped at max_pages
+    timed_out: bool  # stopped at the time budget
+    duration_ms: float
+
+
+class _DeadlineExceeded(BaseException):
+    """Raised by the deadline alarm; not an Exception so pypdf cannot swallow it"""
+
+
+def _raise_deadline(signum, frame):
+    raise _DeadlineExceeded()
+
+
+@contextmanager
+def _deadline_alarm(deadline: Optional[float]):
+    """Interrupt a page that is still being extracted at the deadline.
+
+    SIGALRM can only be handled by the main thread of a process, i.e. a pool
+    worker or a command line caller; elsewhere the deadline is checked between pages.
+    """
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if deadline is None or not hasattr(signal, "setitimer") or not in_main_thread:
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_deadline)
+    signal.setitimer(signal.ITIMER_REAL, max(deadline - time.time(), 0.001))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous if previous is not None else signal.SIG_DFL)
+
+
+def _extract_pages(reader: PdfReader, start: int, stop: int, deadline: Optional[float]) -> List[str]:
+    """Text of pages [start, stop), each extracted once; stops early at the deadline"""
+    texts = []
+    try:
+        with _deadline_alarm(deadline):
+            for number in range(start, stop):
+                if deadline is not None and time.time() > deadline:
+                    break
+                texts.append(reader.pages[number].extract_text() or "")
+    except _DeadlineExceeded:
+        pass
+    return texts
+
+
+@contextmanager
+def _open_reader(source: PdfSource):
+    """PdfReader over bytes, a memory-mapped file path or an open file object"""
+    if isinstance(source, bytes):
+        yield PdfReader(BytesIO(source))
+    elif isinstance(source, str):
+        with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield PdfReader(mapped)
+    else:
+        source.seek(0)
+        yield PdfReader(source)
+
+
+def _extract_range(source: Union[bytes, str], start: int, stop: int, deadline: Optional[float]) -> List[str]:
+    """Process pool entry point: open the document and extract one page range"""
+    with _open_reader(source) as reader:
+        return _extract_pages(reader, start, stop, deadline)
+
+
+@contextmanager
+def _pool_source(source: PdfSource):
+    """The source in a form that can be sent to a pool worker.
+
+    Bytes and paths are sent as they are. A spooled upload still held in memory
+    is small enough to send as bytes; one that rolled over to disk (or any other
+    file object) is copied in chunks to a named temporary file, which workers
+    memory-map like any other path.
+    """
+    if isinstance(source, (bytes, str)):
+        yield source
+        return
+    source.seek(0)
+    if isinstance(source, BytesIO) or getattr(source, "_rolled", None) is False:
+        yield source.read()
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spooled:
+        shutil.copyfileobj(source, spooled)
+    try:
+        yield spooled.name
+    finally:
+        os.remove(spooled.name)
+
+
+_page_pool = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _page_pool
+
+
+def shutdown_pool() -> None:
+    """Stop the extraction workers (called when the app shuts down)"""
+    global _page_pool
+    if _page_pool is not None:
+        _page_pool.shutdown(cancel_futures=True)
+        _page_pool = None
+
+
+def extract_pdf(source: PdfSource, max_pages: int = PDF_MAX_PAGES, timeout: float = PDF_EXTRACT_TIMEOUT,
+                parallel: bool = True) -> PdfExtraction:
+    """Extract the text of a PDF within page and time budgets.
+
+    ``source`` may be bytes, a file path (memory-mapped rather than read into
+    memory) or a seekable file object such as a spooled upload, which reaches
+    the workers as a temporary file once it is on disk. Extraction runs in
+    the process pool, where a worker interrupts a page that overruns the time
+    budget; large documents are split into contiguous page ranges extracted
+    in parallel. ``parallel=False`` keeps everything in the calling process, e.g.
+    when it already is a pool worker. Pages that miss the time budget are
+    left out and reported through ``timed_out``.
+    """
+    started = time.perf_counter()
+    deadline = time.time() + timeout if timeout else None
+    with _open_reader(source) as reader:
+        page_count = len(reader.pages)
+        pages = min(page_count, max_pages) if max_pages else page_count
+        split = pages >= PDF_PARALLEL_MIN_PAGES and PDF_EXTRACT_WORKERS > 1
+        in_pool = parallel and pages > 0 and (split or deadline is not None)
+        page_texts = [] if in_pool else _extract_pages(reader, 0, pages, deadline)
+
+    if in_pool:
+        with _pool_source(source) as pool_source:
+            chunk = -(-pages // PDF_EXTRACT_WORKERS) if split else pages
+            futures = [_pool().submit(_extract_range, pool_source, start, min(start + chunk, pages), deadline)
+                       for start in range(0, pages, chunk)]
+            for future in futures:
+                try:
+                    remaining = None if deadline is None else max(0.0, deadline - time.time()) + PDF_DEADLINE_GRACE
+                    ranged = future.result(timeout=remaining)
+                except FutureTimeout:
+                    break  # the worker could not be interrupted (e.g. stuck in native code)
+                page_texts.extend(ranged)
+                if len(ranged) < chunk and len(page_texts) < pages:
+                    break  # that worker hit the deadline; keep the text contiguous
+            for future in futures:
+                future.cancel()
+
+    return PdfExtraction(
+        text="\n".join(text for text in page_texts if text),
+        page_count=page_count,
+        pages_extracted=len(page_texts),
+        truncated=pages < page_count,
+        timed_out=len(page_texts) < pages,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+def extract_text_from_pdf(source: PdfSource, parallel: bool = True) -> str:
+    return extract_pdf(source, parallel=parallel).text
+
+
+async def aextract_text_from_pdf(source: PdfSource) -> str:
+    """Async variant of extract_text_from_pdf; parsing runs in a worker thread"""
+    return await asyncio.to_thread(extract_text_from_pdf, source)
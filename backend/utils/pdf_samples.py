@@ -0,0 +1,55 @@
+import random
+from io import BytesIO
+from typing import List
+
+from pypdf import PdfWriter
+from pypdf.generic import ContentStream, DictionaryObject, NameObject
+
+SAMPLE_WORDS = (
+    "python sql react leadership analysis warehouse forklift nursing patient reporting dashboards "
+    "managed team delivered project budget customer service developer engineer kubernetes "
+    "marketing sales accounting payroll logistics inventory training compliance research"
+).split()
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(page_texts: List[str]) -> bytes:
+    """A PDF with one page per string, each line drawn in Helvetica"""
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for text in page_texts:
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        operations = ["BT", "/F1 10 Tf", "12 TL", "50 750 Td"]
+        operations += [f"({_escape(line)}) '" for line in text.split("\n")]
+        operations.append("ET")
+        contents = ContentStream(None, None)
+        contents.set_data("\n".join(operations).encode("latin-1"))
+        page.replace_contents(contents)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def sample_corpus(documents: int = 40, long_documents: int = 4, long_pages: int = 40,
+                  seed: int = 42) -> List[bytes]:
+    """Deterministic resume-like PDFs: short 1-3 page documents plus a few long ones"""
+    rng = random.Random(seed)
+
+    def page(number: int) -> str:
+        lines = [f"Page {number + 1}"]
+        lines += [" ".join(rng.choices(SAMPLE_WORDS, k=12)) for _ in range(50)]
+        return "\n".join(lines)
+
+    corpus = [text_pdf([page(n) for n in range(rng.randint(1, 3))]) for _ in range(documents)]
+    corpus += [text_pdf([page(n) for n in range(long_pages)]) for _ in range(long_documents)]
+    return corpus
@@ -0,0 +1,104 @@
+"""Compare pooled SMTP sends with one connection per message against a local SMTP sink.
+
+    python -m utils.smtp_benchmark --messages 200 --concurrency 4 --handshake-ms 40
+
+The sink accepts every message and sleeps handshake_ms when a client connects
+and when it authenticates, standing in for the TLS and LOGIN round trips of a
+remote provider.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+
+from utils.smtp_pool import SMTPConnectionPool
+
+MESSAGE = "From: bench@staffpilot.local\r\nTo: candidate@example.com\r\nSubject: Benchmark\r\n\r\nHello.\r\n"
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self) -> None:
+        time.sleep(self.server.handshake_delay)
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-sink")
+                self.reply("250 AUTH PLAIN")
+            elif command.startswith("AUTH"):
+                time.sleep(self.server.handshake_delay)
+                self.reply("235 authenticated")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.received += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL, RCPT, NOOP, RSET
+                self.reply("250 ok")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay: float):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.handshake_delay = handshake_delay
+        self.lock = threading.Lock()
+        self.received = 0
+
+
+def send_unpooled(port: int) -> None:
+    """What EmailService did before pooling: connect, log in, send, quit for every message"""
+    server = smtplib.SMTP("127.0.0.1", port)
+    server.login("bench@staffpilot.local", "secret")
+    server.sendmail("bench@staffpilot.local", "candidate@example.com", MESSAGE)
+    server.quit()
+
+
+def run(send, messages: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(lambda _: send(), range(messages)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    sink = SinkServer(args.handshake_ms / 1000)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    port = sink.server_address[1]
+
+    unpooled = run(lambda: send_unpooled(port), args.messages, args.concurrency)
+    pool = SMTPConnectionPool("127.0.0.1", port, "bench@staffpilot.local", "secret",
+                              max_size=args.concurrency, starttls=False)
+    pooled = run(lambda: pool.send("bench@staffpilot.local", "candidate@example.com", MESSAGE),
+                 args.messages, args.concurrency)
+    pool.close()
+    sink.shutdown()
+
+    for name, elapsed in (("one connection per message", unpooled), ("pooled", pooled)):
+        print(f"{name:>28}: {elapsed:7.2f} s  {args.messages / elapsed:8.1f} msg/s")
+    print(f"speedup: {unpooled / pooled:.1f}x; sink received {sink.received} messages; pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional
+import os
+import smtplib
+import threading
+import time
+
+# Authenticated SMTP sessions kept open and shared across sends
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+# Messages sent over one connection before it is replaced (providers cap messages per session)
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Idle connections older than this are closed instead of reused (servers drop idle sessions)
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))  # seconds
+# Idle connections older than this are checked with NOOP before reuse
+SMTP_HEALTH_CHECK_AFTER = float(os.getenv("SMTP_HEALTH_CHECK_AFTER", "10"))  # seconds
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))  # seconds
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+
+# Failures of the connection itself: the message is retried once on a fresh connection
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+# Rejections of one message: the connection stays usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Reuses authenticated SMTP sessions across messages.
+
+    A send borrows an idle connection (most recently used first) or opens a
+    new one, up to max_size at once; STARTTLS and LOGIN happen only when a
+    connection is opened. Idle connections past the idle timeout are closed,
+    ones idle for a while are checked with NOOP before reuse, and a
+    connection is retired after max_messages sends. A send that fails because
+    the connection dropped is retried once on a fresh connection.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 max_size: int = SMTP_POOL_SIZE, max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 idle_timeout: float = SMTP_IDLE_TIMEOUT, health_check_after: float = SMTP_HEALTH_CHECK_AFTER,
+                 timeout: float = SMTP_TIMEOUT, starttls: bool = SMTP_STARTTLS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max(1, max_size)
+        self.max_messages = max(1, max_messages)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self.starttls = starttls
+        self._idle: List[_PooledConnection] = []
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "reused": 0, "health_checks": 0, "failed_health_checks": 0, "reconnects": 0,
+                       "closed_idle": 0, "closed_max_messages": 0, "sent": 0, "failed": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _open(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self._count("opened")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _healthy(self, connection: _PooledConnection) -> bool:
+        self._count("health_checks")
+        try:
+            code, _ = connection.smtp.noop()
+        except Exception:
+            code = None
+        if code != 250:
+            self._count("failed_health_checks")
+            return False
+        return True
+
+    def _take_idle(self) -> Optional[_PooledConnection]:
+        """A reusable idle connection, closing expired ones on the way"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.idle_timeout:
+                self._count("closed_idle")
+                self._close(connection.smtp)
+            elif idle_for > self.health_check_after and not self._healthy(connection):
+                self._close(connection.smtp)
+            else:
+                self._count("reused")
+                return connection
+
+    def _release(self, connection: _PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        if connection.messages >= self.max_messages:
+            self._count("closed_max_messages")
+            self._close(connection.smtp)
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    def send(self, sender: str, recipients, message: str) -> None:
+        """Send one message; raises the smtplib error when it could not be sent"""
+        self.reap_idle()
+        with self._slots:
+            connection = None
+            try:
+                connection = self._take_idle() or self._open()
+                try:
+                    connection.smtp.sendmail(sender, recipients, message)
+                except CONNECTION_ERRORS:
+                    # The session died between uses; one retry on a new connection
+                    self._close(connection.smtp)
+                    self._count("reconnects")
+                    connection = None
+                    connection = self._open()
+                    connection.smtp.sendmail(sender, recipients, message)
+            except Exception as e:
+                self._count("failed")
+                if connection is not None:
+                    # A refused message leaves the session usable (smtplib resets it); anything else does not
+                    if isinstance(e, MESSAGE_ERRORS):
+                        connection.messages += 1
+                        self._release(connection)
+                    else:
+                        self._close(connection.smtp)
+                raise
+            connection.messages += 1
+            self._count("sent")
+            self._release(connection)
+
+    def reap_idle(self) -> int:
+        """Close idle connections past the idle timeout; returns how many were closed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [c for c in self._idle if now - c.last_used > self.idle_timeout]
+            self._idle = [c for c in self._idle if c not in expired]
+            self._stats["closed_idle"] += len(expired)
+        for connection in expired:
+            self._close(connection.smtp)
+        return len(expired)
+
+    def close(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection.smtp)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "idle": len(self._idle), "max_size": self.max_size,
+                    "max_messages": self.max_messages, "idle_timeout": self.idle_timeout}
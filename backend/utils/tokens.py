@@ -0,0 +1,36 @@
+from typing import Optional
+import os
+import threading
+
+import tiktoken
+
+# tiktoken encoding used to size prompts (Gemini tokenizes differently; counts are estimates)
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+# Characters per token assumed when the encoding cannot be loaded (e.g. offline, no cached BPE file)
+FALLBACK_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding() -> Optional[tiktoken.Encoding]:
+    global _encoding, _encoding_failed
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+            except Exception as e:
+                _encoding_failed = True
+                print(f"Could not load tiktoken encoding {TOKEN_ENCODING}, estimating token counts: {e}")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
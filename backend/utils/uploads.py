@@ -0,0 +1,116 @@
+from typing import BinaryIO, Dict, Tuple
+import hashlib
+import json
+import os
+
+# Largest accepted PDF, per file (zip entries included)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Largest accepted bulk upload request body
+BULK_UPLOAD_MAX_BYTES = int(os.getenv("BULK_UPLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+# Bytes read per step when hashing or copying an upload
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Allowance for multipart boundaries and headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.3g} MB"
+
+
+def copy_limited(source: BinaryIO, target: BinaryIO = None, max_bytes: int = UPLOAD_MAX_BYTES,
+                 name: str = "Upload") -> Tuple[int, str]:
+    """Stream ``source`` in chunks into ``target`` (or just hash it); returns (size, sha256).
+
+    Raises UploadTooLarge as soon as more than ``max_bytes`` have been read, so
+    an oversized file is never held in memory or copied in full.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"{name} exceeds the {_megabytes(max_bytes)} limit")
+        digest.update(chunk)
+        if target is not None:
+            target.write(chunk)
+    return size, digest.hexdigest()
+
+
+def hash_upload(upload: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES, name: str = "Upload") -> Tuple[int, str]:
+    """Size and SHA-256 of a spooled upload, leaving it rewound for the PDF reader"""
+    upload.seek(0)
+    try:
+        return copy_limited(upload, max_bytes=max_bytes, name=name)
+    finally:
+        upload.seek(0)
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """Rejects upload requests whose body is over the route's limit with 413.
+
+    A declared Content-Length over the limit is refused before any of the body
+    is read; bodies sent without one are counted as they stream in and cut off
+    at the limit, before the multipart parser spools the rest.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app makes of the aborted body (e.g. a 400), the client gets the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = json.dumps({"detail": f"Request body exceeds the {_megabytes(limit)} limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
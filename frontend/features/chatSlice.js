@@ -7,14 +7,15 @@ const API_BASE_URL = 'http://localhost:8000/api/resume';
 // Send chat message
 export const sendChatMessage = createAsyncThunk(
     'chat/sendMessage',
-    async (message, { rejectWithValue }) => {
+    async (message, { getState, rejectWithValue }) => {
         try {
+            const session_id = getState().chat.conversationId;
             const response = await fetch(`${API_BASE_URL}/chat`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ message }),
+                body: JSON.stringify({ message, session_id }),
             });
 
             if (!response.ok) {
@@ -34,9 +35,14 @@ export const sendChatMessage = createAsyncThunk(
 // Clear conversation memory
 export const clearMemory = createAsyncThunk(
     'chat/clearMemory',
-    async (_, { rejectWithValue }) => {
+    async (_, { getState, rejectWithValue }) => {
         try {
-            const response = await fetch(`${API_BASE_URL}/clear-memory`, {
+            const conversationId = getState().chat.conversationId;
+            if (!conversationId) {
+                // No reply yet, so the server holds no memory for this conversation
+                return { message: 'Conversation memory cleared successfully', sessions_cleared: 0 };
+            }
+            const response = await fetch(`${API_BASE_URL}/clear-memory?session_id=${encodeURIComponent(conversationId)}`, {
                 method: 'POST',
             });
 
@@ -124,6 +130,7 @@ const chatSlice = createSlice({
                 });
 
                 state.lastMessageTimestamp = action.payload.timestamp;
+                state.conversationId = action.payload.session_id || state.conversationId;
             })
             .addCase(sendChatMessage.rejected, (state, action) => {
                 state.isLoading = false;